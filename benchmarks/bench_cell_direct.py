@@ -0,0 +1,143 @@
+# benchmarks/bench_cell_direct.py
+"""
+有线表格两种文字识别方式的耗时与单元格文字准确率对比：
+- page: 整页 RapidOCR（检测 + 识别）后 match_ocr_cell 匹配到单元格，再 re_rec 补识别（当前默认流程）
+- cell: rec_cells 按单元格框裁剪，空单元格跳过，单行文字批量识别，多行文字的单元格单独检测识别（cell_direct）
+
+单元格框直接使用合成表格的标注（表格线检测不参与对比），两种方式的输入相同。
+--empty 为清空文字的单元格比例，--multiline 为写两行文字的合并单元格（跨两行）比例。
+准确率按单元格统计：exact 为去掉空白后与标注相同，caseless 不区分大小写，sim 为平均 difflib 相似度。
+
+用法:
+    python benchmarks/bench_cell_direct.py --rows 20 --cols 6 --tables 3 --repeat 3
+    python benchmarks/bench_cell_direct.py --batch-size 6 16 --empty 0.3 --multiline 0.5 --out cell_direct.json
+"""
+import argparse
+import copy
+import difflib
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_utils import environment_info, load_vendored_wired_main, summarize  # noqa: E402
+from synthetic_tables import FONT, _random_text, make_table  # noqa: E402
+
+from table_postprocess import match_ocr_cell  # noqa: E402
+
+
+def make_case(rows, cols, merged, seed, empty, multiline, noise):
+    """
+    返回 (图像, 单元格框 (N, 4, 2), 各单元格的标注文字)。
+    """
+    rng = np.random.default_rng(seed + 1000)
+    img, truth = make_table(rows=rows, cols=cols, merged=merged, seed=seed)
+    texts = []
+    for cell in truth["cells"]:
+        (x1, y1), _, (x2, y2), _ = cell["polygon"]
+        text = cell["text"]
+        if rng.random() < empty:
+            cv2.rectangle(img, (x1 + 3, y1 + 3), (x2 - 3, y2 - 3), (255, 255, 255), -1)
+            text = ""
+        elif cell["row_end"] > cell["row_start"] and rng.random() < multiline:
+            cv2.rectangle(img, (x1 + 3, y1 + 3), (x2 - 3, y2 - 3), (255, 255, 255), -1)
+            lines = [_random_text(rng), _random_text(rng)]
+            for k, line in enumerate(lines):
+                ty = y1 + (y2 - y1) * (k + 1) // 3 + 6
+                cv2.putText(img, line, (x1 + 8, ty), FONT, 0.6, (20, 20, 20), 1, cv2.LINE_AA)
+            text = "".join(lines)
+        texts.append(text)
+    if noise > 0:
+        gauss = rng.normal(0, noise * 255, img.shape)
+        img = np.clip(img.astype(np.float32) + gauss, 0, 255).astype(np.uint8)
+    polygons = np.array([cell["polygon"] for cell in truth["cells"]], dtype=np.float32)
+    return img, polygons, texts
+
+
+def cell_texts(cell_box_det_map, n):
+    # 与 TableCells 相同按单元格拼接文字，比较时去掉空白
+    return ["".join("".join(str(det[1]) for det in cell_box_det_map.get(i, [])).split()) for i in range(n)]
+
+
+def score(pred, truth):
+    exact = sum(p == t for p, t in zip(pred, truth))
+    caseless = sum(p.lower() == t.lower() for p, t in zip(pred, truth))
+    sim = sum(difflib.SequenceMatcher(None, p, t).ratio() if p or t else 1.0 for p, t in zip(pred, truth))
+    return {"cells": len(truth), "exact": exact, "caseless": caseless, "sim": sim}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--cols", type=int, default=6)
+    parser.add_argument("--merged", type=int, default=3)
+    parser.add_argument("--tables", type=int, default=3, help="合成表格的数量")
+    parser.add_argument("--noise", type=float, default=0.02)
+    parser.add_argument("--empty", type=float, default=0.0, help="清空文字的单元格比例")
+    parser.add_argument("--multiline", type=float, default=0.0, help="写两行文字的合并单元格比例")
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[0],
+                        help="cell 方式每批识别的图片数，0 为 RapidOCR 配置的 rec_batch_num")
+    parser.add_argument("--repeat", type=int, default=3, help="每张表格的计时次数，准确率只统计第一次")
+    parser.add_argument("--out", help="结果 JSON 的输出路径")
+    args = parser.parse_args()
+
+    from rapidocr_onnxruntime import RapidOCR
+
+    # 模块级的 rec_cells / re_rec 只需要 RapidOCR，不加载表格线模型
+    wired_main = load_vendored_wired_main()
+    ocr = RapidOCR()
+    cases = [make_case(args.rows, args.cols, args.merged, seed, args.empty, args.multiline, args.noise)
+             for seed in range(args.tables)]
+
+    def page(img, polygons):
+        ocr_result, _ = ocr(img)
+        cell_box_det_map, _ = match_ocr_cell(ocr_result or [], polygons)
+        return wired_main.re_rec(ocr, img, polygons, cell_box_det_map, True)
+
+    methods = {"page": page}
+    for batch_size in args.batch_size:
+        methods[f"cell/{batch_size or 'default'}"] = (
+            lambda img, polygons, b=batch_size:
+            wired_main.rec_cells(ocr, img, polygons, b or None)[0]
+        )
+
+    # 预热
+    for func in methods.values():
+        func(*cases[0][:2])
+
+    results = {}
+    for name, func in methods.items():
+        times, total = [], dict.fromkeys(("cells", "exact", "caseless", "sim"), 0)
+        for img, polygons, texts in cases:
+            for r in range(args.repeat):
+                s = time.perf_counter()
+                cell_box_det_map = func(img, copy.deepcopy(polygons))
+                times.append(time.perf_counter() - s)
+                if r == 0:
+                    for key, value in score(cell_texts(cell_box_det_map, len(texts)), texts).items():
+                        total[key] += value
+        results[name] = {"latency": summarize(times), **total}
+
+    n_cells = sum(len(texts) for *_, texts in cases)
+    print(f"表格 {len(cases)} 张（{args.rows}x{args.cols}），单元格 {n_cells} 个，"
+          f"空单元格 {args.empty:.0%}，多行合并单元格 {args.multiline:.0%}")
+    print(f"{'method':>14} {'p50 ms':>9} {'p95 ms':>9} {'exact':>7} {'caseless':>8} {'sim':>6}")
+    for name, res in results.items():
+        print(f"{name:>14} {res['latency']['p50_ms']:9.1f} {res['latency']['p95_ms']:9.1f} "
+              f"{res['exact'] / res['cells']:7.3f} {res['caseless'] / res['cells']:8.3f} "
+              f"{res['sim'] / res['cells']:6.3f}")
+
+    if args.out:
+        result = {"meta": {**environment_info(), **vars(args)}, "methods": results}
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# benchmarks/bench_image_handoff.py
+"""
+方向矫正之后、识别之前的图像传递：每页的峰值内存与耗时对比。
+
+表格检测的结果（四个角点）事先给定，只比较仓库代码中的图像处理，不运行检测与识别模型：
+- legacy: 原 correct_orientation + perform_ocr(路径)：整页 BGR->RGB 转换并复制一份，每张表格再复制整页后透视变换，
+          画可视化框并写出，切图以 JPEG 写入磁盘，表格分类与表格识别各自重新读取、解码该文件
+- memory: extract_tables + perform_ocr(数组)：直接从 BGR 原图透视变换，切图留在内存中，分类与识别共用同一个数组
+
+峰值内存由 tracemalloc 统计（numpy 数组与 cv2 返回的数组都会计入），为处理一页期间相对开始时的最大增量。
+
+用法:
+    python benchmarks/bench_image_handoff.py --widths 1200 3000 --tables 1 2 --repeat 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_utils import summarize  # noqa: E402
+from synthetic_tables import make_table  # noqa: E402
+
+
+def make_page(width, n_tables):
+    """
+    生成宽度为 width 的页面，以及按高度均分的 n_tables 个略微倾斜的表格角点。
+    """
+    img, _ = make_table(rows=40, cols=8, merged=4, seed=1)
+    height = int(img.shape[0] * width / img.shape[1])
+    page = cv2.resize(img, (width, height), interpolation=cv2.INTER_AREA)
+    corners = []
+    step = height // n_tables
+    for i in range(n_tables):
+        top, bottom = i * step + 10, (i + 1) * step - 10
+        corners.append({
+            "box": [10, top, width - 10, bottom],
+            "lt": [12, top + 6], "rt": [width - 10, top],
+            "rb": [width - 14, bottom - 4], "lb": [10, bottom],
+        })
+    return page, corners
+
+
+def legacy(page, corners, out_dir):
+    from rapid_table_det.utils.visuallize import extract_table_img, img_loader, visuallize
+
+    img = cv2.cvtColor(img_loader(page), cv2.COLOR_BGR2RGB)
+    extract_img = img.copy()
+    paths = []
+    for i, res in enumerate(corners):
+        visuallize(img, res["box"], res["lt"], res["rt"], res["rb"], res["lb"])
+        wrapped_img = extract_table_img(extract_img.copy(), res["lt"], res["rt"], res["rb"], res["lb"])
+        path = os.path.join(out_dir, f"page-extract-{i}.jpg")
+        cv2.imwrite(path, wrapped_img)
+        paths.append(path)
+    cv2.imwrite(os.path.join(out_dir, "page-visualize.jpg"), img)
+    del img, extract_img
+    for path in paths:
+        # 表格分类与表格识别分别按路径读取
+        cls_input = img_loader(path)
+        del cls_input
+        engine_input = img_loader(path)
+        del engine_input
+    return len(paths)
+
+
+def memory(page, corners, out_dir):
+    from rapid_table_det.utils.visuallize import extract_table_img, img_loader
+
+    img = img_loader(page)
+    tables = [extract_table_img(img, res["lt"], res["rt"], res["rb"], res["lb"]) for res in corners]
+    for table in tables:
+        # perform_ocr 解码一次（数组原样返回），分类与识别共用
+        cls_input = engine_input = img_loader(table)
+        del cls_input, engine_input
+    return len(tables)
+
+
+def measure(func, page, corners, repeat):
+    times, peaks = [], []
+    with tempfile.TemporaryDirectory() as out_dir:
+        func(page, corners, out_dir)
+        for _ in range(repeat):
+            tracemalloc.start()
+            s = time.perf_counter()
+            func(page, corners, out_dir)
+            times.append(time.perf_counter() - s)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    return summarize(times), max(peaks) / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--widths", type=int, nargs="+", default=[1200, 3000], help="页面宽度（像素）")
+    parser.add_argument("--tables", type=int, nargs="+", default=[1, 2], help="每页的表格数")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'width':>6} {'tables':>6} {'page MB':>8} {'variant':>8} {'p50 ms':>8} {'peak MB':>8}")
+    for width in args.widths:
+        for n_tables in args.tables:
+            page, corners = make_page(width, n_tables)
+            for name, func in (("legacy", legacy), ("memory", memory)):
+                stats, peak = measure(func, page, corners, args.repeat)
+                print(f"{width:>6} {n_tables:>6} {page.nbytes / 2**20:8.1f} {name:>8} "
+                      f"{stats['p50_ms']:8.2f} {peak:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# benchmarks/bench_layout_cache.py
+"""
+有线表格版式缓存（layout_cache.py）的命中率、误命中与配准误差。
+
+用 synthetic_tables 生成若干种版式（行列数与合并单元格数相同、合并位置不同，最容易误命中），
+每种版式再生成若干份“填写”不同的样本：重写单元格文字、加上手写笔画，
+并按随机比例分别缩放宽高、四周留白不同、加噪声，模拟同一表单的不同扫描件。
+
+每种版式的第一份样本以标注的单元格框作为完整流程的结果存入缓存，其余样本查询缓存：
+- 同版式样本应命中，统计命中率与配准后单元格角点相对标注的误差
+- 不同版式的样本（只存入另一种版式时查询）不应命中，统计误命中
+表格线检测与结构恢复的耗时需要模型，见 run_benchmarks.py；这里只统计查询（指纹 + 配准 + 校验）的耗时。
+
+用法:
+    python benchmarks/bench_layout_cache.py --layouts 6 --samples 10 --rows 12 --cols 6 --merged 4
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_utils import summarize  # noqa: E402
+from synthetic_tables import FONT, _random_text, make_table  # noqa: E402
+
+from layout_cache import LayoutCache  # noqa: E402
+
+
+def fill_variant(img, truth, rng, noise=0.02):
+    """
+    同一版式的另一份填写样本，返回 (图像, 单元格框 (N, 4, 2))。
+    """
+    img = img.copy()
+    for cell in truth["cells"]:
+        (x1, y1), _, (x2, y2), _ = cell["polygon"]
+        cv2.rectangle(img, (x1 + 4, y1 + 4), (x2 - 4, y2 - 4), (255, 255, 255), -1)
+        text = _random_text(rng)
+        cv2.putText(img, text, (x1 + 8, (y1 + y2) // 2 + 6), FONT, 0.6, (20, 20, 20), 1, cv2.LINE_AA)
+        if rng.random() < 0.3:
+            # 手写笔画
+            pts = np.stack([rng.uniform(x1 + 6, x2 - 6, 5), rng.uniform(y1 + 6, y2 - 6, 5)], axis=1)
+            cv2.polylines(img, [pts.astype(np.int32)], False, (120, 40, 20), 2, cv2.LINE_AA)
+    polygons = np.array([cell["polygon"] for cell in truth["cells"]], dtype=np.float32)
+
+    fx, fy = rng.uniform(0.85, 1.15, 2)
+    img = cv2.resize(img, None, fx=fx, fy=fy, interpolation=cv2.INTER_AREA)
+    top, bottom, left, right = (int(v) for v in rng.integers(0, 30, 4))
+    img = cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(255, 255, 255))
+    polygons[..., 0] = polygons[..., 0] * fx + left
+    polygons[..., 1] = polygons[..., 1] * fy + top
+    if noise > 0:
+        gauss = rng.normal(0, noise * 255, img.shape)
+        img = np.clip(img.astype(np.float32) + gauss, 0, 255).astype(np.uint8)
+    return img, polygons
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--layouts", type=int, default=6)
+    parser.add_argument("--samples", type=int, default=10, help="每种版式的样本数")
+    parser.add_argument("--rows", type=int, default=12)
+    parser.add_argument("--cols", type=int, default=6)
+    parser.add_argument("--merged", type=int, default=4)
+    parser.add_argument("--min-confidence", type=float, default=0.9)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    layouts = []
+    for i in range(args.layouts):
+        img, truth = make_table(rows=args.rows, cols=args.cols, merged=args.merged, seed=100 + i)
+        samples = [fill_variant(img, truth, rng) for _ in range(args.samples)]
+        layouts.append((truth, samples))
+
+    cache = LayoutCache(max_entries=args.layouts, min_confidence=args.min_confidence)
+    logi = lambda truth: np.array([[c["row_start"], c["row_end"], c["col_start"], c["col_end"]]  # noqa: E731
+                                   for c in truth["cells"]])
+    for truth, samples in layouts:
+        img, polygons = samples[0]
+        match, fingerprint = cache.lookup(img)
+        cache.store(fingerprint, (), polygons, logi(truth))
+
+    times, errors, confidences = [], [], []
+    hits = wrong_logic = 0
+    for truth, samples in layouts:
+        for img, polygons in samples[1:]:
+            s = time.perf_counter()
+            match, _ = cache.lookup(img)
+            times.append(time.perf_counter() - s)
+            if match is None:
+                continue
+            hits += 1
+            confidences.append(match.confidence)
+            errors.append(float(np.abs(match.polygons - polygons).max()))
+            wrong_logic += not np.array_equal(match.logi_points, logi(truth))
+    total = len(times)
+
+    # 误命中：缓存中只有另一种版式
+    false_hits = rejected = 0
+    for i, (truth, samples) in enumerate(layouts):
+        other = LayoutCache(max_entries=1, min_confidence=args.min_confidence)
+        other_truth, other_samples = layouts[(i + 1) % len(layouts)]
+        _, fingerprint = other.lookup(other_samples[0][0])
+        other.store(fingerprint, (), other_samples[0][1], logi(other_truth))
+        for img, _ in samples[1:]:
+            match, _ = other.lookup(img)
+            false_hits += match is not None
+        rejected += other.stats["rejected"]
+
+    stats = summarize(times)
+    print(f"版式 {args.layouts} 种，每种 {args.samples} 份样本，{args.rows}x{args.cols}，合并 {args.merged} 处")
+    print(f"同版式命中 {hits}/{total}（{hits / total:.1%}），逻辑行列不一致 {wrong_logic}")
+    if hits:
+        print(f"  置信度 min {min(confidences):.3f}，单元格角点最大误差 p50 {np.median(errors):.2f}px"
+              f" max {max(errors):.2f}px")
+    print(f"不同版式误命中 {false_hits}/{args.layouts * (args.samples - 1)}（校验拒绝 {rejected} 次）")
+    print(f"查询耗时 p50 {stats['p50_ms']:.2f}ms p95 {stats['p95_ms']:.2f}ms")
+    print(f"统计: {cache.snapshot()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# benchmarks/bench_logging.py
+"""
+并发请求下日志对请求延迟的影响。
+
+每个"请求"按 server.py 处理一张图片的顺序记录日志（约 10 条普通日志、印章接口响应与表格 HTML 两段大内容），
+中间穿插释放 GIL 的短暂等待模拟模型推理，多个线程并发执行，统计每个请求的耗时分布：
+
+- legacy: 原配置，basicConfig 的 FileHandler + StreamHandler 在请求线程中同步写入，f-string 立即格式化，
+          大段内容每次都完整输出
+- queued: log_config.setup_logging，请求线程只入队，延迟格式化，大段内容按 LOG_PAYLOAD_SAMPLE_RATE 抽样
+
+每种配置在独立的子进程中运行，标准错误输出重定向到文件（相当于容器的日志采集）。
+
+用法:
+    python benchmarks/bench_logging.py --threads 8 --requests 200
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_utils import ROOT, summarize  # noqa: E402
+
+WORKER = """
+import json, logging, sys, threading, time
+sys.path.insert(0, {root!r})
+sys.path.insert(0, {bench!r})
+from bench_utils import summarize
+
+variant, threads, n_requests = {variant!r}, {threads}, {requests}
+if variant == "legacy":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s",
+                        handlers=[logging.FileHandler("server.log"), logging.StreamHandler()])
+else:
+    from log_config import setup_logging, start_trace
+    setup_logging("server.log")
+logger = logging.getLogger("server")
+
+seal_data = {{"code": 200, "result": {{"details": {{"stamp": [
+    {{"text": "某某有限公司财务专用章" * 4, "box": [[i, i + 1] for i in range(40)], "score": 0.98}} for _ in range(20)
+]}}}}}}
+html = "<table>" + "".join("<tr>" + "<td>金额 12,345.67</td>" * 12 + "</tr>" for _ in range(200)) + "</table>"
+
+def request(i):
+    if variant == "legacy":
+        logger.info(f"已接收文件: upload_{{i}}.jpg 大小: 123456 字节")
+        logger.info(f"已调整尺寸: upload_{{i}}.jpg 尺寸: {{(4000, 3000)}} -> {{(1200, 900)}}")
+        logger.info(f"发送文件到印章识别 API: http://seal/recognize_seal")
+        logger.info(f"印章识别 API 响应: {{seal_data}}")
+        time.sleep(0.002)
+        logger.info(f"obj_det_elapse: 0.1, edge_elapse=0.2, rotate_det_elapse=0.3")
+        logger.info(f"方向矫正完成，用时 {{[0.1, 0.2, 0.3]}} 秒。")
+        logger.info(f"矫正后图像: {{['/tmp/x/page-extract-0.jpg']}}")
+        time.sleep(0.002)
+        print(f"Engine elapsed time: 0.5 seconds")
+        print(html)
+        logger.info(f"OCR 完成，用时 0.6 秒。")
+    else:
+        start_trace()
+        logger.info("已接收文件: %s 大小: %d 字节", f"upload_{{i}}.jpg", 123456)
+        logger.info("已调整尺寸: %s 尺寸: %s -> %s", f"upload_{{i}}.jpg", (4000, 3000), (1200, 900))
+        logger.info("发送文件到印章识别 API: %s", "http://seal/recognize_seal")
+        logger.info("印章识别 API 响应", extra={{"payload": seal_data}})
+        time.sleep(0.002)
+        logger.debug("obj_det_elapse: %s, edge_elapse=%s, rotate_det_elapse=%s", 0.1, 0.2, 0.3)
+        logger.info("方向矫正完成，用时 %s 秒。", [0.1, 0.2, 0.3])
+        logger.info("矫正后图像: %s", ["/tmp/x/page-extract-0.jpg"])
+        time.sleep(0.002)
+        logger.debug("Engine elapsed time: %s seconds", 0.5)
+        logger.info("表格识别 HTML", extra={{"payload": html}})
+        logger.info("OCR 完成，用时 %s 秒。", 0.6)
+
+samples = []
+lock = threading.Lock()
+
+def run():
+    local = []
+    for i in range(n_requests):
+        s = time.perf_counter()
+        request(i)
+        local.append(time.perf_counter() - s)
+    with lock:
+        samples.extend(local)
+
+start = time.perf_counter()
+workers = [threading.Thread(target=run) for _ in range(threads)]
+for t in workers:
+    t.start()
+for t in workers:
+    t.join()
+wall = time.perf_counter() - start
+logging.shutdown()
+out = summarize(samples)
+out["throughput_rps"] = round(len(samples) / wall, 1)
+with open(f"result_{{variant}}.json", "w") as f:
+    json.dump(out, f)
+"""
+
+
+def run_variant(variant, args, work_dir):
+    code = WORKER.format(root=ROOT, bench=os.path.dirname(os.path.abspath(__file__)), variant=variant,
+                         threads=args.threads, requests=args.requests)
+    log_path = os.path.join(work_dir, f"{variant}.stderr")
+    env = {**os.environ, "LOG_PAYLOAD_SAMPLE_RATE": str(args.payload_sample_rate)}
+    with open(log_path, "w") as log:
+        # legacy 中 print 的内容写到标准输出，同样重定向到日志文件
+        subprocess.run([sys.executable, "-c", code], cwd=work_dir, env=env, stdout=log, stderr=log)
+    result_path = os.path.join(work_dir, f"result_{variant}.json")
+    if not os.path.exists(result_path):
+        with open(log_path) as f:
+            raise RuntimeError(f"{variant} 运行失败:\n{f.read()[-2000:]}")
+    with open(result_path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="每个线程的请求数")
+    parser.add_argument("--payload-sample-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    print(f"{'variant':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for variant in ("legacy", "queued"):
+            res = run_variant(variant, args, work_dir)
+            print(f"{variant:>8} {res['p50_ms']:8.2f} {res['p95_ms']:8.2f} {res['p99_ms']:8.2f} "
+                  f"{res['throughput_rps']:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
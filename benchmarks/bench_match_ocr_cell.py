@@ -0,0 +1,101 @@
+# benchmarks/bench_match_ocr_cell.py
+"""
+match_ocr_cell 规模测试：对比 wired_table_rec 原实现与 table_postprocess 中的网格索引实现。
+
+用法:
+    python benchmarks/bench_match_ocr_cell.py
+    python benchmarks/bench_match_ocr_cell.py --sizes 10 100 1000 10000 --max-ref-cells 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from table_postprocess import match_ocr_cell  # noqa: E402
+
+try:
+    from wired_table_rec.utils_table_recover import match_ocr_cell as ref_match_ocr_cell
+except ImportError:
+    ref_match_ocr_cell = None
+
+
+def make_table(n_cells, boxes_per_cell=1.5, seed=0):
+    """
+    生成近似方形的网格表格，以及落在单元格内、带抖动的 OCR 结果。
+    约 5% 的 OCR 框会跨越单元格边界，用于覆盖不匹配的情况。
+    """
+    rng = np.random.default_rng(seed)
+    n_cols = max(1, int(np.sqrt(n_cells * 3)))
+    n_rows = max(1, int(np.ceil(n_cells / n_cols)))
+    cell_w, cell_h = 90.0, 32.0
+
+    polygons = []
+    for r in range(n_rows):
+        for c in range(n_cols):
+            if len(polygons) >= n_cells:
+                break
+            x1, y1 = c * cell_w, r * cell_h
+            x2, y2 = x1 + cell_w, y1 + cell_h
+            polygons.append([[x1, y1], [x2, y1], [x2, y2], [x1, y2]])
+    polygons = np.array(polygons, dtype=np.float32)
+
+    ocr_result = []
+    n_boxes = int(n_cells * boxes_per_cell)
+    for k in range(n_boxes):
+        (x1, y1), _, (x2, y2), _ = polygons[rng.integers(len(polygons))]
+        w = rng.uniform(0.2, 0.8) * (x2 - x1)
+        h = rng.uniform(0.4, 0.8) * (y2 - y1)
+        bx = rng.uniform(x1, x2 - w)
+        by = rng.uniform(y1, y2 - h)
+        if rng.random() < 0.05:
+            bx += (x2 - x1) * 0.7
+        box = [[bx, by], [bx + w, by], [bx + w, by + h], [bx, by + h]]
+        ocr_result.append([box, f"t{k}", 0.9])
+    return ocr_result, polygons
+
+
+def timed(func, *args, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        s = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - s)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 2000, 5000, 10000])
+    parser.add_argument("--boxes-per-cell", type=float, default=1.5)
+    parser.add_argument("--max-ref-cells", type=int, default=2000,
+                        help="原实现为 O(N*M)，超过该单元格数时不再运行原实现")
+    args = parser.parse_args()
+
+    print(f"{'cells':>7} {'ocr':>7} {'grid(ms)':>10} {'ref(ms)':>10} {'speedup':>8} {'same':>5}")
+    for n_cells in args.sizes:
+        ocr_result, polygons = make_table(n_cells, args.boxes_per_cell)
+        (matched, _), t_new = timed(match_ocr_cell, ocr_result, polygons)
+
+        t_ref, same = None, "-"
+        if ref_match_ocr_cell is not None and n_cells <= args.max_ref_cells:
+            (ref_matched, _), t_ref = timed(ref_match_ocr_cell, ocr_result, polygons, repeat=1)
+            same = "yes" if (
+                list(matched) == list(ref_matched)
+                and all(
+                    [id(x) for x in matched[k]] == [id(x) for x in ref_matched[k]]
+                    for k in matched
+                )
+            ) else "NO"
+
+        ref_str = f"{t_ref * 1000:10.1f}" if t_ref is not None else f"{'-':>10}"
+        speedup = f"{t_ref / t_new:7.1f}x" if t_ref is not None else f"{'-':>8}"
+        print(f"{n_cells:>7} {len(ocr_result):>7} {t_new * 1000:10.1f} {ref_str} {speedup} {same:>5}")
+
+
+if __name__ == "__main__":
+    main()
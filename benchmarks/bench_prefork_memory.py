@@ -0,0 +1,143 @@
+# benchmarks/bench_prefork_memory.py
+"""
+pre-fork 服务的内存占用：master 加载模型后 fork（PRELOAD_MODELS=1）与每个工作进程各自加载模型
+（PRELOAD_MODELS=0）对比。
+
+以 gunicorn.conf.py 启动服务，就绪后可先发送若干请求，再读取 master 与各工作进程的
+/proc/<pid>/smaps_rollup：
+    RSS  常驻内存，共享页在每个进程中都会计入
+    PSS  共享页按进程数均摊，所有进程 PSS 之和即服务实际占用的物理内存
+    USS  进程独占的内存（Private_Clean + Private_Dirty）
+
+仅支持 Linux。
+
+用法:
+    python benchmarks/bench_prefork_memory.py --workers 4 --requests 8
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_utils import ROOT  # noqa: E402
+from synthetic_tables import make_table  # noqa: E402
+
+# 在仓库的 gunicorn 配置基础上启用仓库中的 wired_table_rec main.py 修改版，与部署时覆盖安装包的效果相同
+CONFIG_WRAPPER = """
+import sys
+sys.path.insert(0, {root!r})
+sys.path.insert(0, {bench!r})
+exec(compile(open({conf!r}, encoding="utf-8").read(), {conf!r}, "exec"))
+from bench_utils import install_vendored_wired_main
+install_vendored_wired_main()
+"""
+
+
+def smaps_rollup(pid):
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[-1] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss": fields.get("Rss", 0.0),
+        "pss": fields.get("Pss", 0.0),
+        "uss": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0),
+    }
+
+
+def child_pids(pid):
+    pids = []
+    for tid in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{tid}/children") as f:
+            pids.extend(int(p) for p in f.read().split())
+    return pids
+
+
+def wait_ready(base, proc, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            return "服务进程已退出"
+        try:
+            resp = requests.get(f"{base}/readyz", timeout=1)
+            if resp.status_code == 200:
+                return None
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    return "等待就绪超时"
+
+
+def run_mode(preload, args, work_dir, png):
+    conf = os.path.join(work_dir, "gunicorn_bench.conf.py")
+    with open(conf, "w", encoding="utf-8") as f:
+        f.write(CONFIG_WRAPPER.format(root=ROOT, bench=os.path.dirname(os.path.abspath(__file__)),
+                                      conf=os.path.join(ROOT, "gunicorn.conf.py")))
+    env = {**os.environ, "WORKERS": str(args.workers), "BIND": f"127.0.0.1:{args.port}",
+           "PRELOAD_MODELS": "1" if preload else "0"}
+    log_path = os.path.join(work_dir, f"gunicorn_{'preload' if preload else 'per_worker'}.log")
+    with open(log_path, "w") as log:
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", conf, "--pythonpath", ROOT, "server:app"],
+            cwd=work_dir, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+    base = f"http://127.0.0.1:{args.port}"
+    try:
+        error = wait_ready(base, proc, args.timeout)
+        if error:
+            with open(log_path) as f:
+                tail = f.read()[-2000:]
+            return {"error": f"{error}\n{tail}"}
+        # 每个工作进程各自加载模型时，等待全部工作进程完成加载
+        deadline = time.time() + args.timeout
+        while len(child_pids(proc.pid)) < args.workers and time.time() < deadline:
+            time.sleep(0.2)
+        time.sleep(args.settle)
+        for _ in range(args.requests):
+            requests.post(f"{base}/process_image", files={"image": ("table.png", png)}, timeout=args.timeout)
+        master = smaps_rollup(proc.pid)
+        workers = [smaps_rollup(pid) for pid in child_pids(proc.pid)]
+    finally:
+        proc.terminate()
+        proc.wait(timeout=60)
+    return {"master": master, "workers": workers}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=0, help="测量前发送的请求数")
+    parser.add_argument("--port", type=int, default=13107)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--settle", type=float, default=2.0, help="就绪后等待内存稳定的时间（秒）")
+    args = parser.parse_args()
+
+    img, _ = make_table(rows=10, cols=5, merged=2)
+    png = cv2.imencode(".png", img)[1].tobytes()
+    print(f"{'mode':>12} {'procs':>6} {'RSS MB':>9} {'PSS MB':>9} {'USS/worker':>11}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for preload in (True, False):
+            name = "preload" if preload else "per_worker"
+            res = run_mode(preload, args, work_dir, png)
+            if "error" in res:
+                print(f"{name:>12} 失败: {res['error']}")
+                continue
+            procs = [res["master"]] + res["workers"]
+            uss = sum(w["uss"] for w in res["workers"]) / max(1, len(res["workers"]))
+            print(
+                f"{name:>12} {len(procs):>6} {sum(p['rss'] for p in procs):9.1f} "
+                f"{sum(p['pss'] for p in procs):9.1f} {uss:11.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# benchmarks/bench_resize_image.py
+"""
+上传图片缩放阶段的耗时与内存对比。
+
+- 原实现: PIL 全分辨率解码 -> LANCZOS 缩放 -> 写入新文件 -> 后续阶段再次解码该文件
+- 现实现: server.resize_image，JPEG 解码时 DCT 缩放 -> INTER_AREA 缩放 -> 直接返回数组
+
+每个组合在独立的子进程中运行，内存取处理过程中 RSS 相对开始时的峰值增量。
+
+用法:
+    python benchmarks/bench_resize_image.py --sizes 12 48 --repeat 3
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_utils import ROOT  # noqa: E402
+from synthetic_tables import make_table  # noqa: E402
+
+
+def legacy_resize(input_path, output_path, max_width=1200):
+    from PIL import Image
+    from rapid_table_det.utils.visuallize import img_loader
+
+    with Image.open(input_path) as img:
+        width, height = img.size
+        if width > max_width:
+            ratio = max_width / float(width)
+            img = img.resize((max_width, int(height * ratio)), Image.LANCZOS)
+            img.save(output_path)
+            input_path = output_path
+    # 原流程中方向矫正会重新读取缩放后的文件
+    return img_loader(input_path)
+
+
+class PeakRSS:
+    """
+    后台线程定时采样当前进程的 RSS（Linux /proc），记录 with 块内的峰值增量。
+    导入模型库时的内存高水位通常高于单张图片的处理，ru_maxrss 反映不出差异。
+    """
+
+    def __init__(self, interval=0.002):
+        self.interval = interval
+        self.page_mb = os.sysconf("SC_PAGE_SIZE") / 2**20
+        self.peak = 0.0
+
+    def current(self):
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * self.page_mb
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.current() - self.base)
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self.base = self.current()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_variant(variant, img_path, repeat, results):
+    work_dir = tempfile.mkdtemp()
+    # 导入 server 会在当前目录创建日志和预处理目录
+    os.chdir(work_dir)
+    sys.path.insert(0, ROOT)
+    import logging
+
+    import server
+
+    logging.disable(logging.INFO)
+    times = []
+    peak = 0.0
+    for _ in range(repeat):
+        with PeakRSS() as rss:
+            s = time.perf_counter()
+            if variant == "legacy":
+                arr = legacy_resize(img_path, os.path.join(work_dir, "resized" + os.path.splitext(img_path)[1]))
+            else:
+                arr, _ = server.resize_image(img_path)
+            times.append(time.perf_counter() - s)
+        peak = max(peak, rss.peak)
+        shape = arr.shape
+        del arr
+    results.put({"best": min(times), "rss_mb": peak, "shape": shape})
+
+
+def measure(variant, img_path, repeat):
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    proc = ctx.Process(target=run_variant, args=(variant, img_path, repeat, results))
+    proc.start()
+    res = results.get()
+    proc.join()
+    return res
+
+
+def make_image(work_dir, megapixels, ext):
+    # 单元格尺寸随像素数放大，得到近似 4:3 的大图
+    scale = (megapixels / 12) ** 0.5
+    img, _ = make_table(rows=60, cols=20, merged=10, cell_w=int(200 * scale), cell_h=int(60 * scale),
+                        noise=0.02, seed=megapixels)
+    path = os.path.join(work_dir, f"table_{megapixels}mp.{ext}")
+    cv2.imwrite(path, img)
+    return path, img.shape
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[12, 48], help="图片像素数（百万）")
+    parser.add_argument("--formats", nargs="+", default=["jpg", "png"], choices=["jpg", "png"])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'image':>16} {'size':>12} {'old ms':>8} {'new ms':>8} {'old MB':>8} {'new MB':>8} {'out':>12}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for mp in args.sizes:
+            for ext in args.formats:
+                img_path, shape = make_image(work_dir, mp, ext)
+                old = measure("legacy", img_path, args.repeat)
+                new = measure("new", img_path, args.repeat)
+                size = f"{shape[1]}x{shape[0]}"
+                out = f"{new['shape'][1]}x{new['shape'][0]}"
+                print(
+                    f"{os.path.basename(img_path):>16} {size:>12} "
+                    f"{old['best'] * 1000:8.1f} {new['best'] * 1000:8.1f} "
+                    f"{old['rss_mb']:8.1f} {new['rss_mb']:8.1f} {out:>12}"
+                )
+
+
+if __name__ == "__main__":
+    main()
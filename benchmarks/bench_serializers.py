@@ -0,0 +1,111 @@
+# benchmarks/bench_serializers.py
+"""
+识别结果序列化的耗时与体积对比。
+
+legacy 为原流程：每页 json.dump(indent=4) 写文件 -> json.load 读回 -> jsonify 编码响应；
+其余为 result_serializers 中各格式直接编码整个响应。
+
+用法:
+    python benchmarks/bench_serializers.py --pages 40 --cells 300
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_utils  # noqa: E402,F401  将仓库根目录加入导入路径
+from result_serializers import (  # noqa: E402
+    RESPONSE_MIMETYPES, dumps_arrow_stream, dumps_json, dumps_msgpack, orjson,
+)
+from synthetic_tables import make_table  # noqa: E402
+
+
+def make_pages(n_pages, n_cells):
+    pages = []
+    cols = 6
+    for p in range(n_pages):
+        _, truth = make_table(rows=max(1, n_cells // cols), cols=cols, merged=0, seed=p)
+        tables = []
+        for cell in truth["cells"]:
+            (x1, y1), _, (x2, y2), _ = cell["polygon"]
+            tables.append({
+                "col_start": cell["col_start"], "col_end": cell["col_end"],
+                "row_start": cell["row_start"], "row_end": cell["row_end"],
+                "position": [x1, y1, x2, y1, x2, y2, x1, y2],
+                "text": cell["text"] + " 金额合计",
+            })
+        pages.append({"tables": tables})
+    return pages
+
+
+def make_response(pages):
+    return {
+        "code": 200, "message": "success",
+        "result": {
+            "table": {"details": [], "result": {"tables": [c for p in pages for c in p["tables"]]}},
+            "seal": {"message": "No stamps detected"},
+        },
+    }
+
+
+def legacy(pages, work_dir):
+    from flask import Flask, jsonify
+
+    all_tables = []
+    for i, page in enumerate(pages):
+        path = os.path.join(work_dir, f"page_{i}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(page, f, ensure_ascii=False, indent=4)
+        with open(path, "r", encoding="utf-8") as f:
+            all_tables.extend(json.load(f)["tables"])
+    response = {
+        "code": 200, "message": "success",
+        "result": {"table": {"details": [], "result": {"tables": all_tables}},
+                   "seal": {"message": "No stamps detected"}},
+    }
+    with Flask(__name__).app_context():
+        return jsonify(response).get_data()
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        s = time.perf_counter()
+        out = func()
+        best = min(best, time.perf_counter() - s)
+    return best, out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--cells", type=int, default=300, help="每页单元格数")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pages = make_pages(args.pages, args.cells)
+    n_cells = sum(len(p["tables"]) for p in pages)
+    print(f"{args.pages} 页, {n_cells} 个单元格, JSON 编码器: {'orjson' if orjson else 'json'}")
+    print(f"{'format':>16} {'ms':>9} {'KB':>9}")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        variants = [("legacy", lambda: legacy(pages, work_dir))]
+        variants.append(("json", lambda: dumps_json(make_response(pages), sort_keys=True)))
+        if "application/msgpack" in RESPONSE_MIMETYPES:
+            variants.append(("msgpack", lambda: dumps_msgpack(make_response(pages))))
+        if "application/vnd.apache.arrow.stream" in RESPONSE_MIMETYPES:
+            def arrow():
+                response = make_response(pages)
+                return dumps_arrow_stream(response["result"]["table"]["result"].pop("tables"), response)
+            variants.append(("arrow", arrow))
+        for name, func in variants:
+            elapse, out = best_of(func, args.repeat)
+            print(f"{name:>16} {elapse * 1000:9.2f} {len(out) / 1024:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
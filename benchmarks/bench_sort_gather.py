@@ -0,0 +1,115 @@
+# benchmarks/bench_sort_gather.py
+"""
+sorted_ocr_boxes / gather_ocr_list_by_row 与 wired_table_rec 原实现的性能对比。
+
+在密集表格上对比耗时，sort 另外统计阅读顺序的错误数（相邻两个框按生成时的 (行, 列) 逆序的次数）；
+reversed 为同一行 ymin 递增、xmin 递减的最坏情况。与原实现的随机对比见 tests/test_sort_gather.py。
+
+用法:
+    python benchmarks/bench_sort_gather.py
+    python benchmarks/bench_sort_gather.py --sizes 500 3000 10000
+"""
+import argparse
+import copy
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from table_postprocess import gather_ocr_list_by_row, sorted_ocr_boxes  # noqa: E402
+
+try:
+    from wired_table_rec.utils_table_recover import (
+        gather_ocr_list_by_row as ref_gather_ocr_list_by_row,
+        sorted_ocr_boxes as ref_sorted_ocr_boxes,
+    )
+except ImportError:
+    ref_gather_ocr_list_by_row = ref_sorted_ocr_boxes = None
+
+
+def random_boxes(rng, n, row_height=30.0):
+    """
+    生成大致成行排列的文本框：行内 y 有抖动，框高不一，偶尔出现零高度和跨行的框。
+    """
+    boxes = []
+    for _ in range(n):
+        row = rng.integers(0, max(1, n // 4))
+        y1 = row * row_height + rng.normal(0, 6)
+        h = rng.choice([0.0, rng.uniform(8, 40), rng.uniform(30, 80)], p=[0.05, 0.85, 0.1])
+        x1 = rng.uniform(0, 800)
+        w = rng.uniform(0, 200)
+        if rng.random() < 0.2:
+            y1, x1 = round(y1), round(x1)
+        boxes.append([x1, y1, x1 + w, y1 + h])
+    return boxes
+
+
+def dense_table_boxes(rng, n, n_cols=30):
+    """
+    模拟密集表格的整页 OCR 框：n_cols 列、每行 y 略有抖动。
+    """
+    boxes = []
+    for k in range(n):
+        r, c = divmod(k, n_cols)
+        x1 = c * 60 + rng.uniform(0, 10)
+        y1 = r * 28 + rng.uniform(-3, 3)
+        boxes.append([x1, y1, x1 + rng.uniform(20, 50), y1 + rng.uniform(14, 20)])
+    rng.shuffle(boxes)
+    return boxes
+
+
+def order_errors(boxes, order, col_width=60, row_height=28):
+    # dense_table_boxes 生成时的 (行, 列)
+    key = [(round(b[1] / row_height), int(b[0] // col_width)) for b in boxes]
+    return sum(key[order[i]] > key[order[i + 1]] for i in range(len(order) - 1))
+
+
+def timed(func, make_input, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        data = make_input()
+        s = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - s)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 3000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if ref_sorted_ocr_boxes is None:
+        print("未安装 wired_table_rec，跳过对比。")
+        return
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'boxes':>7} {'stage':>8} {'new(ms)':>10} {'ref(ms)':>10} {'speedup':>8} {'errors':>13}")
+    for n in args.sizes:
+        boxes = dense_table_boxes(rng, n)
+        t_new = timed(lambda b: sorted_ocr_boxes(b), lambda: copy.deepcopy(boxes))
+        t_ref = timed(lambda b: ref_sorted_ocr_boxes(b), lambda: copy.deepcopy(boxes))
+        errors = (order_errors(boxes, sorted_ocr_boxes(boxes)[1]),
+                  order_errors(boxes, ref_sorted_ocr_boxes(copy.deepcopy(boxes))[1]))
+        print(f"{n:>7} {'sort':>8} {t_new * 1000:10.2f} {t_ref * 1000:10.2f} {t_ref / t_new:7.1f}x "
+              f"{errors[0]:>6}/{errors[1]:<6}")
+
+        reversed_row = [[float(n - k), k * 0.001, n - k + 5.0, 18 + k * 0.001] for k in range(n)]
+        t_new = timed(lambda b: sorted_ocr_boxes(b), lambda: copy.deepcopy(reversed_row))
+        t_ref = timed(lambda b: ref_sorted_ocr_boxes(b), lambda: copy.deepcopy(reversed_row), repeat=1)
+        print(f"{n:>7} {'reversed':>8} {t_new * 1000:10.2f} {t_ref * 1000:10.2f} {t_ref / t_new:7.1f}x")
+
+        # 单个单元格内堆积大量文本行的极端情况
+        sorted_boxes, _ = sorted_ocr_boxes(boxes)
+        ocr_list = [[list(b), "x"] for b in sorted_boxes]
+        t_new = timed(gather_ocr_list_by_row, lambda: copy.deepcopy(ocr_list))
+        t_ref = timed(ref_gather_ocr_list_by_row, lambda: copy.deepcopy(ocr_list))
+        print(f"{n:>7} {'gather':>8} {t_new * 1000:10.2f} {t_ref * 1000:10.2f} {t_ref / t_new:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# benchmarks/bench_startup.py
+"""
+服务冷启动耗时：在子进程中启动 server.py，依次记录
+    import      导入 server 模块的耗时
+    live        进程启动到 /healthz 可响应
+    ready       进程启动到 /readyz 返回 200（模型加载与预热完成）
+    first       第一个 /process_image 请求的耗时
+    second      第二个请求的耗时（对照）
+
+印章识别接口默认替换为本地函数，--with-seal 时真实调用。
+
+用法:
+    python benchmarks/bench_startup.py --port 13106 --out startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_utils import ROOT, environment_info  # noqa: E402
+from synthetic_tables import make_table  # noqa: E402
+
+BOOTSTRAP = """
+import sys, time
+sys.path.insert(0, {root!r})
+sys.path.insert(0, {bench!r})
+start = time.perf_counter()
+import server
+print("IMPORT", time.perf_counter() - start, flush=True)
+if not {with_seal!r}:
+    server.call_seal_recognition_api = lambda *args, **kwargs: {{"error": "skipped in benchmark"}}
+from bench_utils import install_vendored_wired_main
+install_vendored_wired_main()
+server.main(host="127.0.0.1", port={port})
+"""
+
+
+def wait_for(url, deadline, accept=lambda r: r.status_code == 200):
+    """
+    轮询 url 直到 accept(response) 为真，返回响应；超时返回 None。
+    """
+    while time.perf_counter() < deadline:
+        try:
+            resp = requests.get(url, timeout=1)
+            if accept(resp):
+                return resp
+        except requests.RequestException:
+            pass
+        time.sleep(0.05)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=13106)
+    parser.add_argument("--timeout", type=float, default=600, help="等待就绪的最长时间（秒）")
+    parser.add_argument("--with-seal", action="store_true")
+    parser.add_argument("--out", help="结果 JSON 的输出路径")
+    args = parser.parse_args()
+
+    base = f"http://127.0.0.1:{args.port}"
+    result = {}
+    code = BOOTSTRAP.format(root=ROOT, bench=os.path.dirname(os.path.abspath(__file__)),
+                            with_seal=args.with_seal, port=args.port)
+    with tempfile.TemporaryDirectory() as work_dir:
+        img, _ = make_table(rows=10, cols=5, merged=2)
+        png = cv2.imencode(".png", img)[1].tobytes()
+
+        start = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, "-c", code], cwd=work_dir,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        try:
+            deadline = start + args.timeout
+            line = proc.stdout.readline()
+            if line.startswith("IMPORT"):
+                result["import_s"] = round(float(line.split()[1]), 3)
+
+            if wait_for(f"{base}/healthz", deadline):
+                result["live_s"] = round(time.perf_counter() - start, 3)
+            resp = wait_for(f"{base}/readyz", deadline,
+                            accept=lambda r: r.status_code == 200 or r.json().get("status") == "error")
+            if resp is not None and resp.status_code == 200:
+                result["ready_s"] = round(time.perf_counter() - start, 3)
+            elif resp is not None:
+                result["ready_error"] = resp.json().get("error")
+
+            for key in ("first", "second"):
+                s = time.perf_counter()
+                resp = requests.post(f"{base}/process_image", files={"image": ("table.png", png)},
+                                     timeout=args.timeout)
+                result[f"{key}_request_s"] = round(time.perf_counter() - s, 3)
+                result[f"{key}_status"] = resp.status_code
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    for key, value in result.items():
+        print(f"{key:>20}: {value}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"meta": environment_info(), "startup": result}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+# benchmarks/bench_table_cells.py
+"""
+单元格后处理的内存与耗时对比：原来的 dict 中间结果 vs table_result.TableCells。
+
+对比的流程是 WiredTableRecognition.__call__ 中 match_ocr_cell / re_rec 之后的部分：
+transform_res -> process_ocr_result -> sort_and_gather_ocr_res -> 生成 html 输入 -> build_json。
+这几个函数的原实现（原为 WiredTableRecognition 的方法）保留在本文件中，同时检查两条路径的输出完全一致。
+
+用法:
+    python benchmarks/bench_table_cells.py --sizes 500 2000 10000
+"""
+import argparse
+import copy
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_utils  # noqa: E402,F401  将仓库根目录加入导入路径
+from wired_table_rec.utils_table_recover import box_4_2_poly_to_box_4_1  # noqa: E402
+
+from table_postprocess import gather_ocr_list_by_row, sorted_ocr_boxes  # noqa: E402
+from table_result import TableCells  # noqa: E402
+
+
+def transform_res(cell_box_det_map, polygons, logi_points):
+    res = []
+    for i in range(len(polygons)):
+        ocr_res_list = cell_box_det_map.get(i)
+        if not ocr_res_list:
+            continue
+        xmin = min([ocr_box[0][0][0] for ocr_box in ocr_res_list])
+        ymin = min([ocr_box[0][0][1] for ocr_box in ocr_res_list])
+        xmax = max([ocr_box[0][2][0] for ocr_box in ocr_res_list])
+        ymax = max([ocr_box[0][2][1] for ocr_box in ocr_res_list])
+        dict_res = {
+            # xmin,xmax,ymin,ymax
+            "t_box": [xmin, ymin, xmax, ymax],
+            # row_start,row_end,col_start,col_end
+            "t_logic_box": logi_points[i].tolist(),
+            # [[xmin,xmax,ymin,ymax], text]
+            "t_ocr_res": [
+                [box_4_2_poly_to_box_4_1(ocr_det[0]), ocr_det[1]]
+                for ocr_det in ocr_res_list
+            ],
+        }
+        res.append(dict_res)
+    return res
+
+
+def process_ocr_result(ocr_result):
+    # 删除第一行的字典，并调整其余字典的行数
+    first_row_empty = [entry for entry in ocr_result if
+                       entry['t_logic_box'][0] == 0 and entry['t_logic_box'][1] == 0 and entry['t_ocr_res'][0][
+                           1] == '']
+
+    if len(first_row_empty) == len(
+            [entry for entry in ocr_result if entry['t_logic_box'][0] == 0 and entry['t_logic_box'][1] == 0]):
+        # 如果第一行的所有单元格都为空，删除第一行
+        ocr_result = [entry for entry in ocr_result if entry['t_logic_box'][0] != 0 or entry['t_logic_box'][1] != 0]
+        # 调整剩余字典的行数
+        for entry in ocr_result:
+            entry['t_logic_box'][0] -= 1
+            entry['t_logic_box'][1] -= 1
+
+    # 删除第一列的字典，并调整其余字典的列数
+    first_col_empty = [entry for entry in ocr_result if
+                       entry['t_logic_box'][2] == 0 and entry['t_logic_box'][3] == 0 and entry['t_ocr_res'][0][
+                           1] == '']
+
+    if len(first_col_empty) == len(
+            [entry for entry in ocr_result if entry['t_logic_box'][2] == 0 and entry['t_logic_box'][3] == 0]):
+        # 如果第一列的所有单元格都为空，删除第一列
+        ocr_result = [entry for entry in ocr_result if entry['t_logic_box'][2] != 0 or entry['t_logic_box'][3] != 0]
+        # 调整剩余字典的列数
+        for entry in ocr_result:
+            entry['t_logic_box'][2] -= 1
+            entry['t_logic_box'][3] -= 1
+
+    return ocr_result
+
+
+def sort_and_gather_ocr_res(res):
+    for i, dict_res in enumerate(res):
+        _, sorted_idx = sorted_ocr_boxes(
+            [ocr_det[0] for ocr_det in dict_res["t_ocr_res"]], threshold=0.3
+        )
+        dict_res["t_ocr_res"] = [dict_res["t_ocr_res"][i] for i in sorted_idx]
+        dict_res["t_ocr_res"] = gather_ocr_list_by_row(
+            dict_res["t_ocr_res"], threshold=0.3
+        )
+    return res
+
+
+def make_cell_box_det_map(n_cells, seed=0):
+    """
+    生成 re_rec 之后的 cell_box_det_map：每个单元格 1~3 条 OCR 结果，
+    约 10% 的单元格为 re_rec 补出的空文本，第一行全部为空以覆盖删行逻辑。
+    """
+    rng = np.random.default_rng(seed)
+    n_cols = max(1, int(np.sqrt(n_cells * 3)))
+    polygons, logi_points, cell_box_det_map = [], [], {}
+    for i in range(n_cells):
+        r, c = divmod(i, n_cols)
+        x1, y1 = c * 90.0, r * 40.0
+        poly = np.array([[x1, y1], [x1 + 90, y1], [x1 + 90, y1 + 40], [x1, y1 + 40]], dtype=np.float32)
+        polygons.append(poly)
+        logi_points.append([r, r, c, c])
+        if r == 0 or rng.random() < 0.1:
+            cell_box_det_map[i] = [[poly, "", 1]]
+            continue
+        items = []
+        for k in range(int(rng.choice([1, 2, 3], p=[0.7, 0.2, 0.1]))):
+            bx = x1 + rng.uniform(2, 40)
+            by = y1 + 2 + k * 12 + rng.uniform(-1, 1)
+            box = [[bx, by], [bx + 40, by], [bx + 40, by + 10], [bx, by + 10]]
+            items.append([box, f"r{r}c{c}-{k}", 0.95])
+        cell_box_det_map[i] = items
+    return cell_box_det_map, np.array(polygons), np.array(logi_points, dtype=np.int64)
+
+
+def legacy_build_json(ocr_result):
+    # 与 TableOCR.build_json 的原实现相同，避免为了测试导入全部识别模型
+    json_cells = []
+    for entry in ocr_result:
+        row_start, row_end, col_start, col_end = entry["t_logic_box"]
+        text = " ".join([res[1] for res in entry["t_ocr_res"]]) if entry["t_ocr_res"] else ""
+        x1, y1, x2, y2 = entry["t_box"]
+        position = [int(x1), int(y1), int(x2), int(y1), int(x2), int(y2), int(x1), int(y2)]
+        json_cells.append({
+            "col_start": int(col_start), "col_end": int(col_end),
+            "row_start": int(row_start), "row_end": int(row_end),
+            "position": position, "text": text,
+        })
+    return {"tables": json_cells}
+
+
+def run_legacy(cell_box_det_map, polygons, logi_points):
+    t_rec_ocr_list_dict = transform_res(cell_box_det_map, polygons, logi_points)
+    adjust_dict = process_ocr_result(t_rec_ocr_list_dict)
+    t_rec_ocr_list = sort_and_gather_ocr_res(t_rec_ocr_list_dict)
+    html_logic = [t["t_logic_box"] for t in t_rec_ocr_list]
+    html_texts = {i: [o[1] for o in t["t_ocr_res"]] for i, t in enumerate(t_rec_ocr_list)}
+    return html_logic, html_texts, legacy_build_json(adjust_dict)
+
+
+def run_cells(cell_box_det_map, polygons, logi_points):
+    table_cells = TableCells.from_cell_box_det_map(cell_box_det_map, polygons, logi_points)
+    keep_mask = table_cells.drop_empty_first_row_col()
+    table_cells.sort_and_gather(threshold=0.3)
+    adjust_cells = table_cells[keep_mask]
+    html_logic = table_cells.logic.tolist()
+    html_texts = dict(enumerate(table_cells.cell_texts()))
+    return html_logic, html_texts, adjust_cells.to_json()
+
+
+def legacy_intermediate(cell_box_det_map, polygons, logi_points):
+    t_rec_ocr_list_dict = transform_res(cell_box_det_map, polygons, logi_points)
+    adjust_dict = process_ocr_result(t_rec_ocr_list_dict)
+    return sort_and_gather_ocr_res(t_rec_ocr_list_dict), adjust_dict
+
+
+def cells_intermediate(cell_box_det_map, polygons, logi_points):
+    table_cells = TableCells.from_cell_box_det_map(cell_box_det_map, polygons, logi_points)
+    keep_mask = table_cells.drop_empty_first_row_col()
+    table_cells.sort_and_gather(threshold=0.3)
+    return table_cells, keep_mask
+
+
+def retained(func, args):
+    """
+    返回 func 的结果在调用结束后仍占用的内存，即中间结果本身的大小。
+    """
+    tracemalloc.start()
+    result = func(*args)  # noqa: F841
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current
+
+
+def measure(func, make_args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        args = make_args()
+        s = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - s)
+
+    args = make_args()
+    tracemalloc.start()
+    result = func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 2000, 10000])
+    args = parser.parse_args()
+
+    print("ms: 完整后处理耗时; peak: 完整后处理的内存峰值; kept: 中间结果常驻内存 (MB)")
+    print(
+        f"{'cells':>7} {'dict ms':>8} {'cells ms':>9} {'dict peak':>10} {'cells peak':>11} "
+        f"{'dict kept':>10} {'cells kept':>11} {'same':>5}"
+    )
+    failed = False
+    for n in args.sizes:
+        data = make_cell_box_det_map(n)
+        ref, t_ref, m_ref = measure(run_legacy, lambda: copy.deepcopy(data))
+        got, t_new, m_new = measure(run_cells, lambda: copy.deepcopy(data))
+        k_ref = retained(legacy_intermediate, copy.deepcopy(data))
+        k_new = retained(cells_intermediate, copy.deepcopy(data))
+        same = ref == got
+        failed |= not same
+        print(
+            f"{n:>7} {t_ref * 1000:8.1f} {t_new * 1000:9.1f} "
+            f"{m_ref / 2**20:10.2f} {m_new / 2**20:11.2f} "
+            f"{k_ref / 2**20:10.2f} {k_new / 2**20:11.2f} {'yes' if same else 'NO':>5}"
+        )
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
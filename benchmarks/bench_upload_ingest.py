@@ -0,0 +1,112 @@
+# benchmarks/bench_upload_ingest.py
+"""
+上传文件接收阶段（解析请求体 -> 解码缩放 -> 准备发送给印章识别接口的内容）的耗时与文件读写量对比。
+
+- legacy: werkzeug 默认的上传缓冲（超过 500KB 写入临时文件）-> file.save 保存到临时目录 ->
+          按路径解码 -> 为印章识别接口重新读取文件
+- new:    server.UploadRequest，上传内容留在内存中并同时计算 sha256 -> 从内存解码
+
+读写量取 /proc/self/io 中 wchar / rchar 的增量（经过 read/write 系统调用的字节数，包括 tmpfs）。
+仅支持 Linux。
+
+用法:
+    python benchmarks/bench_upload_ingest.py --sizes 3 12 48 --repeat 5
+"""
+import argparse
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_utils  # noqa: E402,F401  将仓库根目录加入导入路径
+from synthetic_tables import make_table  # noqa: E402
+
+
+def proc_io():
+    with open("/proc/self/io") as f:
+        fields = dict(line.split(": ") for line in f.read().splitlines())
+    return int(fields["rchar"]), int(fields["wchar"])
+
+
+def make_app(variant):
+    from flask import Flask, Request
+
+    import server
+
+    app = Flask(f"bench_{variant}")
+    if variant == "new":
+        app.request_class = server.UploadRequest
+    else:
+        app.request_class = Request
+
+    @app.route("/ingest", methods=["POST"])
+    def ingest():
+        file = server.request.files["image"]
+        if variant == "new":
+            img, resized = server.resize_image(file.stream)
+            content = server.encode_image(img, "jpg") if resized else file.stream.getvalue()
+        else:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                path = os.path.join(temp_dir, "upload.jpg")
+                file.save(path)
+                img, resized = server.resize_image(path)
+                if resized:
+                    content = server.encode_image(img, "jpg")
+                else:
+                    with open(path, "rb") as f:
+                        content = f.read()
+        return {"shape": list(img.shape), "seal_bytes": len(content)}
+
+    return app
+
+
+def measure(variant, data, repeat):
+    client = make_app(variant).test_client()
+    times, reads, writes = [], [], []
+    for _ in range(repeat):
+        r0, w0 = proc_io()
+        s = time.perf_counter()
+        resp = client.post("/ingest", data={"image": (io.BytesIO(data), "table.jpg")})
+        times.append(time.perf_counter() - s)
+        r1, w1 = proc_io()
+        reads.append(r1 - r0)
+        writes.append(w1 - w0)
+        assert resp.status_code == 200, resp.data
+    return {"best": min(times), "read_mb": min(reads) / 2**20, "write_mb": min(writes) / 2**20}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3, 12, 48], help="图片像素数（百万）")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    # 导入 server 会在当前目录创建日志和预处理目录
+    os.chdir(work_dir)
+    import server  # noqa: F401
+
+    logging.disable(logging.INFO)
+    print(f"{'image':>10} {'upload MB':>10} {'old ms':>8} {'new ms':>8} "
+          f"{'old r/w MB':>12} {'new r/w MB':>12}")
+    for mp in args.sizes:
+        scale = (mp / 12) ** 0.5
+        img, _ = make_table(rows=60, cols=20, merged=10, cell_w=int(200 * scale), cell_h=int(60 * scale),
+                            noise=0.02, seed=mp)
+        data = cv2.imencode(".jpg", img)[1].tobytes()
+        old = measure("legacy", data, args.repeat)
+        new = measure("new", data, args.repeat)
+        print(
+            f"{str(mp) + 'MP':>10} {len(data) / 2**20:10.1f} {old['best'] * 1000:8.1f} {new['best'] * 1000:8.1f} "
+            f"{old['read_mb']:5.1f}/{old['write_mb']:<6.1f} {new['read_mb']:5.1f}/{new['write_mb']:<6.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/bench_utils.py
+"""
+性能测试脚本共用的工具函数。
+"""
+import importlib.util
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def load_vendored_wired_main():
+    """
+    以 wired_table_rec 子模块的身份加载仓库中的 main.py 修改版。
+    """
+    import wired_table_rec  # noqa: F401
+
+    name = "wired_table_rec._vendored_main"
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(ROOT, "wired_table_rec——main.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def install_vendored_wired_main():
+    """
+    让 `from wired_table_rec import WiredTableRecognition` 得到仓库中的修改版，
+    与部署时覆盖安装包 main.py 的效果相同。需在导入 table_ocr / server 之前调用。
+    """
+    import wired_table_rec
+
+    module = load_vendored_wired_main()
+    wired_table_rec.WiredTableRecognition = module.WiredTableRecognition
+    return module.WiredTableRecognition
+
+
+def timed(func, *args, **kwargs):
+    s = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - s
+
+
+def summarize(samples):
+    """
+    将一组耗时（秒）汇总为毫秒统计值。
+    """
+    arr = np.asarray(samples, dtype=np.float64) * 1000
+    return {
+        "n": int(arr.size),
+        "mean_ms": round(float(arr.mean()), 3),
+        "p50_ms": round(float(np.percentile(arr, 50)), 3),
+        "p95_ms": round(float(np.percentile(arr, 95)), 3),
+        "p99_ms": round(float(np.percentile(arr, 99)), 3),
+        "min_ms": round(float(arr.min()), 3),
+    }
+
+
+def environment_info():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, timeout=10,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
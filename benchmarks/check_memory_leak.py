@@ -0,0 +1,178 @@
+# benchmarks/check_memory_leak.py
+"""
+内存泄漏回归检查：在同一进程内通过 Flask 测试客户端向 /process_image 连续发送大量请求，
+检查预热后 RSS 的增长是否有界，超出阈值时以非零状态退出，可在发布前或 CI 中运行。
+
+- 印章识别接口由本地桩服务（stub_seal_server.py）代替
+- 预热若干请求后（模型首次推理的内存分配、各种缓存在此期间完成）记录基线 RSS
+- 之后每隔 --sample-every 个请求采样一次 RSS，对后一半采样做线性拟合得到每千个请求的增长趋势
+- 结束时 gc + malloc_trim 后与基线比较；总增长或增长趋势超过阈值即判定为泄漏
+- 非 200 响应的比例超过 --max-error-rate（默认 0，即任何失败）时同样不通过，避免在没有实际负载时误报通过
+- --trace 时用 tracemalloc 对比预热后与结束时的快照，列出增长最多的 Python 分配位置
+
+用法:
+    python benchmarks/check_memory_leak.py --requests 500 --max-growth-mb 50
+    python benchmarks/check_memory_leak.py --requests 200 --types jpg png --trace
+tests/test_memory_leak.py 用较少的请求数调用同样的流程。
+"""
+import argparse
+import gc
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_utils import ROOT, install_vendored_wired_main  # noqa: E402
+from load_test import synthetic_corpus  # noqa: E402
+from stub_seal_server import make_stub_server  # noqa: E402
+
+
+def start_stub(port):
+    """
+    启动印章识别桩服务并让 server 指向它（需在导入 server 之前调用），port 为 0 时使用任意空闲端口。
+    """
+    stub = make_stub_server(port=port, latency_ms=5, jitter_ms=1)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    os.environ["SEAL_API_URL"] = f"http://127.0.0.1:{stub.server_address[1]}/seal/recognize_seal"
+    return stub
+
+
+def load_server():
+    """
+    导入 server 并加载模型，返回 server 模块；模型加载失败时抛出异常。
+    """
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    install_vendored_wired_main()
+    import server
+
+    server.models.load()
+    return server
+
+
+def run_requests(server, corpus, requests, warmup=20, sample_every=10, trace=False):
+    """
+    预热 warmup 个请求后再发送 requests 个，返回 RSS 统计：
+    errors / total（非 200 响应数与总请求数）、baseline / final（字节）、growth_mb、slope_mb（每千请求）、
+    elapsed，trace 时另有 top_stats（tracemalloc 增长最多的分配位置）。
+    """
+    from memory_guard import MB, malloc_trim, rss_bytes
+
+    client = server.app.test_client()
+    errors = 0
+
+    def send(i):
+        nonlocal errors
+        doc = corpus[i % len(corpus)]
+        resp = client.post("/process_image", data={"image": (io.BytesIO(doc["content"]), doc["name"])},
+                           content_type="multipart/form-data")
+        if resp.status_code != 200:
+            errors += 1
+        resp.close()
+
+    for i in range(warmup):
+        send(i)
+    server.archive.flush()
+    gc.collect()
+    malloc_trim()
+    baseline = rss_bytes()
+    if trace:
+        tracemalloc.start(10)
+        snapshot_before = tracemalloc.take_snapshot()
+
+    start = time.perf_counter()
+    samples = []
+    for i in range(requests):
+        send(warmup + i)
+        if (i + 1) % sample_every == 0:
+            samples.append((i + 1, rss_bytes()))
+    elapsed = time.perf_counter() - start
+
+    server.archive.flush()
+    gc.collect()
+    malloc_trim()
+    final = rss_bytes()
+
+    tail = samples[len(samples) // 2:]
+    slope = 0.0
+    if len(tail) >= 2:
+        x, y = np.array(tail, dtype=np.float64).T
+        slope = float(np.polyfit(x, y, 1)[0]) * 1000 / MB
+
+    result = {"errors": errors, "total": warmup + requests, "baseline": baseline, "final": final,
+              "growth_mb": (final - baseline) / MB, "slope_mb": slope, "elapsed": elapsed}
+    if trace:
+        result["top_stats"] = tracemalloc.take_snapshot().compare_to(snapshot_before, "lineno")[:10]
+        tracemalloc.stop()
+    return result
+
+
+def check(result, max_growth_mb, max_slope_mb, max_error_rate=0.0):
+    """
+    返回未通过的原因列表，为空表示通过。
+    """
+    failures = []
+    if result["growth_mb"] > max_growth_mb:
+        failures.append(f"RSS 增长 {result['growth_mb']:.1f}MB 超过 {max_growth_mb}MB")
+    if result["slope_mb"] > max_slope_mb:
+        failures.append(f"增长趋势 {result['slope_mb']:.2f}MB/千请求 超过 {max_slope_mb}MB")
+    error_rate = result["errors"] / result["total"] if result["total"] else 1.0
+    if error_rate > max_error_rate:
+        failures.append(f"非 200 响应 {result['errors']}/{result['total']}（{error_rate:.1%}）"
+                        f"超过 {max_error_rate:.1%}，检查模型与样本")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500, help="预热后的请求数")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--types", nargs="+", default=["jpg", "png", "pdf"], help="样本的文档类型")
+    parser.add_argument("--sample-every", type=int, default=10)
+    parser.add_argument("--max-growth-mb", type=float, default=50, help="预热后 RSS 总增长的上限")
+    parser.add_argument("--max-slope-mb", type=float, default=20, help="每千个请求 RSS 增长趋势的上限")
+    parser.add_argument("--max-error-rate", type=float, default=0.0, help="允许的非 200 响应比例")
+    parser.add_argument("--seal-port", type=int, default=24298)
+    parser.add_argument("--trace", action="store_true", help="用 tracemalloc 列出增长最多的分配位置")
+    args = parser.parse_args()
+
+    corpus = [doc for doc in synthetic_corpus() if doc["type"] in args.types]
+    if not corpus:
+        parser.error("没有可用的样本类型")
+    stub = start_stub(args.seal_port)
+
+    work_dir = tempfile.mkdtemp(prefix="leak_check_")
+    os.environ.setdefault("ARCHIVE_DIR", os.path.join(work_dir, "preprocessed_images"))
+    # server.log 写到临时目录
+    os.chdir(work_dir)
+    server = load_server()
+    from memory_guard import MB
+
+    result = run_requests(server, corpus, args.requests, args.warmup, args.sample_every, args.trace)
+    stats = server.memory_guard.snapshot()
+    print(f"请求 {args.warmup} + {args.requests} 个（{result['elapsed']:.1f}s），非 200 响应 {result['errors']} 个")
+    print(f"RSS 基线 {result['baseline'] / MB:.1f}MB，结束 {result['final'] / MB:.1f}MB，"
+          f"增长 {result['growth_mb']:+.1f}MB，趋势 {result['slope_mb']:+.2f}MB/千请求")
+    print(f"单个请求的最大峰值 RSS {stats['max_request_peak_rss'] / MB:.1f}MB，malloc_trim {stats['trims']} 次")
+
+    if args.trace:
+        print("tracemalloc 增长最多的分配位置:")
+        for stat in result["top_stats"]:
+            print(f"  {stat}")
+
+    failures = check(result, args.max_growth_mb, args.max_slope_mb, args.max_error_rate)
+    stub.shutdown()
+    if failures:
+        sys.exit("内存检查未通过: " + "；".join(failures))
+    print("内存检查通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# benchmarks/eval_profiles.py
+"""
+对比各速度 / 精度档位（profiles.py）在带标注样本上的耗时与单元格准确率。
+
+样本为 --corpus 目录下的图片与同名 JSON 标注（synthetic_tables.py 的格式：cells 含行列起止、polygon 与 text），
+未指定时用 run_benchmarks.py 的合成用例。每张图片与服务一样按档位的 max_width 缩小（只缩不放），
+再调用 TableOCR.perform_ocr(profile=...)，单元格坐标换算回原图后与标注比较：
+- 单元格按外接框 IoU >= --iou 一对一匹配（按 IoU 从高到低），得到 precision / recall / F1
+- structure: 匹配上的单元格中行列跨度与标注相同的比例（双方先减去各自的最小行号、列号）
+- text_exact: 匹配上的单元格中文字（去掉空白）与标注相同的比例；text_sim: 平均 difflib 相似度
+耗时为缩放加 perform_ocr 的墙钟时间。同一张图片重复识别时版式缓存会命中，评估时默认关闭（--layout-cache 开启）。
+
+用法:
+    python benchmarks/eval_profiles.py --profiles fast balanced accurate --repeat 3 --out eval.json
+    python benchmarks/eval_profiles.py --corpus labeled/ --iou 0.5
+"""
+import argparse
+import difflib
+import glob
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_utils import environment_info, install_vendored_wired_main, summarize  # noqa: E402
+from run_benchmarks import CASES  # noqa: E402
+from synthetic_tables import make_table  # noqa: E402
+
+from profiles import PROFILES, get_profile  # noqa: E402
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tiff")
+
+
+def load_corpus(corpus_dir):
+    """
+    返回 [(名称, BGR 图像, 标注)]，没有对应图片的标注跳过。
+    """
+    samples = []
+    for json_path in sorted(glob.glob(os.path.join(corpus_dir, "*.json"))):
+        stem = os.path.splitext(json_path)[0]
+        image_path = next((stem + ext for ext in IMAGE_EXTENSIONS if os.path.exists(stem + ext)), None)
+        if image_path is None:
+            continue
+        with open(json_path, encoding="utf-8") as f:
+            truth = json.load(f)
+        samples.append((os.path.basename(stem), cv2.imread(image_path), truth))
+    return samples
+
+
+def _boxes(polygons):
+    polygons = np.asarray(polygons, dtype=np.float64).reshape(len(polygons), -1, 2)
+    return np.concatenate([polygons.min(axis=1), polygons.max(axis=1)], axis=1)
+
+
+def _iou_matrix(a, b):
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def _spans(cells):
+    spans = np.array([[c["row_start"], c["row_end"], c["col_start"], c["col_end"]] for c in cells])
+    return spans - [spans[:, 0].min(), spans[:, 0].min(), spans[:, 2].min(), spans[:, 2].min()]
+
+
+def _norm_text(text):
+    return "".join(str(text).split())
+
+
+def score_cells(pred_cells, truth_cells, iou_threshold=0.5):
+    """
+    返回单张表格的计数：pred / truth / matched / structure / text_exact / text_sim（相似度之和）。
+    pred_cells 为 TableOCR.build_json 的单元格（position 为原图坐标的 8 个数），truth_cells 为标注。
+    """
+    counts = {"pred": len(pred_cells), "truth": len(truth_cells), "matched": 0,
+              "structure": 0, "text_exact": 0, "text_sim": 0.0}
+    if not pred_cells or not truth_cells:
+        return counts
+    iou = _iou_matrix(_boxes([c["position"] for c in pred_cells]), _boxes([c["polygon"] for c in truth_cells]))
+    pred_spans, truth_spans = _spans(pred_cells), _spans(truth_cells)
+    used_pred, used_truth = set(), set()
+    for flat in np.argsort(-iou, axis=None):
+        i, j = np.unravel_index(flat, iou.shape)
+        if iou[i, j] < iou_threshold:
+            break
+        if i in used_pred or j in used_truth:
+            continue
+        used_pred.add(i)
+        used_truth.add(j)
+        counts["matched"] += 1
+        counts["structure"] += bool(np.array_equal(pred_spans[i], truth_spans[j]))
+        pred_text, truth_text = _norm_text(pred_cells[i]["text"]), _norm_text(truth_cells[j]["text"])
+        counts["text_exact"] += pred_text == truth_text
+        counts["text_sim"] += difflib.SequenceMatcher(None, pred_text, truth_text).ratio()
+    return counts
+
+
+def summarize_counts(counts):
+    matched = counts["matched"]
+    precision = matched / counts["pred"] if counts["pred"] else 0.0
+    recall = matched / counts["truth"] if counts["truth"] else 0.0
+    return {
+        "precision": round(precision, 4),
+        "recall": round(recall, 4),
+        "f1": round(2 * precision * recall / (precision + recall), 4) if precision + recall else 0.0,
+        "structure": round(counts["structure"] / matched, 4) if matched else 0.0,
+        "text_exact": round(counts["text_exact"] / matched, 4) if matched else 0.0,
+        "text_sim": round(counts["text_sim"] / matched, 4) if matched else 0.0,
+    }
+
+
+def resize_to(img, max_width):
+    """
+    与 server.resize_image 相同：宽度超过 max_width 时按比例缩小，返回 (图像, 缩放比例)。
+    """
+    height, width = img.shape[:2]
+    if width <= max_width:
+        return img, 1.0
+    scale = max_width / float(width)
+    return cv2.resize(img, (max_width, int(height * scale)), interpolation=cv2.INTER_AREA), scale
+
+
+def evaluate(table_ocr, profile, samples, repeat, iou_threshold):
+    times = []
+    total = dict.fromkeys(("pred", "truth", "matched", "structure", "text_exact", "text_sim"), 0)
+    errors = 0
+    for _, img, truth in samples:
+        for r in range(repeat):
+            s = time.perf_counter()
+            try:
+                resized, scale = resize_to(img, profile["max_width"])
+                json_data, _ = table_ocr.perform_ocr(resized, profile=profile["name"])
+            except Exception as e:
+                errors += 1
+                print(f"  {profile['name']}: 识别出错: {type(e).__name__}: {e}")
+                continue
+            times.append(time.perf_counter() - s)
+            if r:
+                continue
+            # 坐标换算回原图后与标注比较
+            cells = [dict(cell, position=[v / scale for v in cell["position"]]) for cell in json_data["tables"]]
+            for key, value in score_cells(cells, truth["cells"], iou_threshold).items():
+                total[key] += value
+    result = {"latency": summarize(times) if times else None, "errors": errors, "counts": total}
+    result.update(summarize_counts(total))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES), choices=list(PROFILES))
+    parser.add_argument("--corpus", help="带标注的样本目录（图片与同名 JSON），默认使用合成用例")
+    parser.add_argument("--repeat", type=int, default=3, help="每张图片的计时次数，准确率只统计第一次")
+    parser.add_argument("--warmup", type=int, default=1, help="每个档位正式计时前预热的图片数")
+    parser.add_argument("--iou", type=float, default=0.5, help="单元格匹配的 IoU 阈值")
+    parser.add_argument("--layout-cache", action="store_true",
+                        help="评估时开启有线表格的版式缓存（LAYOUT_CACHE_SIZE 未设置时取 64）")
+    parser.add_argument("--out", help="结果 JSON 的输出路径")
+    args = parser.parse_args()
+
+    if args.layout_cache:
+        os.environ.setdefault("LAYOUT_CACHE_SIZE", "64")
+    else:
+        os.environ["LAYOUT_CACHE_SIZE"] = "0"
+    if args.corpus:
+        samples = load_corpus(args.corpus)
+        if not samples:
+            parser.error(f"{args.corpus} 中没有带标注的图片")
+    else:
+        samples = [(name, *make_table(**params)) for name, params in CASES.items()]
+
+    install_vendored_wired_main()
+    from table_ocr import TableOCR
+
+    table_ocr = TableOCR(profile=args.profiles[0], preload_profiles=args.profiles)
+    results = {}
+    for name in args.profiles:
+        profile = get_profile(name)
+        for _, img, _ in samples[:args.warmup]:
+            table_ocr.perform_ocr(resize_to(img, profile["max_width"])[0], profile=name)
+        results[name] = evaluate(table_ocr, profile, samples, args.repeat, args.iou)
+
+    print(f"样本 {len(samples)} 张，IoU 阈值 {args.iou}")
+    print(f"{'profile':>9} {'p50 ms':>8} {'p95 ms':>8} {'prec':>6} {'recall':>6} {'f1':>6} "
+          f"{'struct':>6} {'text':>6} {'sim':>6} {'errors':>6}")
+    for name, res in results.items():
+        latency = res["latency"] or {"p50_ms": float("nan"), "p95_ms": float("nan")}
+        print(f"{name:>9} {latency['p50_ms']:8.1f} {latency['p95_ms']:8.1f} {res['precision']:6.3f} "
+              f"{res['recall']:6.3f} {res['f1']:6.3f} {res['structure']:6.3f} {res['text_exact']:6.3f} "
+              f"{res['text_sim']:6.3f} {res['errors']:>6}")
+
+    if args.out:
+        result = {
+            "meta": {**environment_info(), "corpus": args.corpus or "synthetic", "samples": len(samples),
+                     "repeat": args.repeat, "iou": args.iou, "profiles": {n: get_profile(n) for n in args.profiles}},
+            "profiles": results,
+        }
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.out}")
+
+
+if __name__ == "__main__":
+    main()
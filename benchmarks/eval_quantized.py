@@ -0,0 +1,234 @@
+# benchmarks/eval_quantized.py
+"""
+对比 INT8 量化模型（quantize_models.py 生成）与原 FP32 模型的识别结果和耗时，决定哪些量化模型可以启用。
+
+每个变体在单独的进程中按 ort_config 的方式加载模型（quantized 配置通过临时配置文件传入，
+线程数等其他配置沿用当前的 ort_config.json）：
+- fp32: 全部使用原模型，作为基准
+- 每个有量化模型的模型名（table_cls、wired_table_rec、rapidocr 等）：只有该模型使用量化版本
+- int8: 全部有量化版本的模型都使用量化版本
+各变体用同一档位对样本执行 TableOCR.perform_ocr（--detect 时先做表格检测，覆盖 table_det），统计：
+- agree_*: 以 fp32 的输出为基准的单元格 F1、行列结构一致率、文字一致率，不需要标注
+- f1 / structure / text_exact: 与标注比较（样本有标注且不做表格检测时），计算方式同 eval_profiles.py
+- 耗时的 p50 / p95
+--accept 时，单个模型的变体与 fp32 的一致率都不低于 1 - --max-drop、且 p50 比 fp32 快，
+就在 manifest.json 中把该模型实际加载的量化文件标记为 accepted，ort_config 的 quantized 为 "auto" 时才会使用。
+
+用法:
+    python benchmarks/eval_quantized.py --repeat 3 --out quantized.json
+    python benchmarks/eval_quantized.py --corpus labeled/ --profile fast --max-drop 0.01 --accept
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_utils import environment_info, install_vendored_wired_main, summarize  # noqa: E402
+from eval_profiles import load_corpus, resize_to, score_cells, summarize_counts  # noqa: E402
+from run_benchmarks import CASES  # noqa: E402
+from synthetic_tables import make_table  # noqa: E402
+
+import ort_config  # noqa: E402
+from profiles import PROFILES, get_profile  # noqa: E402
+
+COUNT_KEYS = ("pred", "truth", "matched", "structure", "text_exact", "text_sim")
+
+
+def as_truth(cells):
+    # 把 build_json 的单元格转成标注的格式，作为其他变体的比较基准
+    return [dict(cell, polygon=[cell["position"][i:i + 2] for i in range(0, 8, 2)]) for cell in cells]
+
+
+def worker(config_path, profile_name, samples, repeat, detect, results):
+    os.environ["ORT_CONFIG"] = config_path
+    os.environ["LAYOUT_CACHE_SIZE"] = "0"
+    # 环境变量会覆盖配置文件中各模型的 quantized
+    os.environ.pop("ORT_QUANTIZED", None)
+    try:
+        install_vendored_wired_main()
+        from orientation_correction import ImageOrientationCorrector
+        from table_ocr import TableOCR
+
+        profile = get_profile(profile_name)
+        corrector = ImageOrientationCorrector(output_dir=None) if detect else None
+        table_ocr = TableOCR(profile=profile_name)
+
+        def run(img):
+            tables = corrector.extract_tables(img)[0] if detect else [img]
+            outputs = []
+            for table in tables:
+                resized, scale = resize_to(table, profile["max_width"])
+                json_data, _ = table_ocr.perform_ocr(resized, profile=profile_name)
+                # 坐标换算回缩放前的表格图
+                outputs.append([dict(cell, position=[v / scale for v in cell["position"]])
+                                for cell in json_data["tables"]])
+            return outputs
+
+        run(samples[0][1])  # 预热
+        outputs, times = [], []
+        for _, img, _ in samples:
+            for r in range(repeat):
+                s = time.perf_counter()
+                tables = run(img)
+                times.append(time.perf_counter() - s)
+                if r == 0:
+                    outputs.append(tables)
+    except Exception as e:
+        results.put({"error": f"{type(e).__name__}: {e}"})
+        return
+    results.put({"outputs": outputs, "times": times, "loaded": ort_config.loaded_models()})
+
+
+def run_variant(name, quantized, base_config, args, samples, work_dir):
+    config = json.loads(json.dumps(base_config))
+    config["default"]["quantized"] = False
+    for model in ort_config.MODEL_NAMES:
+        config["models"].setdefault(model, {})["quantized"] = model in quantized
+    config_path = os.path.join(work_dir, f"ort_config_{name}.json")
+    with open(config_path, "w", encoding="utf-8") as f:
+        json.dump(config, f)
+
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    proc = ctx.Process(target=worker, args=(config_path, args.profile, samples, args.repeat, args.detect, results))
+    proc.start()
+    report = results.get()
+    proc.join()
+    return report
+
+
+def compare(outputs, baseline, samples, iou, with_truth):
+    """
+    返回与 fp32 输出（及标注）比较的指标；表格检测结果数量不同的样本按未匹配计。
+    """
+    agree = dict.fromkeys(COUNT_KEYS, 0)
+    truth_counts = dict.fromkeys(COUNT_KEYS, 0)
+    for tables, base_tables, (_, _, truth) in zip(outputs, baseline, samples):
+        for k in range(max(len(tables), len(base_tables))):
+            pred = tables[k] if k < len(tables) else []
+            base = as_truth(base_tables[k]) if k < len(base_tables) else []
+            for key, value in score_cells(pred, base, iou).items():
+                agree[key] += value
+        if with_truth:
+            for key, value in score_cells(tables[0] if tables else [], truth["cells"], iou).items():
+                truth_counts[key] += value
+    result = {f"agree_{k}": v for k, v in summarize_counts(agree).items() if k in ("f1", "structure", "text_exact")}
+    if with_truth:
+        result.update(summarize_counts(truth_counts))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", help="样本目录（图片与同名 JSON 标注），默认使用合成用例")
+    parser.add_argument("--profile", default=None, choices=list(PROFILES), help="识别档位，默认 DEFAULT_PROFILE")
+    parser.add_argument("--models", nargs="+", choices=list(ort_config.MODEL_NAMES),
+                        help="逐个对比的模型，默认 manifest.json 中有量化版本的全部模型")
+    parser.add_argument("--detect", action="store_true", help="先做表格检测，对比 table_det 的量化模型")
+    parser.add_argument("--repeat", type=int, default=3, help="每张图片的计时次数，结果只比较第一次")
+    parser.add_argument("--iou", type=float, default=0.5, help="单元格匹配的 IoU 阈值")
+    parser.add_argument("--max-drop", type=float, default=0.01, help="与 fp32 的一致率允许低于 1 的幅度")
+    parser.add_argument("--accept", action="store_true", help="把通过对比的量化模型在 manifest.json 中标记为 accepted")
+    parser.add_argument("--out", help="结果 JSON 的输出路径")
+    args = parser.parse_args()
+    args.profile = get_profile(args.profile)["name"]
+
+    manifest = ort_config.load_manifest()
+    available = sorted({entry["model"] for entry in manifest.values()})
+    models = args.models or available
+    missing = sorted(set(models) - set(available))
+    if missing:
+        parser.error(f"{ort_config.QUANTIZED_DIR} 中没有这些模型的量化版本: {missing}，先运行 quantize_models.py")
+    if not models:
+        parser.error(f"{ort_config.QUANTIZED_DIR} 中没有量化模型，先运行 quantize_models.py")
+
+    if args.corpus:
+        samples = load_corpus(args.corpus)
+        if not samples:
+            parser.error(f"{args.corpus} 中没有带标注的图片")
+    else:
+        samples = [(name, *make_table(**params)) for name, params in CASES.items()]
+    with_truth = not args.detect
+
+    variants = {"fp32": ()}
+    variants.update({model: (model,) for model in models})
+    if len(models) > 1:
+        variants["int8"] = tuple(models)
+
+    base_config = ort_config.get_config()
+    reports = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name, quantized in variants.items():
+            print(f"运行 {name} ...")
+            reports[name] = run_variant(name, quantized, base_config, args, samples, work_dir)
+    if "error" in reports["fp32"]:
+        print(f"fp32 运行失败: {reports['fp32']['error']}")
+        sys.exit(1)
+
+    baseline = reports["fp32"]["outputs"]
+    base_p50 = summarize(reports["fp32"]["times"])["p50_ms"]
+    results = {}
+    for name, quantized in variants.items():
+        report = reports[name]
+        if "error" in report:
+            results[name] = {"error": report["error"]}
+            continue
+        # 实际加载的量化文件，配置了量化但文件缺失时会回退到原模型
+        files = sorted(os.path.basename(v["path"]) for v in report["loaded"].values()
+                       if v["path"].endswith(".int8.onnx"))
+        result = {"files": files, "latency": summarize(report["times"])}
+        result.update(compare(report["outputs"], baseline, samples, args.iou, with_truth))
+        result["speedup"] = round(base_p50 / result["latency"]["p50_ms"], 3)
+        result["passed"] = bool(quantized) and bool(files) and result["speedup"] > 1.0 and all(
+            result[f"agree_{k}"] >= 1 - args.max_drop for k in ("f1", "structure", "text_exact")
+        )
+        results[name] = result
+
+    print(f"样本 {len(samples)} 张，档位 {args.profile}，{'含表格检测' if args.detect else '不含表格检测'}")
+    header = f"{'variant':>18} {'p50 ms':>8} {'p95 ms':>8} {'speedup':>7} {'a_f1':>6} {'a_str':>6} {'a_text':>6}"
+    print(header + (f" {'f1':>6} {'text':>6}" if with_truth else "") + f" {'passed':>6}")
+    for name, res in results.items():
+        if "error" in res:
+            print(f"{name:>18}  失败: {res['error']}")
+            continue
+        line = (f"{name:>18} {res['latency']['p50_ms']:8.1f} {res['latency']['p95_ms']:8.1f} {res['speedup']:7.2f} "
+                f"{res['agree_f1']:6.3f} {res['agree_structure']:6.3f} {res['agree_text_exact']:6.3f}")
+        if with_truth:
+            line += f" {res['f1']:6.3f} {res['text_exact']:6.3f}"
+        print(line + f" {str(res['passed']):>6}")
+
+    if args.accept:
+        manifest = ort_config.load_manifest()
+        for model in models:
+            res = results.get(model, {})
+            for file_name in res.get("files", []):
+                entry = manifest.get(file_name)
+                if entry is None or entry["model"] != model:
+                    continue
+                entry["accepted"] = res["passed"]
+                entry["parity"] = {k: res[k] for k in ("agree_f1", "agree_structure", "agree_text_exact", "speedup")}
+                entry["parity"].update(profile=args.profile, samples=len(samples),
+                                       evaluated=time.strftime("%Y-%m-%d %H:%M:%S"))
+                print(f"{file_name}: {'accepted' if res['passed'] else '未通过'}")
+        with open(os.path.join(ort_config.QUANTIZED_DIR, ort_config.MANIFEST_NAME), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=4)
+
+    if args.out:
+        result = {
+            "meta": {**environment_info(), "corpus": args.corpus or "synthetic", "samples": len(samples),
+                     "profile": args.profile, "detect": args.detect, "repeat": args.repeat, "iou": args.iou,
+                     "max_drop": args.max_drop},
+            "variants": results,
+        }
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+# benchmarks/load_test.py
+"""
+/process_image 的本地压测：启动印章识别桩服务与被测服务，回放样本文件，按接口与文档类型统计
+吞吐与 p50 / p95 / p99 延迟。全部在本机运行，不访问外部的印章识别接口。
+
+被测服务（--target）：
+- server:       python server.py（werkzeug 多线程）
+- gunicorn:     gunicorn -c gunicorn.conf.py server:app
+- table_server: uvicorn table_server:app（在仓库根目录运行，依赖 table/predict_table.py）
+- none:         不启动，压测 --url 指定的已运行服务（此时需自行将其 SEAL_API_URL 指向桩服务）
+
+负载模式：
+- --concurrency N: 闭环，N 个客户端各自收到响应后立即发送下一个请求
+- --rps R:         开环，按固定速率发送，延迟从计划发送时刻算起，服务变慢时排队时间计入延迟
+
+样本：--corpus 目录下的 png/jpg/jpeg/bmp/tiff/pdf 文件；未指定时生成合成表格的 JPEG、PNG 与多页 PDF。
+
+用法:
+    python benchmarks/load_test.py --target server --concurrency 4 --duration 60 --out load.json
+    python benchmarks/load_test.py --target gunicorn --workers 4 --rps 8 --duration 120 \\
+        --seal-latency-ms 120 --seal-error-rate 0.02
+"""
+import argparse
+import collections
+import io
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_utils import ROOT, environment_info  # noqa: E402
+from stub_seal_server import make_stub_server  # noqa: E402
+from synthetic_tables import make_table  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SUPPORTED_EXTENSIONS = ("png", "jpg", "jpeg", "bmp", "tiff", "pdf")
+
+SERVER_BOOTSTRAP = """
+import sys
+sys.path.insert(0, {root!r})
+sys.path.insert(0, {bench!r})
+from bench_utils import install_vendored_wired_main
+install_vendored_wired_main()
+import server
+server.main(host="127.0.0.1", port={port})
+"""
+
+# 在仓库的 gunicorn 配置基础上启用仓库中的 wired_table_rec main.py 修改版
+GUNICORN_WRAPPER = """
+import sys
+sys.path.insert(0, {root!r})
+sys.path.insert(0, {bench!r})
+exec(compile(open({conf!r}, encoding="utf-8").read(), {conf!r}, "exec"))
+from bench_utils import install_vendored_wired_main
+install_vendored_wired_main()
+"""
+
+
+def load_corpus(directory):
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        ext = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+        if ext in SUPPORTED_EXTENSIONS:
+            with open(os.path.join(directory, name), "rb") as f:
+                corpus.append({"name": name, "type": "jpg" if ext == "jpeg" else ext, "content": f.read()})
+    return corpus
+
+
+def synthetic_corpus(n_tables=4, pdf_pages=3):
+    """
+    合成样本：不同行列数的表格各生成 JPEG 与 PNG，再把前 pdf_pages 张合成一个多页 PDF。
+    """
+    from PIL import Image
+
+    corpus, pages = [], []
+    for i in range(n_tables):
+        img, _ = make_table(rows=6 + 4 * i, cols=4 + i, merged=i, seed=i)
+        corpus.append({"name": f"table_{i}.jpg", "type": "jpg", "content": cv2.imencode(".jpg", img)[1].tobytes()})
+        corpus.append({"name": f"table_{i}.png", "type": "png", "content": cv2.imencode(".png", img)[1].tobytes()})
+        pages.append(Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB)))
+    if pdf_pages and pages:
+        buf = io.BytesIO()
+        pages = (pages * pdf_pages)[:pdf_pages]
+        pages[0].save(buf, format="PDF", save_all=True, append_images=pages[1:], resolution=150)
+        corpus.append({"name": f"tables_{pdf_pages}p.pdf", "type": "pdf", "content": buf.getvalue()})
+    return corpus
+
+
+def start_target(args, work_dir, seal_url):
+    """
+    启动被测服务，返回 (进程, 日志路径)。
+    """
+    env = {**os.environ, "SEAL_API_URL": seal_url}
+    log_path = os.path.join(work_dir, f"{args.target}.log")
+    if args.target == "server":
+        code = SERVER_BOOTSTRAP.format(root=ROOT, bench=BENCH_DIR, port=args.port)
+        cmd, cwd = [sys.executable, "-c", code], work_dir
+    elif args.target == "gunicorn":
+        conf = os.path.join(work_dir, "gunicorn_load.conf.py")
+        with open(conf, "w", encoding="utf-8") as f:
+            f.write(GUNICORN_WRAPPER.format(root=ROOT, bench=BENCH_DIR, conf=os.path.join(ROOT, "gunicorn.conf.py")))
+        env.update({"BIND": f"127.0.0.1:{args.port}"})
+        if args.workers:
+            env["WORKERS"] = str(args.workers)
+        cmd, cwd = [sys.executable, "-m", "gunicorn", "-c", conf, "--pythonpath", ROOT, "server:app"], work_dir
+    else:
+        # table_server 的识别脚本与模型路径均相对于仓库根目录
+        cmd = [sys.executable, "-m", "uvicorn", "table_server:app", "--host", "127.0.0.1", "--port", str(args.port)]
+        cwd = ROOT
+    with open(log_path, "w") as log:
+        proc = subprocess.Popen(cmd, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+    return proc, log_path
+
+
+def wait_ready(base, proc, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc is not None and proc.poll() is not None:
+            return "服务进程已退出"
+        try:
+            if requests.get(f"{base}/readyz", timeout=1).status_code == 200:
+                return None
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    return "等待就绪超时"
+
+
+class WorkCycle:
+    """
+    多个客户端线程共享的循环请求序列。
+    """
+
+    def __init__(self, items):
+        self._items = itertools.cycle(items)
+        self._lock = threading.Lock()
+
+    def __next__(self):
+        with self._lock:
+            return next(self._items)
+
+
+class Recorder:
+    """
+    按 (接口, 文档类型) 汇总每个请求的延迟与状态。
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = collections.defaultdict(list)
+        self.statuses = collections.defaultdict(collections.Counter)
+
+    def add(self, key, latency, status):
+        with self.lock:
+            self.statuses[key][status] += 1
+            if status == "200":
+                self.samples[key].append(latency)
+
+    def report(self, elapsed):
+        rows = {}
+        keys = sorted(set(self.samples) | set(self.statuses))
+        totals = ("all", "all")
+        all_samples = [s for k in keys for s in self.samples[k]]
+        all_statuses = sum((self.statuses[k] for k in keys), collections.Counter())
+        for key, samples, statuses in [(k, self.samples[k], self.statuses[k]) for k in keys] + \
+                [(totals, all_samples, all_statuses)]:
+            arr = np.asarray(samples, dtype=np.float64) * 1000
+            row = {
+                "requests": int(sum(statuses.values())),
+                "ok": len(samples),
+                "errors": int(sum(statuses.values()) - len(samples)),
+                "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+                "statuses": dict(statuses),
+            }
+            if arr.size:
+                for q in (50, 95, 99):
+                    row[f"p{q}_ms"] = round(float(np.percentile(arr, q)), 1)
+                row["max_ms"] = round(float(arr.max()), 1)
+            rows[f"{key[0]} {key[1]}"] = row
+        return rows
+
+
+def send(session, base, endpoint, doc, timeout):
+    """
+    发送一个请求，返回状态（HTTP 状态码、部分结果标记或异常类型）。
+    """
+    try:
+        resp = session.post(f"{base}{endpoint}", files={"image": (doc["name"], doc["content"])}, timeout=timeout)
+    except requests.RequestException as e:
+        return type(e).__name__
+    status = str(resp.status_code)
+    if resp.status_code == 200:
+        try:
+            result = resp.json().get("result") or {}
+        except ValueError:
+            return "invalid_json"
+        # 截止时间到期返回的部分结果单独计数
+        if isinstance(result, dict) and result.get("partial"):
+            return "200_partial"
+    return status
+
+
+def run_closed_loop(args, base, work, recorder, stop_at, record_after):
+    local = threading.local()
+
+    def client():
+        local.session = requests.Session()
+        while time.perf_counter() < stop_at:
+            endpoint, doc = next(work)
+            s = time.perf_counter()
+            status = send(local.session, base, endpoint, doc, args.request_timeout)
+            if s >= record_after:
+                recorder.add((endpoint, doc["type"]), time.perf_counter() - s, status)
+
+    threads = [threading.Thread(target=client) for _ in range(args.concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def run_open_loop(args, base, work, recorder, stop_at, record_after):
+    local = threading.local()
+
+    def one(endpoint, doc, scheduled):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        status = send(local.session, base, endpoint, doc, args.request_timeout)
+        if scheduled >= record_after:
+            # 从计划发送时刻计时，客户端线程不够或服务排队时的等待都计入延迟
+            recorder.add((endpoint, doc["type"]), time.perf_counter() - scheduled, status)
+
+    interval = 1.0 / args.rps
+    with ThreadPoolExecutor(max_workers=args.max_inflight) as pool:
+        scheduled = time.perf_counter()
+        while scheduled < stop_at:
+            now = time.perf_counter()
+            if scheduled > now:
+                time.sleep(scheduled - now)
+            endpoint, doc = next(work)
+            pool.submit(one, endpoint, doc, scheduled)
+            scheduled += interval
+
+
+def print_report(rows):
+    print(f"{'endpoint / type':>28} {'req':>6} {'ok':>6} {'err':>5} {'rps':>7} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for key, row in rows.items():
+        print(f"{key:>28} {row['requests']:6d} {row['ok']:6d} {row['errors']:5d} {row['throughput_rps']:7.2f} "
+              f"{row.get('p50_ms', float('nan')):8.1f} {row.get('p95_ms', float('nan')):8.1f} "
+              f"{row.get('p99_ms', float('nan')):8.1f}")
+        other = {k: v for k, v in row["statuses"].items() if k != "200"}
+        if other:
+            print(f"{'':>28} 非 200: {other}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--target", choices=["server", "gunicorn", "table_server", "none"], default="server")
+    parser.add_argument("--url", help="--target none 时被测服务的地址，如 http://127.0.0.1:13006")
+    parser.add_argument("--port", type=int, default=13206)
+    parser.add_argument("--workers", type=int, help="gunicorn 的工作进程数")
+    parser.add_argument("--endpoint", action="append", help="压测的接口，可重复指定，默认 /process_image")
+    parser.add_argument("--corpus", help="样本文件目录，默认使用合成表格")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--concurrency", type=int, help="闭环并发数（默认 4）")
+    mode.add_argument("--rps", type=float, help="开环的目标请求速率")
+    parser.add_argument("--max-inflight", type=int, default=256, help="开环模式下同时进行的请求数上限")
+    parser.add_argument("--duration", type=float, default=60, help="压测时长（秒），包括预热")
+    parser.add_argument("--warmup", type=float, default=5, help="预热时长（秒），期间的请求不计入统计")
+    parser.add_argument("--request-timeout", type=float, default=300)
+    parser.add_argument("--ready-timeout", type=float, default=600)
+    parser.add_argument("--seal-port", type=int, default=24299)
+    parser.add_argument("--seal-latency-ms", type=float, default=80)
+    parser.add_argument("--seal-jitter-ms", type=float, default=20)
+    parser.add_argument("--seal-error-rate", type=float, default=0.0)
+    parser.add_argument("--out", help="结果 JSON 的输出路径")
+    args = parser.parse_args()
+    if args.rps is None and args.concurrency is None:
+        args.concurrency = 4
+    endpoints = args.endpoint or ["/process_image"]
+
+    corpus = load_corpus(args.corpus) if args.corpus else synthetic_corpus()
+    if not corpus:
+        parser.error("样本目录中没有支持的文件")
+
+    stub = make_stub_server(port=args.seal_port, latency_ms=args.seal_latency_ms,
+                            jitter_ms=args.seal_jitter_ms, error_rate=args.seal_error_rate)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    seal_url = f"http://127.0.0.1:{args.seal_port}/seal/recognize_seal"
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        proc, log_path = None, None
+        if args.target == "none":
+            if not args.url:
+                parser.error("--target none 需要指定 --url")
+            base = args.url.rstrip("/")
+        else:
+            proc, log_path = start_target(args, work_dir, seal_url)
+            base = f"http://127.0.0.1:{args.port}"
+        try:
+            error = wait_ready(base, proc, args.ready_timeout)
+            if error:
+                tail = ""
+                if log_path:
+                    with open(log_path) as f:
+                        tail = f.read()[-3000:]
+                sys.exit(f"被测服务未就绪: {error}\n{tail}")
+
+            # 按样本与接口轮流发送
+            work = WorkCycle([(endpoint, doc) for doc in corpus for endpoint in endpoints])
+            recorder = Recorder()
+            start = time.perf_counter()
+            record_after = start + args.warmup
+            stop_at = start + args.duration
+            if args.rps:
+                run_open_loop(args, base, work, recorder, stop_at, record_after)
+            else:
+                run_closed_loop(args, base, work, recorder, stop_at, record_after)
+            elapsed = max(0.0, min(time.perf_counter(), stop_at) - record_after)
+        finally:
+            if proc is not None:
+                proc.terminate()
+                try:
+                    proc.wait(timeout=60)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+            stub.shutdown()
+
+    rows = recorder.report(elapsed)
+    mode_desc = f"rps={args.rps}" if args.rps else f"concurrency={args.concurrency}"
+    print(f"target={args.target} {mode_desc} 统计时长 {elapsed:.1f}s，印章桩服务调用 {stub.stats['requests']} 次")
+    print_report(rows)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": environment_info(),
+                "config": {k: v for k, v in vars(args).items()},
+                "seal_stub": dict(stub.stats),
+                "results": rows,
+            }, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
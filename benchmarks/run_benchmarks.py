@@ -0,0 +1,307 @@
+# benchmarks/run_benchmarks.py
+"""
+分阶段性能测试。
+
+在合成表格上分别统计各处理阶段的耗时：
+    table_cls       TableCls 表格分类
+    table_det       TableDetector 表格检测与方向矫正
+    line_rec        WiredTableRecognition 的表格线识别（table_line_rec）
+    table_recover   TableRecover 结构恢复
+    ocr             整页 RapidOCR
+    match_ocr_cell  OCR 结果与单元格匹配
+    re_rec          空单元格补识别
+    post_process    TableCells 构建、首行首列调整、单元格内排序合并
+    build_json      table_ocr.build_json
+    process_image   通过 Flask test client 调用完整的 /process_image 接口
+
+某个模型无法加载时该阶段记为错误，后续阶段改用合成数据的标注作为输入，
+保证其余阶段仍可测量。结果写成 JSON，可用 --compare 对比两个版本。
+
+用法:
+    python benchmarks/run_benchmarks.py --out bench_results.json
+    python benchmarks/run_benchmarks.py --stages match_ocr_cell re_rec build_json --repeat 10
+    python benchmarks/run_benchmarks.py --compare old.json new.json --tolerance 0.15
+"""
+import argparse
+import copy
+import inspect
+import io
+import json
+import os
+import sys
+import tempfile
+import types
+from collections import defaultdict
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_utils import (  # noqa: E402
+    environment_info, install_vendored_wired_main, load_vendored_wired_main, summarize, timed,
+)
+from synthetic_tables import make_table  # noqa: E402
+
+STAGES = [
+    "table_cls", "table_det", "line_rec", "table_recover", "ocr",
+    "match_ocr_cell", "re_rec", "post_process", "build_json", "process_image",
+]
+
+CASES = {
+    "wired_small": dict(rows=8, cols=5, merged=2),
+    "wired_large": dict(rows=40, cols=12, merged=8),
+    "wired_rotated_noisy": dict(rows=10, cols=6, merged=2, rotation=3.0, noise=0.03),
+    "lineless": dict(rows=10, cols=5, merged=0, wired=False),
+}
+
+
+class StageRecorder:
+    def __init__(self, stages):
+        self.stages = set(stages)
+        self.samples = defaultdict(list)
+        self.errors = {}
+
+    def run(self, stage, func, *args, **kwargs):
+        """
+        运行并记录一个阶段，阶段未启用或出错时返回 None。
+        """
+        if stage not in self.stages or stage in self.errors:
+            return None
+        try:
+            result, elapse = timed(func, *args, **kwargs)
+        except Exception as e:
+            self.errors[stage] = f"{type(e).__name__}: {e}"
+            return None
+        self.samples[stage].append(elapse)
+        return result
+
+
+def build_models(recorder, cls_model_type):
+    """
+    加载各阶段用到的模型，加载失败的阶段记为错误。会话参数与服务相同，取自 ort_config。
+    """
+    from ort_config import configured_sessions
+
+    models = types.SimpleNamespace(table_cls=None, table_det=None, wired=None, ocr=None, recover=None)
+    stages = recorder.stages
+    if "table_cls" in stages:
+        try:
+            from table_cls import TableCls
+            with configured_sessions("table_cls"):
+                models.table_cls = TableCls(model_type=cls_model_type)
+        except Exception as e:
+            recorder.errors["table_cls"] = f"load failed: {e}"
+    if "table_det" in stages:
+        try:
+            from rapid_table_det.inference import TableDetector
+            with configured_sessions("table_det"):
+                models.table_det = TableDetector()
+        except Exception as e:
+            recorder.errors["table_det"] = f"load failed: {e}"
+
+    try:
+        install_vendored_wired_main()
+        from wired_table_rec import WiredTableRecognition
+        with configured_sessions("wired_table_rec"):
+            models.wired = WiredTableRecognition()
+        models.recover = models.wired.table_recover
+        models.ocr = models.wired.ocr
+    except Exception as e:
+        recorder.errors["line_rec"] = f"load failed: {e}"
+        try:
+            from wired_table_rec.table_recover import TableRecover
+            models.recover = TableRecover()
+        except Exception as e2:
+            recorder.errors["table_recover"] = f"load failed: {e2}"
+        try:
+            from rapidocr_onnxruntime import RapidOCR
+            with configured_sessions("rapidocr"):
+                models.ocr = RapidOCR()
+        except Exception as e2:
+            recorder.errors["ocr"] = f"load failed: {e2}"
+    if models.ocr is None:
+        recorder.errors.setdefault("ocr", "rapidocr_onnxruntime not available")
+        recorder.errors.setdefault("re_rec", "rapidocr_onnxruntime not available")
+    return models
+
+
+def run_case(recorder, models, img, truth, build_json):
+    from table_postprocess import match_ocr_cell
+    from table_result import TableCells
+
+    recorder.run("table_cls", models.table_cls, img) if models.table_cls else None
+    recorder.run("table_det", models.table_det, img) if models.table_det else None
+
+    wired = truth["params"]["wired"]
+    truth_polygons = np.array([c["polygon"] for c in truth["cells"]], dtype=np.float32)
+    truth_logic = np.array(
+        [[c["row_start"], c["row_end"], c["col_start"], c["col_end"]] for c in truth["cells"]]
+    )
+
+    line_res = None
+    if wired and models.wired is not None:
+        line_res = recorder.run(
+            "line_rec", models.wired.table_line_rec, img,
+            version="v2", enhance_box_line=True, rotated_fix=True,
+        )
+    if line_res is not None and line_res[0] is not None:
+        polygons, rotated_polygons = line_res
+    else:
+        # 标注为顺时针，表格线识别的输出为逆时针
+        polygons = truth_polygons.copy()
+        rotated_polygons = truth_polygons[:, [0, 3, 2, 1], :].copy()
+
+    logi_points = None
+    if models.recover is not None:
+        # 较早版本的 TableRecover 不接受行列阈值参数
+        recover_args = (10, 15) if len(inspect.signature(models.recover).parameters) > 1 else ()
+        recover_res = recorder.run("table_recover", models.recover, rotated_polygons, *recover_args)
+        if recover_res is not None and line_res is not None and line_res[0] is not None:
+            logi_points = recover_res[1]
+            polygons[:, 1, :], polygons[:, 3, :] = polygons[:, 3, :].copy(), polygons[:, 1, :].copy()
+    if logi_points is None:
+        polygons, logi_points = truth_polygons.copy(), truth_logic
+
+    ocr_result = None
+    if models.ocr is not None:
+        ocr_result = recorder.run("ocr", models.ocr, img)
+        ocr_result = ocr_result[0] if ocr_result else None
+    if not ocr_result:
+        ocr_result = copy.deepcopy(truth["ocr_result"])
+
+    matched = recorder.run("match_ocr_cell", match_ocr_cell, ocr_result, polygons)
+    cell_box_det_map = matched[0] if matched else {}
+    if models.ocr is not None:
+        # 模块级的 re_rec 只需要 RapidOCR，表格线模型未能加载时也能运行
+        filled = recorder.run(
+            "re_rec", load_vendored_wired_main().re_rec, models.ocr, img, polygons,
+            copy.deepcopy(cell_box_det_map), True,
+        )
+        if filled is not None:
+            cell_box_det_map = filled
+
+    def post_process():
+        table_cells = TableCells.from_cell_box_det_map(cell_box_det_map, polygons, logi_points)
+        keep_mask = table_cells.drop_empty_first_row_col()
+        table_cells.sort_and_gather(threshold=0.3)
+        return table_cells[keep_mask]
+
+    adjust_cells = recorder.run("post_process", post_process)
+    if adjust_cells is not None and build_json is not None:
+        recorder.run("build_json", build_json, adjust_cells)
+
+
+def run_process_image(recorder, images, with_seal):
+    """
+    通过 Flask test client 调用 /process_image，在临时目录中运行以免写入仓库。
+    """
+    if "process_image" not in recorder.stages:
+        return
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)
+        try:
+            install_vendored_wired_main()
+            import server
+            if not with_seal:
+                server.call_seal_recognition_api = lambda *args, **kwargs: {"error": "skipped in benchmark"}
+            # 模型加载不计入接口耗时
+            server.models.load()
+            client = server.app.test_client()
+            for png in images:
+                resp = recorder.run(
+                    "process_image", client.post, "/process_image",
+                    data={"image": (io.BytesIO(png), "table.png")},
+                    content_type="multipart/form-data",
+                )
+                if resp is not None and resp.status_code != 200:
+                    recorder.samples["process_image"].pop()
+                    recorder.errors["process_image"] = f"HTTP {resp.status_code}: {resp.get_data(as_text=True)[:200]}"
+                    break
+        except Exception as e:
+            recorder.errors["process_image"] = f"{type(e).__name__}: {e}"
+        finally:
+            os.chdir(cwd)
+
+
+def compare(base, new, tolerance):
+    """
+    按 p50 对比两份结果，返回变慢超过 tolerance 的阶段列表。
+    """
+    regressions = []
+    print(f"{'stage':>16} {'base p50':>10} {'new p50':>10} {'change':>8}")
+    for stage in STAGES:
+        b = base["stages"].get(stage)
+        n = new["stages"].get(stage)
+        if not b or not n:
+            continue
+        change = n["p50_ms"] / b["p50_ms"] - 1 if b["p50_ms"] else 0.0
+        flag = ""
+        if change > tolerance:
+            flag = "  <-- regression"
+            regressions.append(stage)
+        print(f"{stage:>16} {b['p50_ms']:10.2f} {n['p50_ms']:10.2f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES)
+    parser.add_argument("--cases", nargs="+", default=list(CASES), choices=list(CASES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1, help="每个用例正式计时前的预热次数")
+    parser.add_argument("--cls-model", default="yolox")
+    parser.add_argument("--with-seal", action="store_true", help="完整接口测试时真实调用印章识别接口")
+    parser.add_argument("--out", help="结果 JSON 的输出路径")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="对比两份结果 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="p50 变慢超过该比例视为回退")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], encoding="utf-8") as f:
+            base = json.load(f)
+        with open(args.compare[1], encoding="utf-8") as f:
+            new = json.load(f)
+        sys.exit(1 if compare(base, new, args.tolerance) else 0)
+
+    recorder = StageRecorder(args.stages)
+    models = build_models(recorder, args.cls_model)
+    build_json = None
+    if "build_json" in recorder.stages:
+        try:
+            install_vendored_wired_main()
+            from table_ocr import build_json
+        except Exception as e:
+            recorder.errors["build_json"] = f"load failed: {e}"
+
+    cases = {name: make_table(**CASES[name]) for name in args.cases}
+    for img, truth in cases.values():
+        for _ in range(args.warmup):
+            run_case(StageRecorder(args.stages), models, img, truth, build_json)
+        for _ in range(args.repeat):
+            run_case(recorder, models, img, truth, build_json)
+
+    pngs = [cv2.imencode(".png", img)[1].tobytes() for img, _ in cases.values()]
+    run_process_image(recorder, pngs * args.repeat, args.with_seal)
+
+    result = {
+        "meta": {**environment_info(), "cases": args.cases, "repeat": args.repeat},
+        "stages": {s: summarize(recorder.samples[s]) for s in STAGES if recorder.samples.get(s)},
+        "errors": recorder.errors,
+    }
+
+    print(f"{'stage':>16} {'n':>4} {'mean':>9} {'p50':>9} {'p95':>9}  (ms)")
+    for stage, stats in result["stages"].items():
+        print(f"{stage:>16} {stats['n']:>4} {stats['mean_ms']:9.2f} {stats['p50_ms']:9.2f} {stats['p95_ms']:9.2f}")
+    for stage, err in recorder.errors.items():
+        print(f"{stage:>16} 未测量: {err}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.out}")
+
+
+if __name__ == "__main__":
+    main()
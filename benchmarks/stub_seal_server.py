@@ -0,0 +1,96 @@
+# benchmarks/stub_seal_server.py
+"""
+本地的印章识别接口桩服务，用于压测时替代外部的 h1337.iis.pub:24221。
+
+POST /seal/recognize_seal 读取完整的上传内容后，按配置的延迟返回与真实接口结构相同的响应：
+    {"code": 200, "result": {"details": {"stamp": [...]}}}
+- --latency-ms / --jitter-ms: 延迟的均值与标准差（正态分布，截断到 0 以上）
+- --error-rate: 返回 500 的比例
+- --stamp-rate: 响应中带一个印章的比例，其余返回空列表
+
+服务端启动时设置 SEAL_API_URL=http://127.0.0.1:<port>/seal/recognize_seal 即可使用。
+
+用法:
+    python benchmarks/stub_seal_server.py --port 24221 --latency-ms 80 --jitter-ms 20 --error-rate 0.01
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STAMP = {
+    "text": "某某有限公司财务专用章",
+    "score": 0.97,
+    "box": [[10, 10], [110, 10], [110, 110], [10, 110]],
+}
+
+
+class StubSealHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        config = self.server.config
+        delay = max(0.0, random.gauss(config.latency_ms, config.jitter_ms)) / 1000
+        time.sleep(delay)
+        with self.server.lock:
+            self.server.stats["requests"] += 1
+        if random.random() < config.error_rate:
+            with self.server.lock:
+                self.server.stats["errors"] += 1
+            self._send(500, {"code": 500, "message": "stub error"})
+            return
+        stamps = [STAMP] if random.random() < config.stamp_rate else []
+        self._send(200, {"code": 200, "message": "success", "result": {"details": {"stamp": stamps}}})
+
+    def do_GET(self):
+        # 桩服务自身的统计，便于核对压测期间的调用次数
+        with self.server.lock:
+            self._send(200, dict(self.server.stats))
+
+    def _send(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_stub_server(host="127.0.0.1", port=24221, latency_ms=80.0, jitter_ms=20.0, error_rate=0.0, stamp_rate=0.3):
+    server = ThreadingHTTPServer((host, port), StubSealHandler)
+    server.daemon_threads = True
+    server.config = argparse.Namespace(latency_ms=latency_ms, jitter_ms=jitter_ms, error_rate=error_rate,
+                                       stamp_rate=stamp_rate)
+    server.stats = {"requests": 0, "errors": 0}
+    server.lock = threading.Lock()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=24221)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--stamp-rate", type=float, default=0.3)
+    args = parser.parse_args()
+
+    server = make_stub_server(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate,
+                              args.stamp_rate)
+    print(f"印章识别桩服务: http://{args.host}:{args.port}/seal/recognize_seal", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# benchmarks/tune_ort_threads.py
+"""
+在当前机器上搜索工作进程数 × 每个会话线程数的组合，给出吞吐最高的配置。
+
+每个组合启动 workers 个独立进程，各进程按 ort_config 的方式加载模型（线程数通过临时配置文件传入），
+同时开始处理同一批合成表格图片，统计总吞吐与单张耗时。
+
+--pipeline 选择测量的负载：
+    table_ocr   TableOCR.perform_ocr，即服务中每张表格的完整识别（默认）
+    ocr         仅 RapidOCR 整页识别，模型不全时也可运行
+
+用法:
+    python benchmarks/tune_ort_threads.py --workers 1 2 4 --threads 1 2 4
+    python benchmarks/tune_ort_threads.py --pipeline ocr --write ort_config.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_utils import environment_info, install_vendored_wired_main, summarize  # noqa: E402
+from synthetic_tables import make_table  # noqa: E402
+
+
+def build_pipeline(pipeline):
+    if pipeline == "ocr":
+        from ort_config import configured_sessions
+        from rapidocr_onnxruntime import RapidOCR
+
+        with configured_sessions("rapidocr"):
+            engine = RapidOCR()
+        return lambda img_path: engine(img_path)
+
+    install_vendored_wired_main()
+    from table_ocr import TableOCR
+
+    table_ocr = TableOCR()
+    return table_ocr.perform_ocr
+
+
+def worker(config_path, pipeline, images, barrier, results):
+    os.environ["ORT_CONFIG"] = config_path
+    try:
+        run = build_pipeline(pipeline)
+        run(images[0])  # 预热
+    except Exception as e:
+        barrier.abort()
+        results.put({"error": f"{type(e).__name__}: {e}"})
+        return
+    try:
+        barrier.wait()
+    except multiprocessing.BrokenBarrierError:
+        return
+    start = time.perf_counter()
+    latencies = []
+    for img_path in images:
+        s = time.perf_counter()
+        run(img_path)
+        latencies.append(time.perf_counter() - s)
+    results.put({"start": start, "end": time.perf_counter(), "latencies": latencies})
+
+
+def run_layout(workers, threads, pipeline, images, work_dir):
+    """
+    以 workers 个进程、每个会话 threads 个算子内线程运行一轮，返回吞吐统计。
+    """
+    config_path = os.path.join(work_dir, f"ort_config_{workers}x{threads}.json")
+    with open(config_path, "w", encoding="utf-8") as f:
+        json.dump({"default": {"intra_op_num_threads": threads, "inter_op_num_threads": 1,
+                               "allow_spinning": workers == 1}}, f)
+
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=worker, args=(config_path, pipeline, images, barrier, results))
+        for _ in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    reports = [results.get() for _ in range(workers)]
+    for p in procs:
+        p.join()
+
+    errors = [r["error"] for r in reports if "error" in r]
+    if errors:
+        return {"error": errors[0]}
+    wall = max(r["end"] for r in reports) - min(r["start"] for r in reports)
+    latencies = [t for r in reports for t in r["latencies"]]
+    return {
+        "throughput": round(len(latencies) / wall, 3),
+        "latency": summarize(latencies),
+    }
+
+
+def main():
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pipeline", choices=["table_ocr", "ocr"], default="table_ocr")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--images", type=int, default=8, help="每个进程处理的图片数")
+    parser.add_argument("--allow-oversubscribe", action="store_true",
+                        help="也测试 workers × threads 超过 CPU 核数的组合")
+    parser.add_argument("--out", help="搜索结果 JSON 的输出路径")
+    parser.add_argument("--write", help="将推荐配置写入该 ort_config.json（保留其中已有的其他字段）")
+    args = parser.parse_args()
+
+    layouts = [
+        (w, t) for w in args.workers for t in args.threads
+        if args.allow_oversubscribe or w * t <= cpu_count
+    ]
+    if not layouts:
+        parser.error(f"没有 workers × threads <= {cpu_count} 的组合，可加 --allow-oversubscribe")
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        images = []
+        for i in range(args.images):
+            img, _ = make_table(rows=10, cols=5, merged=2, seed=i)
+            img_path = os.path.join(work_dir, f"table_{i}.png")
+            cv2.imwrite(img_path, img)
+            images.append(img_path)
+
+        print(f"CPU 核数: {cpu_count}, 负载: {args.pipeline}")
+        print(f"{'workers':>7} {'threads':>7} {'img/s':>8} {'p50 ms':>9} {'p95 ms':>9}")
+        for workers, threads in layouts:
+            res = run_layout(workers, threads, args.pipeline, images, work_dir)
+            results.append({"workers": workers, "threads": threads, **res})
+            if "error" in res:
+                print(f"{workers:>7} {threads:>7}  失败: {res['error']}")
+                continue
+            print(
+                f"{workers:>7} {threads:>7} {res['throughput']:8.2f} "
+                f"{res['latency']['p50_ms']:9.1f} {res['latency']['p95_ms']:9.1f}"
+            )
+
+    ok = [r for r in results if "error" not in r]
+    if not ok:
+        sys.exit(1)
+    best = max(ok, key=lambda r: r["throughput"])
+    print(f"推荐: workers={best['workers']}, intra_op_num_threads={best['threads']} "
+          f"({best['throughput']:.2f} img/s)")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"meta": {**environment_info(), "pipeline": args.pipeline},
+                       "results": results, "best": best}, f, ensure_ascii=False, indent=2)
+
+    if args.write:
+        config = {}
+        if os.path.exists(args.write):
+            with open(args.write, "r", encoding="utf-8") as f:
+                config = json.load(f)
+        config["workers"] = best["workers"]
+        config.setdefault("default", {}).update({
+            "intra_op_num_threads": best["threads"],
+            "inter_op_num_threads": 1,
+            "allow_spinning": best["workers"] == 1,
+        })
+        with open(args.write, "w", encoding="utf-8") as f:
+            json.dump(config, f, ensure_ascii=False, indent=4)
+        print(f"配置已写入 {args.write}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# gunicorn.conf.py
+"""
+生产环境的 pre-fork 服务配置，在仓库根目录启动：
+
+    gunicorn -c gunicorn.conf.py server:app
+
+master 进程导入 server 并加载全部识别模型后再 fork 工作进程，模型权重以写时复制的方式
+在各进程间共享，每个工作进程不再各自占用一份模型内存。
+
+环境变量：
+- WORKERS: 工作进程数，默认取 ort_config.json 中的 "workers"，未配置时为 CPU 核数
+- BIND: 监听地址，默认 0.0.0.0:13006
+- WORKER_TIMEOUT: 单个请求的超时时间（秒），默认 300
+- PRELOAD_MODELS: 默认 1；设为 0 时每个工作进程各自加载模型（用于内存对比）
+- PIN_WORKERS: 设为 1 时每个工作进程绑定到固定的一组 CPU 核，工作进程重启后沿用同一组核
+- MAX_REQUESTS: 工作进程处理该数量的请求后退出并由 master 重新 fork，默认 1000，0 不限制；
+  另加 0 ~ MAX_REQUESTS_JITTER（默认 MAX_REQUESTS 的 10%）的随机数，避免所有工作进程同时重启
+- MAX_WORKER_RSS_MB: 请求完成后工作进程的 RSS 超过该值时退出并重新 fork，默认 0 不限制（见 memory_guard.py）
+
+信号：
+- kill -HUP <master pid>: 在 master 中重新加载模型，成功后平滑替换全部工作进程，
+  加载失败时保留原模型继续服务
+- kill -TERM <master pid>: 等待处理中的请求完成后退出
+"""
+import gc
+import logging
+import os
+import sys
+
+from ort_config import get_config
+
+logger = logging.getLogger("gunicorn.error")
+
+_cpu_count = os.cpu_count() or 1
+
+bind = os.environ.get("BIND", "0.0.0.0:13006")
+workers = int(os.environ.get("WORKERS") or get_config().get("workers") or _cpu_count)
+worker_class = "sync"
+timeout = int(os.environ.get("WORKER_TIMEOUT", 300))
+graceful_timeout = timeout
+preload_app = os.environ.get("PRELOAD_MODELS", "1") != "0"
+pin_workers = os.environ.get("PIN_WORKERS") == "1"
+
+# 工作进程定期回收，清理长时间运行后累积的内存碎片；sync worker 在当前请求完成后才退出
+max_requests = int(os.environ.get("MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.environ.get("MAX_REQUESTS_JITTER", max_requests // 10))
+
+# 未显式配置线程数时，按工作进程数平分 CPU，避免各进程的推理线程互相抢占
+if not os.environ.get("ORT_INTRA_OP_THREADS") and "intra_op_num_threads" not in get_config()["default"]:
+    os.environ["ORT_INTRA_OP_THREADS"] = str(max(1, _cpu_count // workers))
+
+# 工作进程占用的 CPU 组编号 -> worker
+_cpu_slots = {}
+
+
+def _load_models(reload=False):
+    import server
+
+    if reload:
+        # 解除上次冻结，旧模型替换后可被回收
+        gc.unfreeze()
+        server.models.reload()
+    else:
+        server.models.load()
+    # 加载完成的对象移出 GC 跟踪，避免 fork 后垃圾回收改写引用计数所在的内存页、破坏写时复制
+    gc.collect()
+    gc.freeze()
+
+
+def when_ready(arbiter):
+    if preload_app:
+        _load_models()
+        logger.info("识别模型已在 master 中加载，开始 fork 工作进程")
+
+
+def on_reload(arbiter):
+    if not preload_app:
+        return
+    try:
+        _load_models(reload=True)
+        logger.info("识别模型已重新加载，替换工作进程")
+    except Exception as e:
+        logger.error("重新加载识别模型失败，继续使用原模型: %s", e)
+
+
+def post_worker_init(worker):
+    if not preload_app:
+        _load_models()
+
+
+def pre_fork(arbiter, worker):
+    if pin_workers:
+        # 取最小的空闲编号，退出的工作进程在 child_exit 中释放编号
+        slot = next(i for i in range(len(_cpu_slots) + 1) if i not in _cpu_slots)
+        _cpu_slots[slot] = worker
+        worker.cpu_slot = slot
+
+
+def post_fork(arbiter, worker):
+    if pin_workers:
+        per_worker = max(1, _cpu_count // workers)
+        start = (worker.cpu_slot * per_worker) % _cpu_count
+        cpus = {(start + i) % _cpu_count for i in range(per_worker)}
+        os.sched_setaffinity(0, cpus)
+        logger.info("工作进程 %s 绑定到 CPU %s", worker.pid, sorted(cpus))
+
+
+def post_request(worker, req, environ, resp):
+    import server
+
+    reason = server.memory_guard.recycle_reason()
+    if reason and worker.alive:
+        # 与 max_requests 相同的方式退出：当前请求已完成，不再接受新连接，由 master 补充新的工作进程
+        logger.warning("工作进程 %s 将被回收: %s", worker.pid, reason)
+        worker.alive = False
+
+
+def worker_exit(arbiter, worker):
+    # master 加载模型时 onnxruntime、pyarrow 等创建的原生线程不会复制到工作进程，解释器正常退出时
+    # C++ 静态对象的析构函数等待这些线程会卡住或 abort，工作进程无法按 max_requests / MAX_WORKER_RSS_MB 回收。
+    # 先输出本进程的日志、写完归档队列，再跳过析构直接退出，保留 gunicorn 设置的退出码
+    exc = sys.exc_info()[1]
+    code = exc.code if isinstance(exc, SystemExit) else 1
+    server = sys.modules.get("server")
+    if server is not None:
+        server.archive.flush(timeout=10)
+    logging.shutdown()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(code if isinstance(code, int) else (0 if code is None else 1))
+
+
+def child_exit(arbiter, worker):
+    slot = getattr(worker, "cpu_slot", None)
+    if slot is not None:
+        _cpu_slots.pop(slot, None)
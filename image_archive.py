@@ -0,0 +1,264 @@
+# image_archive.py
+"""
+预处理图像（方向矫正后的表格切图）的后台归档。
+
+请求线程只做抽样判断并把文件内容（或待编码的图像数组）放入有界队列，编码、写文件与清理都在后台线程中完成：
+- 队列已满或磁盘剩余空间不足时直接丢弃，不阻塞请求
+- 按 ARCHIVE_SAMPLE_RATE 以请求为单位抽样，同一请求的切图全部保留或全部丢弃
+- 归档总大小超过 ARCHIVE_MAX_BYTES、或文件超过 ARCHIVE_MAX_AGE_DAYS 时从最旧的文件开始删除
+- ARCHIVE_SHARDING 为 "date" 时按日期（YYYYMMDD/）分子目录，为 "hash" 时按文件名哈希的前两位分子目录，
+  默认 "none" 与原来一样全部放在一个目录中
+
+环境变量：
+- ARCHIVE_DIR: 归档目录，默认 preprocessed_images
+- ARCHIVE_SAMPLE_RATE: 抽样比例 0~1，默认 1（全部归档），0 关闭归档
+- ARCHIVE_QUEUE_SIZE: 等待写入的文件数上限，默认 256
+- ARCHIVE_MAX_BYTES: 归档总大小上限，默认 5GB
+- ARCHIVE_MAX_AGE_DAYS: 保留天数，默认 30，0 表示不按时间清理
+- ARCHIVE_MIN_FREE_BYTES: 磁盘剩余空间低于该值时停止写入，默认 1GB
+- ARCHIVE_SHARDING: none / date / hash
+
+多个工作进程共用同一目录时，每个进程各自统计归档大小，并每 RESCAN_INTERVAL 秒重新扫描目录校正。
+"""
+import hashlib
+import heapq
+import logging
+import os
+import queue
+import random
+import shutil
+import threading
+import time
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SHARDING_MODES = ("none", "date", "hash")
+
+# 重新扫描归档目录、按时间清理的间隔（秒）
+RESCAN_INTERVAL = 300
+
+_TMP_SUFFIX = ".tmp"
+
+
+class ArchiveWriter:
+    def __init__(self, root="preprocessed_images", sample_rate=1.0, queue_size=256, max_bytes=5 * 1024 ** 3,
+                 max_age_days=30, min_free_bytes=1024 ** 3, sharding="none"):
+        if sharding not in SHARDING_MODES:
+            raise ValueError(f"ARCHIVE_SHARDING 须为 {SHARDING_MODES} 之一: {sharding}")
+        self.root = root
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400
+        self.min_free_bytes = min_free_bytes
+        self.sharding = sharding
+        self.stats = {"queued": 0, "written": 0, "sampled_out": 0, "dropped_full": 0,
+                      "dropped_disk": 0, "evicted": 0, "errors": 0}
+        self._queue = queue.Queue(maxsize=queue_size)
+        # 保护 stats（请求线程与写入线程都会更新）和写入线程的启动
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        # (mtime, size, path) 的最小堆，堆顶为最旧的文件
+        self._files = []
+        self._total_bytes = 0
+        self._last_scan = 0.0
+
+    @classmethod
+    def from_env(cls):
+        env = os.environ
+        return cls(
+            root=env.get("ARCHIVE_DIR", "preprocessed_images"),
+            sample_rate=float(env.get("ARCHIVE_SAMPLE_RATE", 1.0)),
+            queue_size=int(env.get("ARCHIVE_QUEUE_SIZE", 256)),
+            max_bytes=int(env.get("ARCHIVE_MAX_BYTES", 5 * 1024 ** 3)),
+            max_age_days=float(env.get("ARCHIVE_MAX_AGE_DAYS", 30)),
+            min_free_bytes=int(env.get("ARCHIVE_MIN_FREE_BYTES", 1024 ** 3)),
+            sharding=env.get("ARCHIVE_SHARDING", "none"),
+        )
+
+    @property
+    def enabled(self):
+        return self.sample_rate > 0
+
+    def submit(self, paths, prefix=""):
+        """
+        归档一个请求的若干图像文件，文件名为 prefix + 原文件名，返回放入队列的文件数。
+        文件内容在调用时读入内存（刚写入的小文件，读取走页缓存），调用返回后即可删除原文件。
+        """
+        def read(path):
+            with open(path, "rb") as f:
+                return prefix + os.path.basename(path), f.read()
+
+        return self._submit(paths, read)
+
+    def submit_images(self, images, name, prefix=""):
+        """
+        归档一个请求的若干 BGR uint8 图像（如方向矫正后的表格切图），文件名为 prefix + name + "-extract-<序号>.jpg"，
+        返回放入队列的图像数。队列中只保存数组的引用，JPEG 编码在后台线程中进行，调用方之后不能再原地修改这些数组。
+        """
+        return self._submit(list(enumerate(images)), lambda item: (f"{prefix}{name}-extract-{item[0]}.jpg", item[1]))
+
+    def _submit(self, items, load):
+        # 以请求为单位抽样，load(item) 返回 (文件名, 内容)
+        if not self.enabled or not items:
+            return 0
+        if random.random() >= self.sample_rate:
+            self._count("sampled_out", len(items))
+            return 0
+        self._ensure_thread()
+        queued = 0
+        for item in items:
+            if self._queue.full():
+                self._count("dropped_full")
+                continue
+            try:
+                name, data = load(item)
+                self._queue.put_nowait((name, data, time.time()))
+                queued += 1
+            except queue.Full:
+                self._count("dropped_full")
+            except OSError as e:
+                self._count("errors")
+                logger.warning("读取待归档文件失败: %s 错误信息: %s", item, e)
+        self._count("queued", queued)
+        return queued
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.stats[key] += n
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats["pending"] = self._queue.qsize()
+        return stats
+
+    def flush(self, timeout=None):
+        """
+        等待队列中的文件全部写入，用于测试与退出前；超时返回 False。
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def _ensure_thread(self):
+        # gunicorn 预加载时模块在 master 中导入，线程不会随 fork 复制，需在工作进程中首次使用时启动
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._files, self._total_bytes, self._last_scan = [], 0, 0.0
+                self._thread = threading.Thread(target=self._run, name="image-archive", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        os.makedirs(self.root, exist_ok=True)
+        self._rescan()
+        while True:
+            try:
+                name, data, created = self._queue.get(timeout=RESCAN_INTERVAL)
+            except queue.Empty:
+                self._rescan()
+                continue
+            try:
+                self._write(name, data, created)
+            except Exception as e:
+                self._count("errors")
+                logger.warning("归档图像失败: %s 错误信息: %s", name, e)
+            finally:
+                self._queue.task_done()
+            if time.monotonic() - self._last_scan > RESCAN_INTERVAL:
+                self._rescan()
+
+    def _shard_dir(self, name, created):
+        if self.sharding == "date":
+            return os.path.join(self.root, time.strftime("%Y%m%d", time.localtime(created)))
+        if self.sharding == "hash":
+            return os.path.join(self.root, hashlib.md5(name.encode("utf-8")).hexdigest()[:2])
+        return self.root
+
+    def _write(self, name, data, created):
+        if isinstance(data, np.ndarray):
+            ok, buf = cv2.imencode(os.path.splitext(name)[1], data)
+            if not ok:
+                raise ValueError(f"无法编码图像: {name}")
+            data = buf.tobytes()
+        if shutil.disk_usage(self.root).free - len(data) < self.min_free_bytes:
+            self._count("dropped_disk")
+            return
+        directory = self._shard_dir(name, created)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, name)
+        # 先写临时文件再改名，清理或读取归档时不会看到写了一半的文件
+        tmp_path = path + _TMP_SUFFIX
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        heapq.heappush(self._files, (time.time(), len(data), path))
+        self._total_bytes += len(data)
+        self._count("written")
+        self._evict()
+
+    def _rescan(self):
+        """
+        重新扫描归档目录，校正文件列表与总大小（其他进程写入或删除的文件），并清理过期文件。
+        """
+        files, total = [], 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if filename.endswith(_TMP_SUFFIX):
+                    # 进程中断时遗留的临时文件
+                    if time.time() - st.st_mtime > RESCAN_INTERVAL:
+                        self._remove(path)
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        heapq.heapify(files)
+        self._files, self._total_bytes = files, total
+        self._last_scan = time.monotonic()
+        self._evict()
+
+    def _evict(self):
+        expire_before = time.time() - self.max_age if self.max_age > 0 else None
+        while self._files and (self._total_bytes > self.max_bytes
+                               or (expire_before is not None and self._files[0][0] < expire_before)):
+            _, size, path = heapq.heappop(self._files)
+            self._total_bytes -= size
+            if self._remove_file(path):
+                self._count("evicted")
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # 已被其他工作进程删除
+            return False
+        except OSError as e:
+            logger.warning("删除归档文件失败: %s 错误信息: %s", path, e)
+            return False
+        return True
+
+    def _remove_file(self, path):
+        if not self._remove(path):
+            return False
+        directory = os.path.dirname(path)
+        if os.path.abspath(directory) != os.path.abspath(self.root):
+            try:
+                # 分片子目录删空后一并删除；非空时 rmdir 失败，忽略
+                os.rmdir(directory)
+            except OSError:
+                pass
+        return True
@@ -0,0 +1,257 @@
+# layout_cache.py
+"""
+有线表格的版式缓存：同一种印刷表单（如付款申请单）反复出现、只是填写内容不同时，
+复用之前识别出的单元格框与逻辑行列，跳过表格线检测（table_line_rec）与结构恢复（TableRecover），只做 OCR。
+
+指纹与配准都只用 OpenCV 的形态学运算，不运行模型：
+- 指纹：表格图缩小到最长边 FINGERPRINT_MAX_SIDE 后自适应二值化，分别用长横线、长竖线核做开运算得到表格线掩码；
+  覆盖超过一定比例的横线 / 竖线的位置为版式的行线 / 列线。填写的文字、手写内容不会形成长直线，不影响指纹
+- 候选：行线数、列线数及识别参数都相同的缓存版式
+- 配准：按顺序对应的行线、列线分别拟合 新坐标 = a * 旧坐标 + b（两个方向各自缩放与平移），
+  最大残差超过边长的 tolerance 时放弃该候选
+- 置信度：配准后逐个单元格检查，四条边应落在新图的表格线上（边被线覆盖的比例），
+  内部的行线 / 列线位置上不应有贯穿单元格的线（手写笔画也可能形成较长的直线，
+  只检查行线、列线所在的位置，且覆盖超过 SPLIT_COVERAGE 才视为拆分单元格的线）；
+  取最差的单元格，低于 min_confidence 时走完整流程。行列线相同但合并单元格不同的版式在这一步被区分
+
+完整流程的结果在有足够的行线和列线时存入缓存，按最近使用淘汰。
+命中时表格线检测被缓存的版式取代，配准校验只能降低、不能排除套用错误版式的可能，
+因此默认关闭，确认业务中表单版式固定后再用 LAYOUT_CACHE_SIZE 开启。
+缓存在进程内，pre-fork 部署时每个工作进程各自积累；命中率等统计见 snapshot()，由 server.py 的 /metrics 返回。
+
+环境变量：
+- LAYOUT_CACHE_SIZE: 缓存的版式数，默认 0（关闭），如 64 开启
+- LAYOUT_CACHE_MIN_CONFIDENCE: 命中所需的最低置信度，默认 0.9
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_MAX_SIDE = 800
+# 横线（竖线）覆盖宽度（高度）的比例超过该值才作为行线（列线），合并单元格打断的线也能保留
+LINE_COVERAGE = 0.3
+# 单元格的边与表格线之间允许的偏差（指纹尺寸下的像素）
+EDGE_MARGIN = 3
+# 单元格内部行线（列线）位置上的线覆盖超过该比例时视为拆分单元格的线
+SPLIT_COVERAGE = 0.7
+
+
+def _line_positions(coverage, threshold=LINE_COVERAGE):
+    """
+    coverage 为每行（列）线像素的覆盖比例，返回连续超过阈值的各段的中心位置。
+    """
+    above = np.concatenate(([0], (coverage >= threshold).astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(above))
+    starts, ends = edges[0::2], edges[1::2]
+    return (starts + ends - 1) / 2.0
+
+
+class LayoutFingerprint:
+    def __init__(self, img):
+        """
+        计算 BGR（或灰度）uint8 表格图的版式指纹。
+        rows / cols 为原图坐标下的行线 y 坐标与列线 x 坐标，horizontal / vertical 为指纹尺寸下的横线、竖线掩码。
+        """
+        h, w = img.shape[:2]
+        self.shape = (h, w)
+        self.scale = min(1.0, FINGERPRINT_MAX_SIDE / max(h, w))
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+        if self.scale < 1.0:
+            gray = cv2.resize(gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 15, 10)
+        sh, sw = binary.shape
+        horizontal = cv2.morphologyEx(
+            binary, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (max(sw // 20, 10), 1))
+        )
+        vertical = cv2.morphologyEx(
+            binary, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (1, max(sh // 20, 10)))
+        )
+        self.rows = _line_positions(horizontal.sum(axis=1, dtype=np.float64) / (255 * sw)) / self.scale
+        self.cols = _line_positions(vertical.sum(axis=0, dtype=np.float64) / (255 * sh)) / self.scale
+        self.horizontal = horizontal > 0
+        self.vertical = vertical > 0
+
+    @property
+    def usable(self):
+        # 每个方向至少两条线才能配准
+        return len(self.rows) >= 2 and len(self.cols) >= 2
+
+
+class LayoutTemplate:
+    def __init__(self, key, fingerprint, polygons, logi_points):
+        self.key = key
+        self.fingerprint = fingerprint
+        self.polygons = np.array(polygons, dtype=np.float32)
+        self.logi_points = np.array(logi_points)
+        self.hits = 0
+
+
+class LayoutMatch:
+    """
+    命中的版式：polygons 已变换到新图坐标（(N, 4, 2)，顺时针），logi_points 为副本，可直接修改。
+    """
+
+    def __init__(self, polygons, logi_points, confidence):
+        self.polygons = polygons
+        self.logi_points = logi_points
+        self.confidence = confidence
+
+
+def _cell_confidence(polygons, fingerprint, threshold=0.0):
+    """
+    配准后的单元格框（原图坐标）与新图表格线的吻合程度，取最差的单元格；低于 threshold 时提前返回。
+    """
+    h_mask, v_mask = fingerprint.horizontal, fingerprint.vertical
+    height, width = h_mask.shape
+    d, inset = EDGE_MARGIN, EDGE_MARGIN + 2
+    rows = np.round(fingerprint.rows * fingerprint.scale).astype(np.int64)
+    cols = np.round(fingerprint.cols * fingerprint.scale).astype(np.int64)
+    boxes = np.concatenate([polygons.min(axis=1), polygons.max(axis=1)], axis=1) * fingerprint.scale
+    boxes = np.clip(np.round(boxes).astype(np.int64), 0, [width - 1, height - 1, width - 1, height - 1])
+    worst = 1.0
+    for x1, y1, x2, y2 in boxes:
+        # 四条边被表格线覆盖的比例
+        edges = (
+            h_mask[max(y1 - d, 0):y1 + d + 1, x1:x2 + 1].any(axis=0).mean(),
+            h_mask[max(y2 - d, 0):y2 + d + 1, x1:x2 + 1].any(axis=0).mean(),
+            v_mask[y1:y2 + 1, max(x1 - d, 0):x1 + d + 1].any(axis=1).mean(),
+            v_mask[y1:y2 + 1, max(x2 - d, 0):x2 + d + 1].any(axis=1).mean(),
+        )
+        score = sum(edges) / 4
+        # 内部穿过的线（缓存中合并的单元格在新图中被拆分）
+        inner = []
+        if x2 - x1 > 2 * inset:
+            inner += [h_mask[y - d:y + d + 1, x1 + inset:x2 - inset].any(axis=0).mean()
+                      for y in rows[(rows > y1 + inset) & (rows < y2 - inset)]]
+        if y2 - y1 > 2 * inset:
+            inner += [v_mask[y1 + inset:y2 - inset, x - d:x + d + 1].any(axis=1).mean()
+                      for x in cols[(cols > x1 + inset) & (cols < x2 - inset)]]
+        split = max(inner, default=0.0)
+        if split >= SPLIT_COVERAGE:
+            score = min(score, 1.0 - split)
+        worst = min(worst, score)
+        if worst < threshold:
+            break
+    return float(worst)
+
+
+def _fit_axis(old, new):
+    """
+    拟合 new = a * old + b，返回 (a, b, 最大残差)。
+    """
+    a, b = np.polyfit(old, new, 1)
+    return a, b, float(np.abs(a * old + b - new).max())
+
+
+class LayoutCache:
+    def __init__(self, max_entries=64, min_confidence=0.9, tolerance=0.01):
+        """
+        - max_entries: 缓存的版式数，0 关闭缓存
+        - min_confidence: 命中所需的最低置信度（最差单元格的边被表格线覆盖的比例）
+        - tolerance: 配准后行线 / 列线的最大残差，占图像边长的比例
+        """
+        self.max_entries = max_entries
+        self.min_confidence = min_confidence
+        self.tolerance = tolerance
+        self._lock = threading.Lock()
+        self._templates = OrderedDict()
+        self._next_id = 0
+        self.stats = {"lookups": 0, "hits": 0, "misses": 0, "rejected": 0, "stores": 0, "evictions": 0,
+                      "lookup_seconds": 0.0}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_entries=int(os.environ.get("LAYOUT_CACHE_SIZE", 0)),
+            min_confidence=float(os.environ.get("LAYOUT_CACHE_MIN_CONFIDENCE", 0.9)),
+        )
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def lookup(self, img, params=()):
+        """
+        在缓存中查找与 img 版式相同的表格，返回 (LayoutMatch 或 None, 指纹)。
+        params 为影响表格线检测与结构恢复的参数，不同参数的结果不混用；
+        未命中时把指纹和完整流程的结果传给 store()。
+        """
+        s = time.perf_counter()
+        fingerprint = LayoutFingerprint(img)
+        key = (len(fingerprint.rows), len(fingerprint.cols), params)
+        with self._lock:
+            candidates = [(tid, t) for tid, t in self._templates.items() if t.key == key]
+
+        best = None
+        for tid, template in candidates:
+            match = self._register(template, fingerprint)
+            if match is not None and (best is None or match.confidence > best[1].confidence):
+                best = (tid, match)
+
+        with self._lock:
+            self.stats["lookups"] += 1
+            self.stats["lookup_seconds"] += time.perf_counter() - s
+            if best is not None and best[1].confidence >= self.min_confidence:
+                self.stats["hits"] += 1
+                tid, match = best
+                if tid in self._templates:
+                    self._templates.move_to_end(tid)
+                    self._templates[tid].hits += 1
+            else:
+                self.stats["rejected" if candidates else "misses"] += 1
+                match = None
+        if best is not None:
+            logger.debug("版式缓存%s: 置信度 %.3f，候选 %d 个",
+                         "命中" if match is not None else "未通过校验", best[1].confidence, len(candidates))
+        return match, fingerprint
+
+    def _register(self, template, fingerprint):
+        old, new = template.fingerprint, fingerprint
+        ax, bx, err_x = _fit_axis(old.cols, new.cols)
+        ay, by, err_y = _fit_axis(old.rows, new.rows)
+        h, w = new.shape
+        if ax <= 0 or ay <= 0 or err_x > self.tolerance * w or err_y > self.tolerance * h:
+            return None
+
+        polygons = template.polygons.copy()
+        polygons[..., 0] = polygons[..., 0] * ax + bx
+        polygons[..., 1] = polygons[..., 1] * ay + by
+        confidence = _cell_confidence(polygons, new, self.min_confidence)
+        return LayoutMatch(polygons, template.logi_points.copy(), confidence)
+
+    def store(self, fingerprint, params, polygons, logi_points):
+        """
+        存入完整流程的结果：polygons 为顺时针的 (N, 4, 2) 单元格框，logi_points 为对应的逻辑行列。
+        指纹的行线或列线不足两条时不缓存。
+        """
+        if not self.enabled or fingerprint is None or not fingerprint.usable or len(polygons) == 0:
+            return
+        key = (len(fingerprint.rows), len(fingerprint.cols), params)
+        template = LayoutTemplate(key, fingerprint, polygons, logi_points)
+        with self._lock:
+            self._templates[self._next_id] = template
+            self._next_id += 1
+            self.stats["stores"] += 1
+            while len(self._templates) > self.max_entries:
+                self._templates.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._templates)
+            stats["max_entries"] = self.max_entries
+            stats["top_hits"] = sorted((t.hits for t in self._templates.values()), reverse=True)[:5]
+        stats["hit_rate"] = stats["hits"] / stats["lookups"] if stats["lookups"] else 0.0
+        return stats
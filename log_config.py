@@ -0,0 +1,147 @@
+# log_config.py
+"""
+服务的日志配置：请求线程只把日志记录放入队列，格式化与写文件 / 标准输出都在后台线程中完成。
+
+- 每条记录带上当前请求的 trace_id（取请求头 X-Request-ID，没有时生成），后台线程中格式化也不会丢失
+- LOG_FORMAT=json 时每行输出一个 JSON 对象，默认为文本格式
+- 识别结果、印章接口响应等大段内容以 extra={"payload": ...} 记录，只对按 LOG_PAYLOAD_SAMPLE_RATE
+  抽样的请求输出，未抽中的记录在放入队列前即被丢弃，不做任何格式化
+- 队列已满（LOG_QUEUE_SIZE）时丢弃新记录，不阻塞请求
+
+日志调用应使用 logger.info("... %s", value) 的形式，参数只在输出时才格式化。
+"""
+import contextvars
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import uuid
+
+from result_serializers import dumps_json
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(trace_id)s] %(message)s"
+
+_trace_id = contextvars.ContextVar("trace_id", default="-")
+_payload_sampled = contextvars.ContextVar("payload_sampled", default=False)
+
+# LogRecord 自带的属性，JSON 输出时其余属性视为 extra 字段
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "trace_id"}
+
+
+def start_trace(trace_id=None, payload_sample_rate=None):
+    """
+    开始一个请求：设置 trace_id（未指定时生成）并决定本请求是否输出 payload，返回 trace_id。
+    """
+    if payload_sample_rate is None:
+        payload_sample_rate = float(os.environ.get("LOG_PAYLOAD_SAMPLE_RATE", 0.01))
+    trace_id = trace_id or uuid.uuid4().hex
+    _trace_id.set(trace_id)
+    _payload_sampled.set(random.random() < payload_sample_rate)
+    return trace_id
+
+
+def current_trace_id():
+    return _trace_id.get()
+
+
+class TraceFilter(logging.Filter):
+    """
+    在请求线程中为记录附加 trace_id，并丢弃未抽中请求的 payload 记录。
+    """
+
+    def filter(self, record):
+        if hasattr(record, "payload") and not _payload_sampled.get():
+            return False
+        record.trace_id = _trace_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "trace_id": getattr(record, "trace_id", "-"),
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                data[key] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return dumps_json(data).decode("utf-8")
+
+
+class _TextFormatter(logging.Formatter):
+    def format(self, record):
+        text = super().format(record)
+        if hasattr(record, "payload"):
+            text = f"{text} {dumps_json(record.payload).decode('utf-8')}"
+        return text
+
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    """
+    有界队列的 QueueHandler，记录由本进程的 QueueListener 线程交给实际的 handler 输出。
+    gunicorn 预加载时日志在 master 中配置，fork 出的工作进程中没有监听线程，首次记录时在本进程重新启动。
+    """
+
+    def __init__(self, handlers, queue_size=10000):
+        self._handlers = handlers
+        self._queue_size = queue_size
+        self.dropped = 0
+        super().__init__(None)
+        self._start_listener()
+
+    def _start_listener(self):
+        self._pid = os.getpid()
+        self.queue = queue.Queue(maxsize=self._queue_size)
+        self.listener = logging.handlers.QueueListener(self.queue, *self._handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def prepare(self, record):
+        # 同一进程内的队列不需要序列化，原样传递记录，消息在监听线程中才格式化
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record):
+        if self._pid != os.getpid():
+            self._start_listener()
+        super().emit(record)
+
+    def close(self):
+        # logging.shutdown 在退出时调用；停止监听线程前先输出队列中剩余的记录
+        if self.listener is not None and self._pid == os.getpid():
+            self.listener.stop()
+            self.listener = None
+        super().close()
+
+
+def setup_logging(log_file="server.log", level=logging.INFO, fmt=None):
+    """
+    配置根 logger：日志写入 log_file 与标准错误输出。fmt 为 "json" 或 "text"，默认取环境变量 LOG_FORMAT。
+    返回安装的 AsyncQueueHandler。
+    """
+    fmt = fmt or os.environ.get("LOG_FORMAT", "text")
+    formatter = JsonFormatter() if fmt == "json" else _TextFormatter(TEXT_FORMAT, defaults={"trace_id": "-"})
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    queue_handler = AsyncQueueHandler(handlers, queue_size=int(os.environ.get("LOG_QUEUE_SIZE", 10000)))
+    queue_handler.addFilter(TraceFilter())
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    return queue_handler
@@ -0,0 +1,170 @@
+# memory_guard.py
+"""
+工作进程的内存统计与回收条件。
+
+每个请求记录结束时的 RSS、请求期间的峰值 RSS 与相对请求开始时的增长，汇总后由 server.py 的 /metrics 返回：
+- 峰值取 /proc/self/status 的 VmHWM，请求开始时向 /proc/self/clear_refs 写入 5 将其重置为当前 RSS；
+  同一进程内有多个请求并发时（开发服务器的多线程模式），只在没有其他请求进行时重置，峰值为重叠期间整个进程的峰值
+- MEMORY_TRACE_ALLOCATIONS=1 时用 tracemalloc 统计请求期间 Python 与 numpy 分配的峰值（约慢 10%~30%，用于排查）
+- 请求峰值比开始时高出 MEMORY_TRIM_MB（默认 64）以上时调用 glibc 的 malloc_trim，
+  把 PIL / pdf2image / OpenCV 释放后仍留在 malloc 堆中的空闲内存还给系统
+
+回收：RSS 超过 MAX_WORKER_RSS_MB（默认 0 不限制）时 recycle_reason() 返回原因，
+gunicorn.conf.py 在请求完成后据此让工作进程退出，由 master 重新 fork；按请求数回收使用 gunicorn 的 max_requests。
+pre-fork 模式下 RSS 包括已访问的共享模型页，阈值应在模型占用之上留出余量。
+
+仅支持 Linux，其他平台上各项统计为 0。
+"""
+import ctypes
+import ctypes.util
+import os
+import threading
+import tracemalloc
+
+MB = 1024 * 1024
+
+
+def _status_kb(*keys):
+    values = dict.fromkeys(keys, 0)
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                if name in values:
+                    values[name] = int(rest.split()[0]) * 1024
+    except OSError:
+        pass
+    return values
+
+
+def rss_bytes():
+    return _status_kb("VmRSS")["VmRSS"]
+
+
+def private_bytes():
+    """
+    进程独占的内存（USS），不含与 master 共享的模型页。读取 smaps_rollup 较慢，只在 /metrics 中使用。
+    """
+    total = 0
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                    total += int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return total
+
+
+def reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _load_malloc_trim():
+    name = ctypes.util.find_library("c")
+    try:
+        return ctypes.CDLL(name).malloc_trim if name else None
+    except (OSError, AttributeError):
+        return None
+
+
+_malloc_trim = _load_malloc_trim()
+
+
+def malloc_trim():
+    if _malloc_trim is not None:
+        _malloc_trim(0)
+
+
+class MemoryGuard:
+    def __init__(self, max_rss_bytes=0, trim_bytes=64 * MB, trace_allocations=False):
+        """
+        - max_rss_bytes: RSS 超过该值时 recycle_reason() 要求回收，0 不限制
+        - trim_bytes: 请求峰值比开始时高出该值以上时调用 malloc_trim，0 不调用
+        - trace_allocations: 用 tracemalloc 统计请求期间的分配峰值
+        """
+        self.max_rss_bytes = max_rss_bytes
+        self.trim_bytes = trim_bytes
+        self.trace_allocations = trace_allocations
+        self._lock = threading.Lock()
+        self._active = 0
+        self.stats = {"requests": 0, "trims": 0, "max_request_peak_rss": 0, "max_request_growth": 0,
+                      "max_request_alloc_peak": 0, "last": None}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_rss_bytes=int(float(os.environ.get("MAX_WORKER_RSS_MB", 0)) * MB),
+            trim_bytes=int(float(os.environ.get("MEMORY_TRIM_MB", 64)) * MB),
+            trace_allocations=os.environ.get("MEMORY_TRACE_ALLOCATIONS") == "1",
+        )
+
+    def begin(self):
+        """
+        请求开始时调用，返回传给 end() 的状态。
+        """
+        with self._lock:
+            self._active += 1
+            if self._active == 1:
+                reset_peak_rss()
+                if self.trace_allocations:
+                    # gunicorn fork 出的工作进程在首个请求时开始跟踪
+                    if not tracemalloc.is_tracing():
+                        tracemalloc.start()
+                    tracemalloc.reset_peak()
+        return {"rss": rss_bytes(), "alloc": tracemalloc.get_traced_memory()[0] if self.trace_allocations else 0}
+
+    def end(self, state):
+        """
+        请求结束时调用，返回本请求的内存统计（字节）。
+        """
+        with self._lock:
+            self._active -= 1
+            mem = _status_kb("VmRSS", "VmHWM")
+            usage = {
+                "rss": mem["VmRSS"],
+                "peak_rss": max(mem["VmHWM"], mem["VmRSS"]),
+                "growth": mem["VmRSS"] - state["rss"],
+            }
+            if self.trace_allocations and tracemalloc.is_tracing():
+                usage["alloc_peak"] = max(0, tracemalloc.get_traced_memory()[1] - state["alloc"])
+                self.stats["max_request_alloc_peak"] = max(self.stats["max_request_alloc_peak"], usage["alloc_peak"])
+            self.stats["requests"] += 1
+            self.stats["max_request_peak_rss"] = max(self.stats["max_request_peak_rss"], usage["peak_rss"])
+            self.stats["max_request_growth"] = max(self.stats["max_request_growth"], usage["growth"])
+            self.stats["last"] = usage
+            trim = self.trim_bytes and self._active == 0 and usage["peak_rss"] - state["rss"] > self.trim_bytes
+            if trim:
+                self.stats["trims"] += 1
+        if trim:
+            malloc_trim()
+            usage["rss_after_trim"] = rss_bytes()
+        return usage
+
+    def recycle_reason(self):
+        """
+        工作进程需要回收时返回原因，否则返回 None。
+        """
+        if self.max_rss_bytes:
+            rss = rss_bytes()
+            if rss > self.max_rss_bytes:
+                return f"RSS {rss / MB:.0f}MB 超过 MAX_WORKER_RSS_MB {self.max_rss_bytes / MB:.0f}MB"
+        return None
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats.update({
+            "pid": os.getpid(),
+            "rss": rss_bytes(),
+            "uss": private_bytes(),
+            "max_rss_bytes": self.max_rss_bytes,
+        })
+        if self.trace_allocations and tracemalloc.is_tracing():
+            stats["traced_alloc"] = tracemalloc.get_traced_memory()[0]
+        return stats
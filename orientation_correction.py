@@ -1,43 +1,81 @@
 # orientation_correction.py
 
+import logging
 import os
 import cv2
 from rapid_table_det.inference import TableDetector
+from ort_config import configured_sessions
 from rapid_table_det.utils.visuallize import img_loader, visuallize, extract_table_img
 
+logger = logging.getLogger(__name__)
+
 class ImageOrientationCorrector:
-    def __init__(self, output_dir="rapid_table_det/outputs"):
-        self.table_det = TableDetector()
+    def __init__(self, output_dir="rapid_table_det/outputs", save_visualization=False):
+        """
+        output_dir 为 None 时不创建默认输出目录，每次调用 correct_orientation 时指定，
+        便于多个请求共用同一个已加载模型的实例。
+        save_visualization 为 True 时 correct_orientation 另外输出画出检测框的可视化图片。
+        """
+        with configured_sessions("table_det"):
+            self.table_det = TableDetector()
         self.output_dir = output_dir
-        os.makedirs(self.output_dir, exist_ok=True)
+        self.save_visualization = save_visualization
+        if self.output_dir is not None:
+            os.makedirs(self.output_dir, exist_ok=True)
 
-    def correct_orientation(self, img_path):
-        result, elapse = self.table_det(img_path)
+    def _detect(self, img):
+        # 路径只在这里解码一次，数组原样使用；检测模型内部自行转换通道，不会修改传入的数组
+        img = img_loader(img)
+        result, elapse = self.table_det(img)
         obj_det_elapse, edge_elapse, rotate_det_elapse = elapse
-        print(
-            f"obj_det_elapse: {obj_det_elapse}, edge_elapse={edge_elapse}, rotate_det_elapse={rotate_det_elapse}"
+        logger.debug(
+            "obj_det_elapse: %s, edge_elapse=%s, rotate_det_elapse=%s", obj_det_elapse, edge_elapse, rotate_det_elapse
         )
+        return img, result, elapse
+
+    def extract_tables(self, img):
+        """
+        检测并矫正图片中的表格，返回 (矫正后的表格图像列表, 耗时)，不读写磁盘。
+        - img: 图片路径，或已解码的 BGR uint8 数组
+        表格图像为透视变换新生成的 BGR uint8 数组，与 TableOCR.perform_ocr 的输入约定一致，
+        后续阶段直接使用，不需要复制。
+        """
+        img, result, elapse = self._detect(img)
+        # 透视变换只读取原图，各表格共用同一个数组
+        tables = [extract_table_img(img, res["lt"], res["rt"], res["rb"], res["lb"]) for res in result]
+        return tables, elapse
 
-        img = img_loader(img_path)
-        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        file_name_with_ext = os.path.basename(img_path)
-        file_name, _ = os.path.splitext(file_name_with_ext)
-        extract_img = img.copy()
+    def correct_orientation(self, img_path, name=None, output_dir=None):
+        """
+        检测并矫正图片中的表格，返回 (矫正后表格图片路径列表, 耗时)。
+        参数:
+        - img_path: 图片路径，或已解码的 BGR uint8 数组
+        - name: 输出文件名前缀，默认取图片文件名；传入数组时必须指定
+        - output_dir: 本次调用的输出目录，默认使用构造时的 output_dir
+        """
+        output_dir = output_dir or self.output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        img, result, elapse = self._detect(img_path)
+        if name is not None:
+            file_name = name
+        else:
+            file_name_with_ext = os.path.basename(img_path)
+            file_name, _ = os.path.splitext(file_name_with_ext)
 
         corrected_image_paths = []
         for i, res in enumerate(result):
-            box = res["box"]
-            lt, rt, rb, lb = res["lt"], res["rt"], res["rb"], res["lb"]
-            # 可视化识别框和方向
-            visuallize(img, box, lt, rt, rb, lb)
             # 提取并矫正表格图片
-            wrapped_img = extract_table_img(extract_img.copy(), lt, rt, rb, lb)
-            corrected_image_path = os.path.join(self.output_dir, f"{file_name}-extract-{i}.jpg")
+            wrapped_img = extract_table_img(img, res["lt"], res["rt"], res["rb"], res["lb"])
+            corrected_image_path = os.path.join(output_dir, f"{file_name}-extract-{i}.jpg")
             cv2.imwrite(corrected_image_path, wrapped_img)
             corrected_image_paths.append(corrected_image_path)
 
-        # 保存可视化结果
-        visualize_path = os.path.join(self.output_dir, f"{file_name}-visualize.jpg")
-        cv2.imwrite(visualize_path, img)
+        if self.save_visualization:
+            # 可视化识别框和方向，画在副本上，不修改原图
+            vis_img = img.copy()
+            for res in result:
+                visuallize(vis_img, res["box"], res["lt"], res["rt"], res["rb"], res["lb"])
+            visualize_path = os.path.join(output_dir, f"{file_name}-visualize.jpg")
+            cv2.imwrite(visualize_path, vis_img)
 
         return corrected_image_paths, elapse
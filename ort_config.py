@@ -0,0 +1,241 @@
+# ort_config.py
+"""
+ONNX Runtime 会话参数的统一配置。
+
+TableCls、TableDetector、WiredTableRecognition、LinelessTableRecognition 和 RapidOCR
+各自创建 InferenceSession，线程数都取 onnxruntime 的默认值（每个会话占满全部核）。
+同一进程内多个模型、或多个工作进程同时推理时会超额占用 CPU，吞吐反而下降。
+
+这里集中配置每个模型的会话参数：
+- intra_op_num_threads / inter_op_num_threads: 算子内 / 算子间线程数，0 表示由 onnxruntime 决定
+- execution_mode: "sequential" 或 "parallel"
+- enable_cpu_mem_arena / enable_mem_pattern: 内存池与内存复用
+- allow_spinning: 线程空闲时是否自旋等待，多进程部署时关闭可减少空转
+- quantized: 是否加载 INT8 量化模型（quantize_models.py 生成，放在 QUANTIZED_DIR 下）
+    false: 使用原模型（默认）
+    true: 有量化模型时使用
+    "auto": 只使用 benchmarks/eval_quantized.py 对比后标记为 accepted、且原模型未变化的量化模型
+  没有可用的量化模型时回退到原模型
+
+配置来源（后者覆盖前者）：
+1. DEFAULT_SESSION_CONFIG
+2. 配置文件（环境变量 ORT_CONFIG 指定，默认仓库根目录下的 ort_config.json）中的
+   "default" 与 "models" -> 模型名 两级
+3. 环境变量 ORT_INTRA_OP_THREADS / ORT_INTER_OP_THREADS / ORT_QUANTIZED（0、1 或 auto），作用于所有模型
+
+配置文件示例（可由 benchmarks/tune_ort_threads.py --write 生成）：
+    {
+        "workers": 4,
+        "default": {"intra_op_num_threads": 2, "inter_op_num_threads": 1, "allow_spinning": false},
+        "models": {"rapidocr": {"intra_op_num_threads": 4, "quantized": "auto"}}
+    }
+
+用法：在 configured_sessions 中构造模型，期间创建的会话都会应用对应配置。
+    with configured_sessions("table_cls"):
+        table_cls = TableCls()
+"""
+import contextlib
+import importlib
+import json
+import logging
+import os
+
+import onnxruntime
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH_ENV = "ORT_CONFIG"
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ort_config.json")
+
+# 量化模型目录，文件名为 <原模型名>.int8.onnx，manifest.json 记录来源与对比结果
+QUANTIZED_DIR = os.environ.get("ORT_QUANTIZED_DIR") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "models_int8"
+)
+MANIFEST_NAME = "manifest.json"
+
+MODEL_NAMES = ("table_cls", "table_det", "wired_table_rec", "lineless_table_rec", "rapidocr")
+
+DEFAULT_SESSION_CONFIG = {
+    "intra_op_num_threads": 0,
+    "inter_op_num_threads": 0,
+    "execution_mode": "sequential",
+    "enable_cpu_mem_arena": False,
+    "enable_mem_pattern": True,
+    "allow_spinning": True,
+    "quantized": False,
+}
+
+_ENV_OVERRIDES = {
+    "intra_op_num_threads": "ORT_INTRA_OP_THREADS",
+    "inter_op_num_threads": "ORT_INTER_OP_THREADS",
+}
+
+_QUANTIZED_VALUES = {"0": False, "1": True, "auto": "auto"}
+
+_EXECUTION_MODES = {
+    "sequential": onnxruntime.ExecutionMode.ORT_SEQUENTIAL,
+    "parallel": onnxruntime.ExecutionMode.ORT_PARALLEL,
+}
+
+# 这些模块以 from onnxruntime import InferenceSession 的方式引用，需要逐个替换；
+# table_cls 通过 onnxruntime.InferenceSession 引用，替换 onnxruntime 上的属性即可
+_SESSION_MODULES = (
+    "wired_table_rec.utils",
+    "lineless_table_rec.utils",
+    "rapid_table_det.utils.infer_engine",
+    "rapidocr_onnxruntime.utils.infer_engine",
+)
+
+_config = None
+# 本进程创建过会话的模型文件：原模型路径 -> {"model": 模型名, "path": 实际加载的路径}
+_loaded = {}
+
+
+def load_config(path=None):
+    """
+    读取配置文件，文件不存在时返回空配置。
+    """
+    path = path or os.environ.get(CONFIG_PATH_ENV) or DEFAULT_CONFIG_PATH
+    config = {"workers": None, "default": {}, "models": {}}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            config.update(json.load(f))
+        unknown = set(config["models"]) - set(MODEL_NAMES)
+        if unknown:
+            raise ValueError(f"{path} 中有未知的模型名: {sorted(unknown)}，可选: {MODEL_NAMES}")
+    return config
+
+
+def get_config():
+    global _config
+    if _config is None:
+        _config = load_config()
+    return _config
+
+
+def session_config(model):
+    """
+    返回指定模型合并后的会话配置。
+    """
+    config = get_config()
+    merged = {**DEFAULT_SESSION_CONFIG, **config["default"], **config["models"].get(model, {})}
+    for key, env in _ENV_OVERRIDES.items():
+        if os.environ.get(env):
+            merged[key] = int(os.environ[env])
+    if os.environ.get("ORT_QUANTIZED"):
+        if os.environ["ORT_QUANTIZED"] not in _QUANTIZED_VALUES:
+            raise ValueError(f"ORT_QUANTIZED 应为 0、1 或 auto，实际为 {os.environ['ORT_QUANTIZED']!r}")
+        merged["quantized"] = _QUANTIZED_VALUES[os.environ["ORT_QUANTIZED"]]
+    return merged
+
+
+def quantized_path(model_path):
+    """
+    原模型对应的量化模型路径（不检查是否存在）。
+    """
+    stem = os.path.splitext(os.path.basename(str(model_path)))[0]
+    return os.path.join(QUANTIZED_DIR, f"{stem}.int8.onnx")
+
+
+def load_manifest():
+    path = os.path.join(QUANTIZED_DIR, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def resolve_model_path(model, model_path):
+    """
+    按模型的 quantized 配置返回实际加载的模型路径，量化模型不可用时返回原路径。
+    """
+    mode = session_config(model)["quantized"]
+    if not mode:
+        return model_path
+    candidate = quantized_path(model_path)
+    if not os.path.exists(candidate):
+        if mode is True:
+            logger.warning("未找到 %s 的量化模型 %s，使用原模型", os.path.basename(str(model_path)), candidate)
+        return model_path
+    if mode == "auto":
+        entry = load_manifest().get(os.path.basename(candidate), {})
+        # 安装包升级后原模型变化，旧的量化模型和对比结果都不再适用
+        if not entry.get("accepted") or entry.get("source_size") != os.path.getsize(model_path):
+            logger.info("%s 未通过对比或已过期，使用原模型", os.path.basename(candidate))
+            return model_path
+    return candidate
+
+
+def loaded_models():
+    """
+    本进程创建过会话的模型文件，quantize_models.py 据此确定需要量化的模型。
+    """
+    return dict(_loaded)
+
+
+def make_session_options(model, sess_opt=None):
+    """
+    将模型的会话配置写入 sess_opt（为 None 时新建），保留调用方已设置的其他选项。
+    """
+    cfg = session_config(model)
+    if sess_opt is None:
+        sess_opt = onnxruntime.SessionOptions()
+        sess_opt.log_severity_level = 4
+    if cfg["intra_op_num_threads"] > 0:
+        sess_opt.intra_op_num_threads = cfg["intra_op_num_threads"]
+    if cfg["inter_op_num_threads"] > 0:
+        sess_opt.inter_op_num_threads = cfg["inter_op_num_threads"]
+    sess_opt.execution_mode = _EXECUTION_MODES[cfg["execution_mode"]]
+    sess_opt.enable_cpu_mem_arena = cfg["enable_cpu_mem_arena"]
+    sess_opt.enable_mem_pattern = cfg["enable_mem_pattern"]
+    sess_opt.add_session_config_entry(
+        "session.intra_op.allow_spinning", "1" if cfg["allow_spinning"] else "0"
+    )
+    return sess_opt
+
+
+@contextlib.contextmanager
+def configured_sessions(model):
+    """
+    在 with 块内创建的 InferenceSession 都应用 model 对应的配置。
+    模型内部附带创建的 RapidOCR 会话（按模型文件路径识别）使用 "rapidocr" 的配置。
+
+    替换的是模块级的 InferenceSession，只应在启动阶段单线程构造模型时使用。
+    """
+    if model not in MODEL_NAMES:
+        raise ValueError(f"未知的模型名: {model}，可选: {MODEL_NAMES}")
+    original = onnxruntime.InferenceSession
+
+    def create_session(path_or_bytes, sess_options=None, providers=None, provider_options=None, **kwargs):
+        name = "rapidocr" if "rapidocr_onnxruntime" in str(path_or_bytes) else model
+        sess_options = make_session_options(name, sess_options)
+        if isinstance(path_or_bytes, (str, os.PathLike)):
+            source = os.path.abspath(str(path_or_bytes))
+            path_or_bytes = resolve_model_path(name, source)
+            _loaded[source] = {"model": name, "path": str(path_or_bytes)}
+        logger.info(
+            "ORT session %s (%s): intra_op=%d inter_op=%d",
+            os.path.basename(str(path_or_bytes)), name,
+            sess_options.intra_op_num_threads, sess_options.inter_op_num_threads,
+        )
+        return original(
+            path_or_bytes, sess_options=sess_options, providers=providers,
+            provider_options=provider_options, **kwargs,
+        )
+
+    patched = [onnxruntime]
+    for module_name in _SESSION_MODULES:
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            continue
+        if getattr(module, "InferenceSession", None) is original:
+            patched.append(module)
+
+    for module in patched:
+        module.InferenceSession = create_session
+    try:
+        yield
+    finally:
+        for module in patched:
+            module.InferenceSession = original
@@ -20,14 +20,10 @@ def process_image(image_block):
     # 读取图像块
     image_path, x, y, width, height = image_block
     image = cv2.imread(image_path)
-    # 裁剪图像块
-    image_block = image[y:y + height, x:x + width]
 
-    # 转换为RGB格式
-    image_block = cv2.cvtColor(image_block, cv2.COLOR_BGR2RGB)
-
-    # 转换为灰度图像
-    gray = cv2.cvtColor(image_block, cv2.COLOR_RGB2GRAY)
+    # 裁剪图像块并直接转换为灰度图像，二值化只需要单通道
+    gray = cv2.cvtColor(image[y:y + height, x:x + width], cv2.COLOR_BGR2GRAY)
+    del image
 
     # 中值滤波去除噪声
     gray = cv2.GaussianBlur(gray, (3, 3), 0)
@@ -39,11 +35,8 @@ def process_image(image_block):
     # 去除小黑点
     binary = remove_small_noise(binary, 8)
 
-    # 将处理后的图像块放回原图像中
-    image_block = cv2.cvtColor(binary, cv2.COLOR_GRAY2BGR)
-    image[y:y + height, x:x + width] = image_block
-    # 返回图像
-    return image
+    # 只返回处理后的单通道图像块，由主进程写回，不再把整张三通道图像传回主进程
+    return binary
 
 
 if __name__ == "__main__":
@@ -79,11 +72,11 @@ if __name__ == "__main__":
                 pool.close()
                 pool.join()
 
-                # 将处理后的图像块合并为完整图像
+                # 将处理后的图像块合并为完整图像，单通道结果按广播写入三个通道
                 processed_image = np.zeros_like(image)
                 for block, processed_block in zip(image_blocks, processed_blocks):
                     _, x, y, width, height = block
-                    processed_image[y:y + height, x:x + width] = processed_block[y:y + height, x:x + width]
+                    processed_image[y:y + height, x:x + width] = processed_block[:, :, None]
 
                 # 保存处理后的图像
                 cv2.imwrite(image_path, processed_image)
\ No newline at end of file
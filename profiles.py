@@ -0,0 +1,60 @@
+# profiles.py
+"""
+识别流程的速度 / 精度档位。
+
+每个档位包括：
+- cls_model: 表格分类模型，q（约 0.07s）、yolo（约 0.1s）、yolox（约 0.25s，精度最高）
+- max_width: 上传图片（PDF 每页）缩放后的最大宽度，见 server.resize_image
+- engine: 传给表格识别引擎的参数
+    enhance_box_line / rotated_fix: 有线表格的表格线增强与倾斜矫正
+    rec_again: 没有匹配到 OCR 结果的单元格是否单独再识别一次
+    cell_direct: 有线表格不做整页文字检测，按单元格框裁剪后批量识别（cell_batch_size 为每批的图片数），
+      此时不使用 ocr 参数，见 wired_table_rec——main.py 的 rec_cells
+- ocr: RapidOCR 的调用参数（use_cls、box_thresh、unclip_ratio、text_score 等），
+  为空时由表格识别引擎以默认参数调用；非空时 TableOCR 先用这些参数识别文字，再把结果交给引擎
+
+accurate 与之前固定的参数相同，是默认档位；服务的默认档位可用环境变量 TABLE_PROFILE 指定，
+单个请求用表单字段或查询参数 profile 选择，见 server.py。
+各档位在带标注样本上的耗时与单元格准确率用 benchmarks/eval_profiles.py 对比。
+"""
+import copy
+import os
+
+PROFILES = {
+    "fast": {
+        "cls_model": "q",
+        "max_width": 960,
+        "engine": {"enhance_box_line": False, "rotated_fix": False, "rec_again": False, "cell_direct": True},
+        # 不运行文字方向分类
+        "ocr": {"use_cls": False},
+    },
+    "balanced": {
+        "cls_model": "yolo",
+        "max_width": 1200,
+        "engine": {"enhance_box_line": True, "rotated_fix": True, "rec_again": True},
+        "ocr": {},
+    },
+    "accurate": {
+        "cls_model": "yolox",
+        "max_width": 1200,
+        "engine": {"enhance_box_line": True, "rotated_fix": True, "rec_again": True},
+        "ocr": {},
+    },
+}
+
+DEFAULT_PROFILE = os.environ.get("TABLE_PROFILE") or "accurate"
+# 启动时即检查，避免拼写错误的 TABLE_PROFILE 到第一个请求才报错
+if DEFAULT_PROFILE not in PROFILES:
+    raise ValueError(f"环境变量 TABLE_PROFILE 应为 {', '.join(PROFILES)} 之一，实际为 {DEFAULT_PROFILE!r}")
+
+
+def get_profile(name=None):
+    """
+    返回档位配置的副本（带 name 字段），name 为空时取 DEFAULT_PROFILE，未知档位抛出 ValueError。
+    """
+    name = name or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"未知的档位 {name!r}，可选: {', '.join(PROFILES)}")
+    profile = copy.deepcopy(PROFILES[name])
+    profile["name"] = name
+    return profile
@@ -0,0 +1,190 @@
+# quantize_models.py
+"""
+生成各 ONNX 模型的 INT8 量化版本，供 ort_config.py 的 quantized 配置加载。
+
+需要的模型和校准数据都来自实际运行：在本地图片目录上按服务的流程（表格检测、各档位的表格分类、
+有线 / 无线表格识别及其中的 RapidOCR）跑一遍 FP32 模型，记录期间创建的会话和每次推理的输入，
+因此下载到其他目录的模型（如 rapid_table_det）也能覆盖，预处理与线上完全一致。
+
+量化方式（onnxruntime.quantization，需要安装 onnx）：
+- dynamic: 只量化权重，激活在推理时动态量化，不需要校准数据。对 MatMul / LSTM 类模型收益明显，
+  卷积为主的模型（表格线检测、文字检测）会转成 ConvInteger，在部分 CPU 上反而更慢，可用 --op-types 限定
+- static: 先做形状推断等预处理，再用记录的输入校准激活范围，生成 QDQ 格式的模型，卷积模型通常用这种方式
+
+结果写入 ort_config.QUANTIZED_DIR（<原模型名>.int8.onnx），manifest.json 记录来源模型、量化参数和校准样本数。
+重新量化会清除该模型的 accepted 标记，需再用 benchmarks/eval_quantized.py 对比精度与耗时后确认。
+
+用法:
+    python quantize_models.py --calib-dir calib_images/ --mode static
+    python quantize_models.py --calib-dir calib_images/ --mode dynamic --models rapidocr table_cls
+"""
+import argparse
+import contextlib
+import glob
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import cv2
+import numpy as np
+import onnxruntime
+
+import ort_config
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tiff")
+
+
+@contextlib.contextmanager
+def record_inputs(max_samples):
+    """
+    with 块内各会话每次 run 的输入按模型文件记录到返回的字典（路径 -> [feeds]），每个模型最多 max_samples 份。
+    """
+    records = {}
+    session_cls = onnxruntime.InferenceSession
+    original_run = session_cls.run
+
+    def run(self, output_names, input_feed, run_options=None):
+        # 从内存加载的模型没有路径，不记录
+        if self._model_path:
+            feeds = records.setdefault(os.path.abspath(self._model_path), [])
+            if len(feeds) < max_samples:
+                feeds.append({k: np.array(v, copy=True) for k, v in input_feed.items()})
+        return original_run(self, output_names, input_feed, run_options)
+
+    session_cls.run = run
+    try:
+        yield records
+    finally:
+        session_cls.run = original_run
+
+
+def collect_calibration(images, max_samples):
+    """
+    用 FP32 模型按服务的流程处理 images，返回 (模型信息, 记录的输入)：
+    模型信息为 ort_config.loaded_models() 的格式，记录的输入为 原模型路径 -> [feeds]。
+    """
+    # 校准必须用原模型；版式缓存命中时会跳过表格线检测，这里关闭
+    os.environ["ORT_QUANTIZED"] = "0"
+    os.environ["LAYOUT_CACHE_SIZE"] = "0"
+    from orientation_correction import ImageOrientationCorrector
+    from profiles import PROFILES
+    from table_ocr import TableOCR
+
+    orientation_corrector = ImageOrientationCorrector(output_dir=None)
+    table_ocr = TableOCR(preload_profiles=PROFILES)
+    with record_inputs(max_samples) as records:
+        for i, img_path in enumerate(images):
+            img = cv2.imread(img_path)
+            if img is None:
+                print(f"跳过无法读取的图片: {img_path}")
+                continue
+            tables, _ = orientation_corrector.extract_tables(img)
+            for table in tables or [img]:
+                # 每张表格都经过全部分类模型和两种表格识别引擎，校准数据覆盖所有模型
+                for table_cls in table_ocr.classifiers.values():
+                    table_cls(table)
+                table_ocr.wired_engine(table, version="v2")
+                table_ocr.lineless_engine(table)
+            print(f"[{i + 1}/{len(images)}] {os.path.basename(img_path)}: 表格 {len(tables)} 个")
+    return ort_config.loaded_models(), records
+
+
+def quantize_model(source, target, mode, feeds=None, per_channel=False, op_types=None,
+                   calibrate_method="MinMax"):
+    from onnxruntime.quantization import (
+        CalibrationDataReader, CalibrationMethod, QuantFormat, QuantType, quantize_dynamic, quantize_static,
+    )
+
+    if mode == "dynamic":
+        quantize_dynamic(source, target, per_channel=per_channel, weight_type=QuantType.QInt8,
+                         op_types_to_quantize=op_types)
+        return
+
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    class RecordedDataReader(CalibrationDataReader):
+        # 按顺序返回记录的输入
+        def __init__(self, feeds):
+            self._iter = iter(feeds)
+
+        def get_next(self):
+            return next(self._iter, None)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        prepared = os.path.join(work_dir, "prepared.onnx")
+        try:
+            quant_pre_process(source, prepared)
+        except Exception as e:
+            print(f"  预处理失败（{type(e).__name__}: {e}），直接量化原模型")
+            shutil.copyfile(source, prepared)
+        quantize_static(
+            prepared, target, RecordedDataReader(feeds), quant_format=QuantFormat.QDQ, per_channel=per_channel,
+            activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8, op_types_to_quantize=op_types,
+            calibrate_method=getattr(CalibrationMethod, calibrate_method),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成 INT8 量化模型")
+    parser.add_argument("--calib-dir", required=True, help="校准图片目录，应与线上图片相似")
+    parser.add_argument("--mode", choices=["dynamic", "static"], default="static")
+    parser.add_argument("--models", nargs="+", choices=list(ort_config.MODEL_NAMES),
+                        help="只量化这些模型，默认全部")
+    parser.add_argument("--samples", type=int, default=32, help="每个模型最多使用的校准输入数")
+    parser.add_argument("--per-channel", action="store_true", help="按通道量化权重，精度更高")
+    parser.add_argument("--op-types", nargs="+", help="只量化这些算子类型，如 MatMul Conv")
+    parser.add_argument("--calibrate-method", choices=["MinMax", "Entropy", "Percentile"], default="MinMax")
+    args = parser.parse_args()
+
+    images = sorted(p for p in glob.glob(os.path.join(args.calib_dir, "*"))
+                    if p.lower().endswith(IMAGE_EXTENSIONS))
+    if not images:
+        parser.error(f"{args.calib_dir} 中没有图片")
+    try:
+        import onnxruntime.quantization  # noqa: F401
+    except ImportError as e:
+        parser.error(f"量化需要 onnx 包（pip install onnx）: {e}")
+
+    models, records = collect_calibration(images, args.samples)
+    os.makedirs(ort_config.QUANTIZED_DIR, exist_ok=True)
+    manifest = ort_config.load_manifest()
+    for source, info in sorted(models.items()):
+        if args.models and info["model"] not in args.models:
+            continue
+        target = ort_config.quantized_path(source)
+        feeds = records.get(source, [])
+        if args.mode == "static" and not feeds:
+            print(f"{os.path.basename(source)} ({info['model']}): 没有记录到输入，跳过")
+            continue
+        print(f"{os.path.basename(source)} ({info['model']}): {args.mode} 量化，校准输入 {len(feeds)} 份")
+        s = time.perf_counter()
+        try:
+            quantize_model(source, target, args.mode, feeds, args.per_channel, args.op_types,
+                           args.calibrate_method)
+        except Exception as e:
+            print(f"  量化失败: {type(e).__name__}: {e}")
+            continue
+        manifest[os.path.basename(target)] = {
+            "model": info["model"],
+            "source": source,
+            "source_size": os.path.getsize(source),
+            "mode": args.mode,
+            "per_channel": args.per_channel,
+            "op_types": args.op_types,
+            "calibrate_method": args.calibrate_method if args.mode == "static" else None,
+            "calibration": {"images": len(images), "samples": len(feeds)},
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "accepted": False,
+        }
+        print(f"  -> {target}（{os.path.getsize(source) / 2**20:.1f} MB -> "
+              f"{os.path.getsize(target) / 2**20:.1f} MB，用时 {time.perf_counter() - s:.1f} 秒）")
+
+    with open(os.path.join(ort_config.QUANTIZED_DIR, ort_config.MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=4)
+    print("量化完成，用 benchmarks/eval_quantized.py 对比精度与耗时后在 ort_config.json 中启用。")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# request_deadline.py
+"""
+请求的截止时间与协作式取消。
+
+处理流程在各阶段之间调用 check_deadline(stage)（PDF 逐页转换、方向矫正、表格分类、表格线识别、OCR、
+re_rec 补识别），截止时间已到或客户端已断开时抛出 RequestCancelled，由 server.py 返回已完成的部分结果。
+正在执行的单次模型推理不会被打断，取消在下一个检查点生效。
+
+截止时间取请求头 X-Request-Timeout（秒），不能超过环境变量 REQUEST_TIMEOUT（默认 240 秒，
+应小于 gunicorn 的 WORKER_TIMEOUT，保证在工作进程被强制结束前返回）。
+"""
+import contextlib
+import contextvars
+import math
+import os
+import socket
+import time
+
+DEFAULT_TIMEOUT = float(os.environ.get("REQUEST_TIMEOUT", 240))
+
+DEADLINE_EXCEEDED = "deadline_exceeded"
+CLIENT_DISCONNECTED = "client_disconnected"
+
+_current = contextvars.ContextVar("request_deadline", default=None)
+
+
+class RequestCancelled(BaseException):
+    """
+    与 asyncio.CancelledError 一样继承 BaseException，
+    不会被识别流程中 `except Exception` 的容错代码吞掉。
+    """
+
+    def __init__(self, reason, stage):
+        super().__init__(f"{reason} at {stage}")
+        self.reason = reason
+        self.stage = stage
+
+
+def socket_disconnected(sock):
+    """
+    请求体已读完后，连接上读到 EOF 说明客户端已关闭连接。只窥探不读取，不影响后续响应。
+    """
+    try:
+        return sock.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT) == b""
+    except (BlockingIOError, InterruptedError):
+        return False
+    except OSError:
+        return True
+
+
+class Deadline:
+    def __init__(self, timeout=None, sock=None):
+        """
+        - timeout: 剩余秒数，None 时使用 DEFAULT_TIMEOUT
+        - sock: 客户端连接的 socket，提供时检查点同时检测客户端是否断开
+        """
+        self.timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+        self.expires_at = time.monotonic() + self.timeout
+        self.sock = sock
+
+    @classmethod
+    def from_request(cls, headers, environ):
+        timeout = DEFAULT_TIMEOUT
+        value = headers.get("X-Request-Timeout")
+        if value:
+            try:
+                value = float(value)
+            except ValueError:
+                value = None
+            # nan / inf 无法比较截止时间，与无法解析的值一样使用 DEFAULT_TIMEOUT
+            if value is not None and math.isfinite(value):
+                timeout = min(max(value, 0.0), DEFAULT_TIMEOUT)
+        # werkzeug 开发服务器与 gunicorn 的 sync worker 在 environ 中提供连接的 socket
+        sock = environ.get("werkzeug.socket") or environ.get("gunicorn.socket")
+        return cls(timeout, sock)
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def check(self, stage):
+        if time.monotonic() >= self.expires_at:
+            raise RequestCancelled(DEADLINE_EXCEEDED, stage)
+        if self.sock is not None and socket_disconnected(self.sock):
+            raise RequestCancelled(CLIENT_DISCONNECTED, stage)
+
+
+@contextlib.contextmanager
+def use_deadline(deadline):
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def current_deadline():
+    return _current.get()
+
+
+def check_deadline(stage):
+    """
+    在当前请求的截止时间上检查，不在请求中（命令行、性能测试）时不做任何事。
+    """
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check(stage)
+
+
+def remaining_time(default=None):
+    deadline = _current.get()
+    return default if deadline is None else deadline.remaining()
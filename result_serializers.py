@@ -0,0 +1,138 @@
+# result_serializers.py
+"""
+表格识别结果的序列化。
+
+- JSON（默认）：结构与原来相同，安装了 orjson 时用它编码，否则回退到标准库 json；
+  响应按键排序、紧凑输出，与原来的 jsonify 相同，写文件时与原来相同缩进 4 格
+- MessagePack：需要 msgpack
+- Arrow / Parquet：需要 pyarrow，单元格按列存储，适合批量导出和下游分析
+
+服务按请求的 Accept 头在 RESPONSE_MIMETYPES 中协商，依赖未安装的格式不参与协商，
+客户端不指定或无法满足时返回 JSON。
+"""
+import json
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPE = "application/msgpack"
+ARROW_STREAM_MIMETYPE = "application/vnd.apache.arrow.stream"
+
+# 单元格字段，与 TableOCR.build_json 输出的顺序一致
+CELL_COLUMNS = ("col_start", "col_end", "row_start", "row_end", "position", "text")
+
+
+def _default(obj):
+    # numpy 标量与数组转为 Python 原生类型
+    if isinstance(obj, (np.generic, np.ndarray)):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_json(data, indent=False, sort_keys=False):
+    """
+    编码为 UTF-8 JSON 字节串，非 ASCII 字符不转义。
+    - indent: 为 True 时缩进 4 格输出，与原来 json.dump(indent=4) 写的文件相同。
+      orjson 只支持缩进 2 格，这里用标准库编码，只用于写文件，不在响应路径上
+    - sort_keys: 按键排序，响应用它保持与 jsonify 相同的键顺序
+    """
+    if indent:
+        return json.dumps(data, ensure_ascii=False, indent=4, sort_keys=sort_keys, default=_default).encode("utf-8")
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(data, default=_default, option=option)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys,
+                      default=_default).encode("utf-8")
+
+
+def dumps_msgpack(data):
+    import msgpack
+
+    return msgpack.packb(data, use_bin_type=True, default=_default)
+
+
+def cells_to_arrow(cells, extra_columns=None):
+    """
+    将 [{"col_start", ..., "position", "text"}, ...] 转为 pyarrow.Table。
+    extra_columns 为 {列名: 与 cells 等长的列表}，用于批量导出时记录来源图片等信息。
+    """
+    import pyarrow as pa
+
+    columns = {}
+    for name, values in (extra_columns or {}).items():
+        columns[name] = pa.array(values)
+    for name in ("col_start", "col_end", "row_start", "row_end"):
+        columns[name] = pa.array([cell[name] for cell in cells], type=pa.int32())
+    columns["position"] = pa.array([cell["position"] for cell in cells], type=pa.list_(pa.int32(), 8))
+    columns["text"] = pa.array([cell["text"] for cell in cells], type=pa.string())
+    return pa.table(columns)
+
+
+def dumps_arrow_stream(cells, metadata=None):
+    """
+    单元格编码为 Arrow IPC 流，metadata（如印章信息）以 JSON 形式放在 schema 元数据的 "result" 键中。
+    """
+    import pyarrow as pa
+
+    table = cells_to_arrow(cells)
+    if metadata is not None:
+        table = table.replace_schema_metadata({"result": dumps_json(metadata)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _module_available(name):
+    try:
+        __import__(name)
+    except ImportError:
+        return False
+    return True
+
+
+# 可协商的响应格式，依赖未安装的不参与；第一个为默认格式
+RESPONSE_MIMETYPES = [JSON_MIMETYPE]
+if _module_available("msgpack"):
+    RESPONSE_MIMETYPES += [MSGPACK_MIMETYPE, "application/x-msgpack"]
+if _module_available("pyarrow"):
+    RESPONSE_MIMETYPES.append(ARROW_STREAM_MIMETYPE)
+
+
+def write_results(results, path):
+    """
+    批量导出多张图片的识别结果，格式由扩展名决定：
+    .json / .msgpack 保存 {图片路径: {"tables": [...]}}，.parquet / .arrow / .feather 保存一张单元格表，
+    "image" 列为来源图片路径。
+    """
+    ext = path.rsplit(".", 1)[-1].lower()
+    if ext == "json":
+        content = dumps_json(results, indent=True)
+    elif ext == "msgpack":
+        content = dumps_msgpack(results)
+    elif ext in ("parquet", "arrow", "feather"):
+        cells, images = [], []
+        for image, data in results.items():
+            cells.extend(data["tables"])
+            images.extend([image] * len(data["tables"]))
+        table = cells_to_arrow(cells, {"image": images})
+        if ext == "parquet":
+            import pyarrow.parquet as pq
+
+            pq.write_table(table, path)
+        else:
+            import pyarrow.feather as feather
+
+            feather.write_feather(table, path)
+        return
+    else:
+        raise ValueError(f"不支持的导出格式: {path}，可选 .json / .msgpack / .parquet / .arrow / .feather")
+    with open(path, "wb") as f:
+        f.write(content)
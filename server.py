@@ -1,42 +1,189 @@
 import os
 import tempfile
 import logging
-import requests
 import json
-from flask import Flask, request, jsonify
+import threading
+import time
+from flask import Flask, Request, Response, g, request, jsonify
 from werkzeug.utils import secure_filename
 import uuid
 from PIL import Image
-import shutil
+import cv2
+import numpy as np
 
-from orientation_correction import ImageOrientationCorrector
-from table_ocr import TableOCR
-
-from pdf2image import convert_from_path
-
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s %(levelname)s %(name)s %(message)s',
-    handlers=[
-        logging.FileHandler("server.log"),
-        logging.StreamHandler()
-    ]
+from result_serializers import (
+    ARROW_STREAM_MIMETYPE, JSON_MIMETYPE, MSGPACK_MIMETYPE, RESPONSE_MIMETYPES,
+    dumps_arrow_stream, dumps_json, dumps_msgpack,
 )
+from image_archive import ArchiveWriter
+from log_config import current_trace_id, setup_logging, start_trace
+from memory_guard import MB, MemoryGuard
+from profiles import DEFAULT_PROFILE, PROFILES, get_profile
+from request_deadline import DEADLINE_EXCEEDED, Deadline, RequestCancelled, use_deadline
+from upload_ingest import UploadSpool
+
+# 识别模型（table_ocr / orientation_correction）、pdf2image、requests 均在首次使用时导入，
+# 缩短进程启动到端口可用的时间；模型由 ModelHolder 在后台预热
+
+# 配置日志：写入 server.log 与标准错误输出，格式化与写入在后台线程中进行，见 log_config.py
+setup_logging("server.log")
 logger = logging.getLogger(__name__)
 
+class UploadRequest(Request):
+    """
+    上传的文件在解析请求体时直接写入 UploadSpool：内容留在内存中并同时计算 sha256，
+    超过 upload_ingest.SPOOL_THRESHOLD 才转存到临时文件（werkzeug 默认超过 500KB 即写入磁盘）。
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return UploadSpool()
+
 # 初始化 Flask 应用
 app = Flask(__name__)
+app.request_class = UploadRequest
 
 # 配置上传文件的限制（最大 50MB）
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50 MB
 
+# 印章识别接口，可用环境变量 SEAL_API_URL 指向其他部署（如压测时的本地桩服务 benchmarks/stub_seal_server.py）
+SEAL_API_URL = os.environ.get("SEAL_API_URL", "http://h1337.iis.pub:24221/seal/recognize_seal")
+
 # 允许的文件扩展名
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'bmp', 'tiff', 'pdf'}
 
-# 定义预处理图像的保存目录
-PREPROCESSED_DIR = 'preprocessed_images'
-os.makedirs(PREPROCESSED_DIR, exist_ok=True)  # 确保目录存在
+# 预处理图像（方向矫正后的切图）在后台线程中归档，目录、抽样比例与保留策略见 image_archive.py
+archive = ArchiveWriter.from_env()
+
+class ModelHolder:
+    """
+    进程内共用的识别模型，首次使用时加载，也可在服务启动后由后台线程提前加载并预热。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self.orientation_corrector = None
+        self.table_ocr = None
+        self.error = None
+        self.load_elapse = None
+
+    @property
+    def ready(self):
+        return self.table_ocr is not None
+
+    def load(self):
+        """
+        加载模型，已加载时直接返回；多个线程同时调用时只加载一次。
+        """
+        if self.ready:
+            return self
+        with self._lock:
+            if not self.ready:
+                self._load()
+        return self
+
+    def reload(self):
+        """
+        重新加载模型（如模型文件或 ort_config 更新后），全部加载成功才替换当前模型，失败时保留原模型并抛出异常。
+        """
+        with self._lock:
+            self._load()
+        return self
+
+    def _load(self):
+        start = time.perf_counter()
+        try:
+            from orientation_correction import ImageOrientationCorrector
+            from table_ocr import TableOCR
+
+            orientation_corrector = ImageOrientationCorrector(output_dir=None)
+            # 各档位的表格分类模型都在这里加载，pre-fork 时由工作进程共享
+            table_ocr = TableOCR(profile=DEFAULT_PROFILE, preload_profiles=PROFILES)
+            self._warmup(orientation_corrector, table_ocr)
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            logger.error("加载识别模型失败: %s", self.error)
+            raise
+        self.orientation_corrector = orientation_corrector
+        self.table_ocr = table_ocr
+        self.error = None
+        self.load_elapse = time.perf_counter() - start
+        logger.info("识别模型已加载，用时 %.2f 秒。", self.load_elapse)
+
+    @staticmethod
+    def _warmup(orientation_corrector, table_ocr):
+        # 用空白图各跑一次推理，完成 onnxruntime 首次运行的内存分配，失败不影响服务
+        blank = np.full((256, 256, 3), 255, dtype=np.uint8)
+        warmups = [("table_det", orientation_corrector.table_det)]
+        warmups += [(f"table_cls[{model_type}]", table_cls) for model_type, table_cls in table_ocr.classifiers.items()]
+        for name, func in warmups:
+            try:
+                func(blank)
+            except Exception as e:
+                logger.warning("模型预热失败 %s: %s", name, e)
+
+    def start_warmup(self):
+        """
+        在后台线程中加载模型，重复调用无副作用。
+        """
+        if self._thread is None and not self.ready:
+            self._thread = threading.Thread(target=self._warmup_in_background, name="model-warmup", daemon=True)
+            self._thread.start()
+
+    def _warmup_in_background(self):
+        try:
+            self.load()
+        except Exception:
+            # 错误已记录在 self.error 中，由 /readyz 报告
+            pass
+
+models = ModelHolder()
+
+# 每个请求的内存统计，由 /metrics 返回；gunicorn.conf.py 据此在 RSS 超限时回收工作进程
+memory_guard = MemoryGuard.from_env()
+
+@app.before_request
+def begin_trace():
+    # 每个请求的日志带上同一个 trace_id，调用方可通过 X-Request-ID 传入
+    start_trace(request.headers.get("X-Request-ID"))
+    if request.endpoint == "process_image":
+        g.memory = memory_guard.begin()
+
+@app.after_request
+def add_trace_header(response):
+    response.headers["X-Request-ID"] = current_trace_id()
+    return response
+
+@app.teardown_request
+def record_memory(exc=None):
+    state = g.pop("memory", None)
+    if state is not None:
+        usage = memory_guard.end(state)
+        logger.info("请求内存: RSS %.1fMB 峰值 %.1fMB 增长 %+.1fMB",
+                    usage["rss"] / MB, usage["peak_rss"] / MB, usage["growth"] / MB)
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    # 存活探针：进程能响应即可
+    return jsonify({"status": "ok"}), 200
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    # 就绪探针：模型加载完成后才接收流量
+    if models.ready:
+        return jsonify({"status": "ready", "load_elapse": models.load_elapse}), 200
+    status = "error" if models.error else "loading"
+    return jsonify({"status": status, "error": models.error}), 503
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    # 本工作进程的内存统计（字节）、预处理图像归档的计数与有线表格版式缓存的命中率，
+    # pre-fork 模式下每次请求可能由不同的工作进程响应
+    result = {"memory": memory_guard.snapshot(), "archive": archive.snapshot()}
+    layout_cache = getattr(models.table_ocr and models.table_ocr.wired_engine, "layout_cache", None)
+    if layout_cache is not None:
+        result["layout_cache"] = layout_cache.snapshot()
+    return jsonify(result), 200
 
 # 检查文件扩展名是否在允许的扩展名列表中
 def allowed_file(filename):
@@ -49,31 +196,128 @@ def safe_get(d, key, default=None):
         return d.get(key, default)
     return default
 
-def resize_image(input_path, output_path, max_width=1200):
+def _imdecode(image, flags):
+    """
+    用 cv2.imdecode 解码图像文件或 UploadSpool 的内容，内存中的上传内容不复制，失败时返回 None。
+    """
+    if isinstance(image, (str, os.PathLike)):
+        return cv2.imdecode(np.fromfile(image, dtype=np.uint8), flags)
+    with image.getbuffer() as buf:
+        data = np.frombuffer(buf, dtype=np.uint8)
+        try:
+            return cv2.imdecode(data, flags)
+        finally:
+            # 释放对缓冲区的引用，getbuffer 退出时才能解除映射
+            del data
+
+def _decode_with_cv2(image, img, max_width):
+    """
+    8 位 RGB / 灰度的 JPEG 直接用 cv2.imdecode 解码为 BGR，需要缩小时按 1/2、1/4、1/8 在解码时缩小
+    （DCT 缩放，解码出的宽度不小于 max_width）。结果与 PIL draft + img_loader 逐像素相同，
+    省去 PIL 转数组的复制和 RGB -> BGR 转换。
+    RGB / 灰度的 PNG 宽度不到 max_width 的 2 倍（PIL 无法先按整数倍 reduce）时同样由 cv2 解码，
+    结果与 img_loader 逐像素相同，避免 PIL 全分辨率图像（每像素 4 字节）转数组、再转 BGR 的两次全尺寸复制；
+    更宽的 PNG 由 PIL 先 reduce 再转换，内存更少、也更快。其他格式返回 None，由 PIL 解码。
+    """
+    if img.mode not in ('RGB', 'L'):
+        return None
+    if img.format == 'PNG':
+        if img.size[0] >= 2 * max_width:
+            return None
+        return _imdecode(image, cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
+    if img.format != 'JPEG':
+        return None
+    # 与 PIL 一致，不按 EXIF 方向旋转
+    flags = cv2.IMREAD_COLOR
+    for scale, reduced in ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                           (2, cv2.IMREAD_REDUCED_COLOR_2)):
+        if img.size[0] >= max_width * scale:
+            flags = reduced
+            break
+    arr = _imdecode(image, flags | cv2.IMREAD_IGNORE_ORIENTATION)
+    if arr is not None:
+        # 对应 PIL 解码时的 reduce，先按整数倍缩小（整数倍的 INTER_AREA 是快速的块平均）
+        height, width = arr.shape[:2]
+        factor = width // max_width
+        if factor >= 2:
+            arr = cv2.resize(arr, (width // factor, height // factor), interpolation=cv2.INTER_AREA)
+    return arr
+
+def resize_image(image, max_width=1200):
     """
-    调整图像尺寸，使其宽度不超过max_width，同时保持纵横比。
+    解码图像，宽度超过 max_width 时按比例缩小，返回 (BGR uint8 数组, 是否缩小)。
+    上传内容直接在内存中解码，不经过磁盘。JPEG 由 cv2.imdecode 解码，解码时即按 DCT 缩放，
+    再用 INTER_AREA 缩放到目标尺寸，避免对几千万像素的手机照片做全分辨率解码和 LANCZOS 重采样；
+    不能按整数倍缩小的 PNG 也由 cv2 解码，见 _decode_with_cv2。
     参数:
-    - input_path: 输入图像的路径
-    - output_path: 输出图像的路径
-    - max_width: 图像的最大宽度（默认为1500像素）
+    - image: 图像文件路径、上传内容（UploadSpool），或已解码的 PIL.Image（如 PDF 转换出的页面）
+    - max_width: 图像的最大宽度（默认为1200像素）
+    其他图像由 PIL 解码：CMYK 等 JPEG 用 draft 缩放，其余先用 reduce 按整数倍缩小，
+    转为数组时不再复制全分辨率的像素。
     """
+    if isinstance(image, Image.Image):
+        src = image
+    else:
+        if not isinstance(image, (str, os.PathLike)):
+            image.seek(0)
+        # 只读取文件头，像素在需要时才解码
+        src = Image.open(image)
+    img = src
     try:
-        with Image.open(input_path) as img:
-            width, height = img.size
-            if width > max_width:
-                ratio = max_width / float(width)
-                new_size = (max_width, int(height * ratio))
-                # 使用 Image.LANCZOS 代替 Image.ANTIALIAS
-                img = img.resize(new_size, Image.LANCZOS)
-                img.save(output_path)
-                logger.info(f"已调整尺寸: {input_path} -> {output_path} 尺寸: {new_size}")
-                return output_path
-            else:
-                logger.info(f"无需调整尺寸: {input_path} 保持原尺寸: {img.size}")
-                return input_path  # 如果不需要调整，返回原路径
+        width, height = img.size
+        resized = width > max_width
+        if resized:
+            new_size = (max_width, int(height * max_width / float(width)))
+        arr = None if src is image else _decode_with_cv2(image, img, max_width)
+        if arr is None:
+            if resized:
+                if img.format == 'JPEG':
+                    img.draft('RGB', new_size)
+                factor = img.size[0] // max_width
+                if factor >= 2 and img.mode in ('RGB', 'RGBA', 'L', 'LA'):
+                    img = img.reduce(factor)
+            # 与识别模型读取图片文件时的通道与透明度处理保持一致
+            from rapid_table_det.utils.visuallize import img_loader
+            arr = img_loader(img)
+        if resized:
+            arr = cv2.resize(arr, new_size, interpolation=cv2.INTER_AREA)
+            logger.info("已调整尺寸: %s 尺寸: %s -> %s", image, (width, height), new_size)
+        else:
+            logger.info("无需调整尺寸: %s 保持原尺寸: %s", image, (width, height))
+        return arr, resized
     except Exception as e:
-        logger.error(f"调整图像尺寸时出错: {input_path} 错误信息: {e}")
-        return input_path  # 出错时返回原路径
+        logger.error("调整图像尺寸时出错: %s 错误信息: %s", image, e)
+        raise
+    finally:
+        # PIL 关闭图像时会一并关闭传入的文件对象，上传内容之后还要发送给印章识别接口，只关闭自己打开的文件
+        if isinstance(image, (str, os.PathLike)):
+            src.close()
+
+def encode_image(img, file_extension):
+    """
+    将 BGR 数组编码为指定格式的字节串，用于发送给印章识别接口。
+    """
+    ok, buf = cv2.imencode(f".{file_extension}", img)
+    if not ok:
+        raise ValueError(f"无法将图像编码为 {file_extension}")
+    return buf.tobytes()
+
+def make_result_response(response):
+    """
+    按请求的 Accept 头序列化识别结果，默认返回 JSON。
+    Arrow 格式的响应体为单元格表，其余字段（印章等）放在 schema 元数据中。
+    """
+    mimetype = request.accept_mimetypes.best_match(RESPONSE_MIMETYPES, default=JSON_MIMETYPE)
+    if mimetype == ARROW_STREAM_MIMETYPE:
+        # 单元格移出后，剩余字段整体作为元数据
+        cells = response["result"]["table"]["result"].pop("tables")
+        body = dumps_arrow_stream(cells, response)
+    elif mimetype == JSON_MIMETYPE:
+        body = dumps_json(response, sort_keys=True)
+    else:
+        body = dumps_msgpack(response)
+        mimetype = MSGPACK_MIMETYPE
+    return Response(body, status=200, mimetype=mimetype)
 
 @app.route('/process_image', methods=['POST'])
 def process_image():
@@ -102,20 +346,39 @@ def process_image():
         file_extension = original_filename.rsplit('.', 1)[1].lower() if '.' in original_filename else ''
         filename = f"{unique_id}.{file_extension}" if file_extension else unique_id
 
+        # 上传内容已在解析请求时读入 file.stream（UploadSpool），图片直接从内存解码，不再先保存到磁盘
+        upload = file.stream
+        logger.info("已接收文件: %s 大小: %d 字节 sha256: %s%s", original_filename, upload.size, upload.sha256,
+                    "" if upload.in_memory else " (已转存到临时文件)")
+
+        # 速度 / 精度档位：表单字段或查询参数 profile，默认为 TABLE_PROFILE，见 profiles.py
         try:
-            # 创建一个临时目录来存储上传的文件和处理结果
-            with tempfile.TemporaryDirectory() as temp_dir:
-                input_file_path = os.path.join(temp_dir, filename)
-                file.save(input_file_path)
-                logger.info(f"文件已保存到: {input_file_path}")
+            profile = get_profile(request.values.get("profile"))
+        except ValueError as e:
+            return jsonify({
+                "code": 40105,
+                "message": str(e),
+                "result": {}
+            }), 400
+        logger.info("档位: %s", profile["name"])
+
+        # 截止时间取请求头 X-Request-Timeout，各阶段之间检查，超时或客户端断开时返回已完成的部分
+        deadline = Deadline.from_request(request.headers, request.environ)
 
+        try:
+            # 临时目录只用于 PDF 转换（pdftoppm 按路径读取），图像在各阶段之间都在内存中传递
+            with tempfile.TemporaryDirectory() as temp_dir, use_deadline(deadline):
                 # 初始化用于收集所有表格和印章识别结果的列表
                 all_tables = []
                 all_seals = []
+                pages_total = 1
+                pages_completed = 0
+                cancelled = None
 
                 if file_extension == 'pdf':
                     # 调用印章识别接口（处理整个 PDF 文件）
-                    seal_recognition_result = call_seal_recognition_api(input_file_path)
+                    seal_recognition_result = call_seal_recognition_api(
+                        filename, content=upload, timeout=max(1.0, min(30, deadline.remaining())))
 
                     # 提取 seal_info，只取 stamp_list[0]
                     if seal_recognition_result and 'result' in seal_recognition_result:
@@ -129,72 +392,84 @@ def process_image():
 
                     all_seals = seal_info  # 对于 PDF 文件，seal 为单个对象
 
-                    # 将 PDF 转换为图像
-                    try:
-                        logger.info("正在将 PDF 转换为图像...")
-                        images = convert_from_path(input_file_path)
-                        logger.info(f"PDF 已转换为 {len(images)} 张图像。")
-                    except Exception as e:
-                        logger.error(f"转换 PDF 为图像时出错: {e}")
-                        return jsonify({
-                            "code": 40103,
-                            "message": f"Error converting PDF to images: {str(e)}",
-                            "result": {}
-                        }), 40103
-
-                    for page_number, image in enumerate(images, start=1):
-                        # 将每一页保存为图像文件
-                        page_image_path = os.path.join(temp_dir, f"page_{page_number}.png")
-                        image.save(page_image_path, 'PNG')
-                        logger.info(f"已保存第 {page_number} 页为: {page_image_path}")
-
-                        # 调整每页图像的尺寸
-                        resized_page_image_path = os.path.join(temp_dir, f"resized_page_{page_number}.png")
-                        resized_page_path = resize_image(page_image_path, resized_page_image_path, max_width=1200)
-                        final_page_path = resized_page_path if resized_page_path != page_image_path else page_image_path
-
-                        # 初始化方向矫正器，每页使用独立的输出目录
-                        orientation_corrector = ImageOrientationCorrector(output_dir=os.path.join(temp_dir, "outputs", f"page_{page_number}"))
-                        corrected_images, orientation_elapse = orientation_corrector.correct_orientation(final_page_path)
-                        logger.info(f"第 {page_number} 页的方向矫正完成，用时 {orientation_elapse} 秒。")
-                        logger.info(f"第 {page_number} 页的矫正后图像: {corrected_images}")
-
-                        if not corrected_images:
-                            logger.warning(f"第 {page_number} 页的方向矫正失败，跳过。")
-                            continue
-
-                        # 初始化 OCR 表格识别器
-                        table_ocr = TableOCR(model_type="yolox", output_dir=os.path.join(temp_dir, "ocr_outputs", f"page_{page_number}"))
+                    # 逐页将 PDF 转换为图像，超时或客户端断开时不再转换剩余的页
+                    from pdf2image import convert_from_path, pdfinfo_from_path
+                    from pdf2image.exceptions import PDFPopplerTimeoutError
 
-                        # 对每个矫正后的图像执行 OCR 识别
-                        for corrected_image in corrected_images:
-                            json_path, ocr_elapse = table_ocr.perform_ocr(corrected_image)
-                            logger.info(f"OCR 完成，用时 {ocr_elapse} 秒。")
-                            logger.info(f"OCR 输出已保存到: {json_path}")
-
-                            if not os.path.isfile(json_path):
-                                logger.error(f"OCR 失败，图像: {corrected_image}")
+                    # pdftoppm 只能按路径读取，PDF 在临时目录中写入一次，各页都从这里转换
+                    pdf_path = os.path.join(temp_dir, filename)
+                    with open(pdf_path, 'wb') as f, upload.getbuffer() as pdf_content:
+                        f.write(pdf_content)
+                    try:
+                        # 读取页数之前截止时间已到或客户端已断开时，同样返回（空的）部分结果
+                        deadline.check("rasterize")
+                        try:
+                            pages_total = pdfinfo_from_path(pdf_path, timeout=deadline.remaining())["Pages"]
+                            logger.info("PDF 共 %d 页。", pages_total)
+                        except PDFPopplerTimeoutError:
+                            raise RequestCancelled(DEADLINE_EXCEEDED, "rasterize")
+                        except Exception as e:
+                            logger.error("读取 PDF 信息时出错: %s", e)
+                            return jsonify({
+                                "code": 40103,
+                                "message": f"Error converting PDF to images: {str(e)}",
+                                "result": {}
+                            }), 40103
+
+                        for page_number in range(1, pages_total + 1):
+                            deadline.check("rasterize")
+                            try:
+                                image, = convert_from_path(pdf_path, first_page=page_number, last_page=page_number,
+                                                           timeout=deadline.remaining())
+                            except PDFPopplerTimeoutError:
+                                raise RequestCancelled(DEADLINE_EXCEEDED, "rasterize")
+                            except Exception as e:
+                                logger.error("转换 PDF 为图像时出错: %s", e)
+                                return jsonify({
+                                    "code": 40103,
+                                    "message": f"Error converting PDF to images: {str(e)}",
+                                    "result": {}
+                                }), 40103
+
+                            # 调整每页图像的尺寸，直接在内存中处理，不再落盘
+                            page_img, _ = resize_image(image, max_width=profile["max_width"])
+                            del image
+
+                            # 方向矫正，切出的表格留在内存中（BGR uint8 数组）直接交给识别
+                            deadline.check("orientation")
+                            corrected_images, orientation_elapse = models.load().orientation_corrector.extract_tables(
+                                page_img)
+                            del page_img
+                            logger.info("第 %d 页的方向矫正完成，用时 %s 秒。", page_number, orientation_elapse)
+                            logger.info("第 %d 页的矫正后图像: %s", page_number,
+                                        [img.shape for img in corrected_images])
+
+                            if not corrected_images:
+                                logger.warning("第 %d 页的方向矫正失败，跳过。", page_number)
+                                pages_completed += 1
                                 continue
 
-                            # 读取 JSON 文件内容
-                            with open(json_path, 'r', encoding='utf-8') as json_file:
-                                ocr_data = json.load(json_file)
+                            # 对每个矫正后的图像执行 OCR 识别，perform_ocr 内部在各阶段之间检查截止时间
+                            for corrected_image in corrected_images:
+                                ocr_data, ocr_elapse = models.table_ocr.perform_ocr(corrected_image, profile=profile["name"])
+                                logger.info("OCR 完成，用时 %s 秒。", ocr_elapse)
 
-                            if "tables" in ocr_data:
-                                all_tables.extend(ocr_data["tables"])
+                                if "tables" in ocr_data:
+                                    all_tables.extend(ocr_data["tables"])
+                            pages_completed += 1
+                    except RequestCancelled as e:
+                        cancelled = e
 
                 else:
                     # 处理图像文件
 
-                    # 调整上传的图片尺寸
-                    resized_input_path = os.path.join(temp_dir, f"resized_{filename}")
-                    resized_path = resize_image(input_file_path, resized_input_path, max_width=1200)
+                    # 调整上传的图片尺寸，得到解码后的数组
+                    input_img, resized = resize_image(upload, max_width=profile["max_width"])
 
-                    # 如果调整后的路径与原路径不同，使用调整后的路径
-                    final_input_path = resized_path if resized_path != input_file_path else input_file_path
-
-                    # 调用印章识别接口（在方向矫正之前）
-                    seal_recognition_result = call_seal_recognition_api(final_input_path)
+                    # 调用印章识别接口（在方向矫正之前），缩小过的图片重新编码后发送，否则直接发送上传的内容
+                    seal_content = encode_image(input_img, file_extension) if resized else upload
+                    seal_recognition_result = call_seal_recognition_api(
+                        filename, content=seal_content, timeout=max(1.0, min(30, deadline.remaining())))
 
                     # 提取 seal_info，只取 stamp_list[0]
                     if seal_recognition_result and 'result' in seal_recognition_result:
@@ -208,44 +483,35 @@ def process_image():
 
                     all_seals = seal_info  # 对于图像文件，seal 为单个对象
 
-                    # 初始化方向矫正器
-                    orientation_corrector = ImageOrientationCorrector(output_dir=os.path.join(temp_dir, "outputs"))
-                    corrected_images, orientation_elapse = orientation_corrector.correct_orientation(final_input_path)
-                    logger.info(f"方向矫正完成，用时 {orientation_elapse} 秒。")
-                    logger.info(f"矫正后图像: {corrected_images}")
-
-                    if not corrected_images:
-                        return jsonify({
-                            "code": 430,
-                            "message": "Orientation correction failed",
-                            "result": {}
-                        }), 200
-                    # 将每个矫正后的图像保存到 preprocessed_images 目录
-                    for corrected_image in corrected_images:
-                        # 生成唯一文件名以避免冲突
-                        preprocessed_filename = f"image_{unique_id}_{os.path.basename(corrected_image)}"
-                        permanent_corrected_path = os.path.join(PREPROCESSED_DIR, preprocessed_filename)
-                        shutil.copy(corrected_image, permanent_corrected_path)
-                        logger.info(f"预处理后的图像已保存到: {permanent_corrected_path}")
-
-                    # 初始化 OCR 表格识别器
-                    table_ocr = TableOCR(model_type="yolox", output_dir=os.path.join(temp_dir, "ocr_outputs"))
-
-                    # 对每个矫正后的图像执行 OCR 识别
-                    for corrected_image in corrected_images:
-                        json_path, ocr_elapse = table_ocr.perform_ocr(corrected_image)
-                        logger.info(f"OCR 完成，用时 {ocr_elapse} 秒。")
-                        logger.info(f"OCR 输出已保存到: {json_path}")
-                        if not os.path.isfile(json_path):
-                            logger.error(f"OCR 失败，图像: {corrected_image}")
-                            continue
-
-                        # 读取 JSON 文件内容
-                        with open(json_path, 'r', encoding='utf-8') as json_file:
-                            ocr_data = json.load(json_file)
-
-                        if "tables" in ocr_data:
-                            all_tables.extend(ocr_data["tables"])
+                    try:
+                        # 方向矫正
+                        deadline.check("orientation")
+                        corrected_images, orientation_elapse = models.load().orientation_corrector.extract_tables(
+                            input_img)
+                        del input_img
+                        logger.info("方向矫正完成，用时 %s 秒。", orientation_elapse)
+                        logger.info("矫正后图像: %s", [img.shape for img in corrected_images])
+
+                        if not corrected_images:
+                            return jsonify({
+                                "code": 430,
+                                "message": "Orientation correction failed",
+                                "result": {}
+                            }), 200
+                        # 矫正后的图像交给后台线程编码并归档，文件名加上请求的唯一 ID 以避免冲突
+                        archived = archive.submit_images(corrected_images, unique_id, prefix=f"image_{unique_id}_")
+                        logger.info("预处理后的图像已提交归档: %d/%d", archived, len(corrected_images))
+
+                        # 对每个矫正后的图像执行 OCR 识别，已完成的表格在取消时仍会返回
+                        for corrected_image in corrected_images:
+                            ocr_data, ocr_elapse = models.table_ocr.perform_ocr(corrected_image, profile=profile["name"])
+                            logger.info("OCR 完成，用时 %s 秒。", ocr_elapse)
+
+                            if "tables" in ocr_data:
+                                all_tables.extend(ocr_data["tables"])
+                        pages_completed = 1
+                    except RequestCancelled as e:
+                        cancelled = e
 
                 # 构建响应的 JSON 结构
                 response = {
@@ -258,14 +524,25 @@ def process_image():
                                 "tables": all_tables
                             }
                         },
-                        "seal": all_seals  # 'seal' 为列表或单个对象
+                        "seal": all_seals,  # 'seal' 为列表或单个对象
+                        "partial": cancelled is not None,
+                        "pages_completed": pages_completed,
+                        "pages_total": pages_total,
+                        "profile": profile["name"],
                     }
                 }
+                if cancelled is not None:
+                    # 未完成的页被取消，返回已完成页的结果
+                    logger.warning("请求在 %s 阶段取消（%s），已完成 %d/%d 页。",
+                                   cancelled.stage, cancelled.reason, pages_completed, pages_total)
+                    response["message"] = "partial"
+                    response["result"]["partial_reason"] = cancelled.reason
+                    response["result"]["cancelled_stage"] = cancelled.stage
 
-                return jsonify(response), 200
+                return make_result_response(response)
 
         except Exception as e:
-            logger.error(f"处理图像时出错: {e}")
+            logger.exception("处理图像时出错: %s", e)
             return jsonify({
                 "code": 500,
                 "message": f"Internal server error: {str(e)}",
@@ -278,32 +555,49 @@ def process_image():
             "result": {}
         }), 40103
 
-def call_seal_recognition_api(file_path):
+def call_seal_recognition_api(file_path, content=None, timeout=30):
     """
     调用印章识别检测接口，并返回 seal_data。
     对于 PDF 文件，直接发送 PDF；对于图像文件，发送图像。
+    content 不为 None 时发送该内容（字节串，或 UploadSpool 等文件对象），不读取 file_path，只取其文件名。
+    timeout 为请求超时（秒），调用方按请求剩余的处理时间传入。
     """
-    seal_api_url = 'http://h1337.iis.pub:24221/seal/recognize_seal'
+    import requests
+
+    seal_api_url = SEAL_API_URL
     try:
-        with open(file_path, 'rb') as file:
-            files = {'image': file}
-            logger.info(f"发送文件到印章识别 API: {seal_api_url}")
-            response = requests.post(seal_api_url, files=files, timeout=30)  # 设置超时时间为30秒
+        if content is None:
+            with open(file_path, 'rb') as file:
+                content = file.read()
+        elif hasattr(content, 'seek'):
+            content.seek(0)
+        files = {'image': (os.path.basename(file_path), content)}
+        logger.info("发送文件到印章识别 API: %s", seal_api_url)
+        response = requests.post(seal_api_url, files=files, timeout=timeout)
 
         if response.status_code == 200:
             seal_data = response.json()
-            logger.info(f"印章识别 API 响应: {seal_data}")
+            # 完整响应只在抽样的请求中输出
+            logger.info("印章识别 API 响应", extra={"payload": seal_data})
             return seal_data  # 假设 seal_data 是一个字典
         else:
-            logger.error(f"印章识别 API 返回状态码 {response.status_code}")
+            logger.error("印章识别 API 返回状态码 %s", response.status_code)
             return {"error": f"Seal recognition API returned status code {response.status_code}"}
     except requests.exceptions.RequestException as e:
-        logger.error(f"调用印章识别 API 时出错: {e}")
+        logger.error("调用印章识别 API 时出错: %s", e)
         return {"error": f"Error calling seal recognition API: {str(e)}"}
     except json.JSONDecodeError as e:
-        logger.error(f"解析印章识别 API 响应时出错: {e}")
+        logger.error("解析印章识别 API 响应时出错: %s", e)
         return {"error": "Invalid JSON response from seal recognition API"}
 
+def main(host='0.0.0.0', port=13006):
+    from werkzeug.serving import make_server
+
+    # 先监听端口，存活探针即可响应，再在后台加载识别模型
+    http_server = make_server(host, port, app, threaded=True)
+    models.start_warmup()
+    http_server.serve_forever()
+
 if __name__ == '__main__':
     # 运行 Flask 应用，监听所有可用 IP，端口号 13006
-    app.run(host='0.0.0.0', port=13006)
+    main()
@@ -2,6 +2,7 @@ import os
 
 from lineless_table_rec import LinelessTableRecognition
 from lineless_table_rec.utils_table_recover import format_html, plot_rec_box_with_logic_info, plot_rec_box
+from rapid_table_det.utils.visuallize import img_loader
 from rapidocr_onnxruntime import RapidOCR
 from table_cls import TableCls
 from wired_table_rec import WiredTableRecognition
@@ -11,14 +12,16 @@ wired_engine = WiredTableRecognition()
 # 默认小yolo模型(0.1s)，可切换为精度更高yolox(0.25s),更快的qanything(0.07s)模型
 table_cls = TableCls(model_type="yolox")  # TableCls(model_type="yolox"),TableCls(model_type="q")
 img_path = f'付款申请单-3.jpg'
+# 只解码一次，分类与表格识别共用同一个 BGR 数组
+img = img_loader(img_path)
 
-cls, elasp = table_cls(img_path)
+cls, elasp = table_cls(img)
 if cls == 'wired':
     table_engine = wired_engine
 else:
     table_engine = lineless_engine
 
-html, elasp, polygons, logic_points, ocr_res = table_engine(img_path)
+html, elasp, polygons, logic_points, ocr_res = table_engine(img)
 #print(f"elasp: {elasp}")
 print(html)
 print(polygons)
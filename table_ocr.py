@@ -1,72 +1,202 @@
 # table_ocr.py
 import argparse
+import logging
 import os
-import json
-from bs4 import BeautifulSoup  # 用于解析HTML
+import threading
+import time
+import cv2
 from lineless_table_rec import LinelessTableRecognition
-from lineless_table_rec.utils_table_recover import format_html, plot_rec_box_with_logic_info, plot_rec_box
+from log_config import setup_logging
+from ort_config import configured_sessions
+from profiles import PROFILES, get_profile
+from rapid_table_det.utils.visuallize import img_loader
+from request_deadline import check_deadline
+from result_serializers import dumps_json, write_results
 from table_cls import TableCls
+from table_result import TableCells
 from wired_table_rec import WiredTableRecognition
 
+logger = logging.getLogger(__name__)
+
+
+def build_json(ocr_result):
+    """
+    根据从process_ocr_result函数获得的OCR结果构建所需的JSON结构。
+    有线表格引擎返回的是 TableCells，直接按列批量转换。
+    """
+    if isinstance(ocr_result, TableCells):
+        return ocr_result.to_json()
+
+    json_cells = []
+    for entry in ocr_result:
+        # 提取t_logic_box数据
+        row_start, row_end, col_start, col_end = entry['t_logic_box']
+
+        # 合并't_ocr_res'中所有的文本
+        if entry['t_ocr_res']:
+            text = " ".join([res[1] for res in entry['t_ocr_res']])
+        else:
+            text = ""
+
+        # 提取位置
+        x1, y1, x2, y2 = entry['t_box']
+        # position 格式: [x1, y1, x2, y1, x2, y2, x1, y2]
+        position = [int(x1), int(y1), int(x2), int(y1), int(x2), int(y2), int(x1), int(y2)]
+
+        # 构建单元格数据
+        cell_data = {
+            "col_start": int(col_start),
+            "col_end": int(col_end),
+            "row_start": int(row_start),
+            "row_end": int(row_end),
+            "position": position,
+            "text": text
+        }
+        json_cells.append(cell_data)
+
+    return {"tables": json_cells}
+
+
 class TableOCR:
-    def __init__(self, model_type="yolox", output_dir="outputs"):
-        self.lineless_engine = LinelessTableRecognition()
-        self.wired_engine = WiredTableRecognition()
-        self.table_cls = TableCls(model_type=model_type)
+    def __init__(self, model_type=None, output_dir="outputs",
+                 save_html=False, save_visualization=False, save_json=False,
+                 profile=None, preload_profiles=()):
+        """
+        参数:
+        - model_type: 表格分类模型类型，指定时覆盖各档位的 cls_model
+        - output_dir: 中间产物（HTML、可视化图片、JSON）的输出目录
+        - save_html / save_visualization / save_json: 是否输出对应的中间产物，默认均不输出，
+          识别结果直接由 perform_ocr 返回
+        - profile: 默认的速度 / 精度档位，见 profiles.py，默认取 profiles.DEFAULT_PROFILE
+        - preload_profiles: 构造时一并加载这些档位的表格分类模型，其余档位在首次使用时加载
+        """
+        self.profile = get_profile(profile)["name"]
+        self.model_type = model_type
+        # 各模型的线程数等会话参数见 ort_config.py
+        with configured_sessions("lineless_table_rec"):
+            self.lineless_engine = LinelessTableRecognition()
+        with configured_sessions("wired_table_rec"):
+            self.wired_engine = WiredTableRecognition()
+        # 表格分类模型按类型加载一次，各档位共用
+        self.classifiers = {}
+        self._classifiers_lock = threading.Lock()
+        for name in preload_profiles:
+            self.classifier(name)
+        self.table_cls = self.classifier(self.profile)
         self.output_dir = output_dir
-        os.makedirs(self.output_dir, exist_ok=True)
+        self.save_html = save_html
+        self.save_visualization = save_visualization
+        self.save_json = save_json
+        if save_html or save_visualization or save_json:
+            os.makedirs(self.output_dir, exist_ok=True)
+
+    def classifier(self, profile=None):
+        """
+        返回档位对应的表格分类模型，未加载时加载。
+        """
+        model_type = self.model_type or get_profile(profile or self.profile)["cls_model"]
+        table_cls = self.classifiers.get(model_type)
+        if table_cls is None:
+            with self._classifiers_lock:
+                table_cls = self.classifiers.get(model_type)
+                if table_cls is None:
+                    with configured_sessions("table_cls"):
+                        table_cls = TableCls(model_type=model_type)
+                    self.classifiers[model_type] = table_cls
+        return table_cls
 
-    def perform_ocr(self, img_path):
-        cls, elasp_cls = self.table_cls(img_path)
+    def perform_ocr(self, img, name=None, profile=None):
+        """
+        对单张表格图片执行识别，返回 (json_data, elapse)。
+        json_data 为 {"tables": [...]} 结构，elapse 为分类与表格识别的总耗时。
+        - img: 图片路径，或 BGR uint8 数组（如 ImageOrientationCorrector.extract_tables 的输出）。
+          路径只在这里解码一次，分类与表格识别共用同一个数组，各模型都不会修改它
+        - name: 中间产物的文件名前缀，默认取图片文件名，传入数组时为 "table"
+        - profile: 速度 / 精度档位，默认为构造时指定的档位，见 profiles.py
+        中间产物按开关写入 output_dir，同一目录下处理多张图片时应使用不同的 name。
+        在服务的请求中调用时，各阶段之间检查请求的截止时间，见 request_deadline.py。
+        """
+        img_path = img if isinstance(img, (str, os.PathLike)) else None
+        file_name = name or (os.path.splitext(os.path.basename(img_path))[0] if img_path else "table")
+        img = img_loader(img)
+        profile = get_profile(profile or self.profile)
+
+        check_deadline("classification")
+        cls, elasp_cls = self.classifier(profile["name"])(img)
         if cls == 'wired':
             table_engine = self.wired_engine
         else:
             table_engine = self.lineless_engine
 
+        # 档位指定了 OCR 参数时先用所选引擎自带的 RapidOCR 识别文字，结果交给该引擎，两种引擎使用相同的参数；
+        # 有线表格使用单元格直接识别（cell_direct）时不做整页 OCR，由引擎按单元格识别
+        ocr_result, elasp_ocr = None, 0.0
+        cell_direct = cls == 'wired' and profile["engine"].get("cell_direct", False)
+        if profile["ocr"] and not cell_direct:
+            check_deadline("ocr")
+            s = time.perf_counter()
+            ocr_result, _ = table_engine.ocr(img, **profile["ocr"])
+            ocr_result = ocr_result or []
+            elasp_ocr = time.perf_counter() - s
+
         # 执行表格识别
-        html, elasp_engine, polygons, logic_points, ocr_res, dict = table_engine(img_path, version="v2", enhance_box_line=True, rotated_fix=True)
-        print(f"Engine elapsed time: {elasp_engine} seconds")
-        print("HTML Output:")
-        print(html)
-        print(dict)
-        # 格式化HTML
-        complete_html = format_html(html)
-        html_path = os.path.join(self.output_dir, "table.html")
-        with open(html_path, "w", encoding="utf-8") as file:
-            file.write(complete_html)
-
-        # 可视化表格识别框和逻辑行列信息
-        rec_box_path = os.path.join(self.output_dir, "table_rec_box.jpg")
-        plot_rec_box_with_logic_info(
-            img_path, rec_box_path, logic_points, polygons
+        check_deadline("table_rec")
+        html, elasp_engine, polygons, logic_points, ocr_res, dict = table_engine(
+            img, ocr_result=ocr_result, version="v2", **profile["engine"]
         )
-        print(f"Recognition box image saved to: {rec_box_path}")
+        logger.debug("Engine elapsed time: %s seconds, profile: %s", elasp_engine, profile["name"])
+        # 完整的 HTML 只在抽样的请求中输出，见 log_config.py
+        logger.info("表格识别 HTML", extra={"payload": html})
 
-        # 可视化 OCR 识别框
-        ocr_box_path = os.path.join(self.output_dir, "ocr_box.jpg")
-        plot_rec_box(img_path, ocr_box_path, ocr_res)
-        print(f"OCR box image saved to: {ocr_box_path}")
+        if self.save_html:
+            from lineless_table_rec.utils_table_recover import format_html
 
-        # 解析HTML以提取单元格文本
-        cells_text = self.extract_text_from_html(complete_html)
+            # 格式化HTML
+            complete_html = format_html(html)
+            html_path = os.path.join(self.output_dir, f"{file_name}-table.html")
+            with open(html_path, "w", encoding="utf-8") as file:
+                file.write(complete_html)
+            logger.info("HTML output saved to: %s", html_path)
+
+        if self.save_visualization:
+            from lineless_table_rec.utils_table_recover import plot_rec_box, plot_rec_box_with_logic_info
+
+            # 绘图函数按路径读取原图，传入数组时先写出一份
+            if img_path is None:
+                img_path = os.path.join(self.output_dir, f"{file_name}.png")
+                cv2.imwrite(img_path, img)
+
+            # 可视化表格识别框和逻辑行列信息
+            rec_box_path = os.path.join(self.output_dir, f"{file_name}-table_rec_box.jpg")
+            plot_rec_box_with_logic_info(
+                img_path, rec_box_path, logic_points, polygons
+            )
+            logger.info("Recognition box image saved to: %s", rec_box_path)
+
+            # 可视化 OCR 识别框
+            ocr_box_path = os.path.join(self.output_dir, f"{file_name}-ocr_box.jpg")
+            plot_rec_box(img_path, ocr_box_path, ocr_res)
+            logger.info("OCR box image saved to: %s", ocr_box_path)
 
         # 构建JSON数据
         # json_data = self.build_json(logic_points, polygons, cells_text, dict)
         json_data = self.build_json(dict)
 
-        # 保存JSON文件
-        json_path = os.path.join(self.output_dir, "table.json")
-        with open(json_path, "w", encoding="utf-8") as json_file:
-            json.dump(json_data, json_file, ensure_ascii=False, indent=4)
-        print(f"JSON output saved to: {json_path}")
+        if self.save_json:
+            json_path = os.path.join(self.output_dir, f"{file_name}-table.json")
+            with open(json_path, "wb") as json_file:
+                json_file.write(dumps_json(json_data, indent=True))
+            logger.info("JSON output saved to: %s", json_path)
 
-        return json_path, elasp_cls
+        return json_data, elasp_cls + elasp_ocr + elasp_engine
 
     def extract_text_from_html(self, html_content):
         """
         解析HTML内容，提取每个单元格的文本。
         默认HTML中的单元格按顺序排列，与logic_points和polygons对应。
         """
+        from bs4 import BeautifulSoup  # 用于解析HTML，仅在需要时导入
+
         soup = BeautifulSoup(html_content, 'html.parser')
         cells = soup.find_all(['td', 'th'])  # 查找所有单元格
         cells_text = [cell.get_text(separator='\n', strip=True) for cell in cells]
@@ -103,71 +233,58 @@ class TableOCR:
 
     def build_json(self, ocr_result):
         """
-        根据从process_ocr_result函数获得的OCR结果构建所需的JSON结构。
+        见模块级的 build_json。
         """
-        json_cells = []
-        for entry in ocr_result:
-            # 提取t_logic_box数据
-            row_start, row_end, col_start, col_end = entry['t_logic_box']
-
-            # 合并't_ocr_res'中所有的文本
-            if entry['t_ocr_res']:
-                text = " ".join([res[1] for res in entry['t_ocr_res']])
-            else:
-                text = ""
-
-            # 提取位置
-            x1, y1, x2, y2 = entry['t_box']
-            # position 格式: [x1, y1, x2, y1, x2, y2, x1, y2]
-            position = [int(x1), int(y1), int(x2), int(y1), int(x2), int(y2), int(x1), int(y2)]
-
-            # 构建单元格数据
-            cell_data = {
-                "col_start": int(col_start),
-                "col_end": int(col_end),
-                "row_start": int(row_start),
-                "row_end": int(row_end),
-                "position": position,
-                "text": text
-            }
-            json_cells.append(cell_data)
-
-        return {"tables": json_cells}
+        return build_json(ocr_result)
 
 
 
 def main():
     """
-    主函数用于测试 TableOCR 类。
-    在代码中直接定义待识别的图片路径、模型类型和输出目录。
+    批量识别表格图片，可将全部结果导出为 JSON / MessagePack / Parquet / Arrow。
+    例如:
+        python table_ocr.py a.jpg b.jpg --export results.parquet
     """
-    # 定义参数
-    image_path = "preprocessed_images/image1.jpg"  # 替换为您的图像文件路径
-    model_type = "yolox"  # 可选: "yolox", 其他模型类型视情况而定
-    output_dir = "outputs"  # 输出文件夹路径
+    parser = argparse.ArgumentParser(description="TableOCR 批量识别")
+    parser.add_argument("images", nargs="*", default=["preprocessed_images/image1.jpg"], help="待识别的图像路径")
+    parser.add_argument("--profile", choices=list(PROFILES), help="速度 / 精度档位，默认取环境变量 TABLE_PROFILE 或 accurate")
+    parser.add_argument("--model-type", help="表格分类模型类型，指定时覆盖档位的设置")
+    parser.add_argument("--output-dir", default="outputs", help="中间产物的输出目录")
+    parser.add_argument("--no-artifacts", action="store_true", help="不输出 HTML、可视化图片和单张 JSON")
+    parser.add_argument("--export", help="汇总结果的导出路径，格式由扩展名决定（.json/.msgpack/.parquet/.arrow/.feather）")
+    args = parser.parse_args()
+    # 中间产物的保存路径等日志输出到标准错误，payload 记录不在命令行输出
+    setup_logging(log_file=None)
 
     # 打印参数信息
     print("=== TableOCR 测试开始 ===")
-    print(f"待识别的图像路径: {image_path}")
-    print(f"使用的模型类型: {model_type}")
-    print(f"输出目录: {output_dir}")
+    print(f"待识别的图像: {args.images}")
+    print(f"档位: {get_profile(args.profile)['name']}")
+    print(f"使用的模型类型: {args.model_type or get_profile(args.profile)['cls_model']}")
+    print(f"输出目录: {args.output_dir}")
     print("==========================\n")
 
-    # 检查输入图像文件是否存在
-    if not os.path.isfile(image_path):
-        print(f"错误: 图像文件 '{image_path}' 不存在。请检查路径是否正确。")
-        return
-
-    # 创建 TableOCR 实例
-    table_ocr = TableOCR(model_type=model_type, output_dir=output_dir)
-
-    # 执行 OCR
-    try:
-        json_path, elapsed_time = table_ocr.perform_ocr(image_path)
-        print(f"\nOCR 处理完成，用时 {elapsed_time} 秒。")
-        print(f"JSON 输出路径: {json_path}")
-    except Exception as e:
-        print(f"在执行 OCR 时发生错误: {e}")
+    save = not args.no_artifacts
+    table_ocr = TableOCR(model_type=args.model_type, output_dir=args.output_dir,
+                         save_html=save, save_visualization=save, save_json=save, profile=args.profile)
+
+    results = {}
+    for image_path in args.images:
+        # 检查输入图像文件是否存在
+        if not os.path.isfile(image_path):
+            print(f"错误: 图像文件 '{image_path}' 不存在。请检查路径是否正确。")
+            continue
+        # 执行 OCR
+        try:
+            json_data, elapsed_time = table_ocr.perform_ocr(image_path)
+            print(f"{image_path}: OCR 处理完成，用时 {elapsed_time} 秒，识别到 {len(json_data['tables'])} 个单元格。")
+            results[image_path] = json_data
+        except Exception as e:
+            print(f"在执行 OCR 时发生错误: {image_path}: {e}")
+
+    if args.export and results:
+        write_results(results, args.export)
+        print(f"汇总结果已导出到: {args.export}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
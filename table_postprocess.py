@@ -0,0 +1,372 @@
+# table_postprocess.py
+"""
+有线表格识别的后处理工具。
+
+wired_table_rec 自带的 match_ocr_cell 对每个 OCR 框和每个单元格逐一比较，
+在上千单元格的大表上耗时很高。这里用网格索引先筛出空间上相交的候选对，
+再用 numpy 一次性计算包含率和 IoU，匹配规则与原实现保持一致。
+
+sorted_ocr_boxes / gather_ocr_list_by_row 同样替换了原实现中的两两冒泡比较：
+gather_ocr_list_by_row 的合并结果保持不变；sorted_ocr_boxes 改为按行分组后排序，
+行划分明确时与原实现的顺序相同，见其说明。
+"""
+from typing import Any, Dict, List, Tuple, Union
+
+import numpy as np
+
+# 网格每个方向上的最大格数，避免极端尺寸的框撑出过大的索引
+MAX_GRID_DIM = 512
+
+
+def expand_ranges(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """
+    把若干个 [start, start + count) 区间展开并拼接成一个一维数组。
+    """
+    total = int(counts.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.cumsum(counts) - counts
+    return np.repeat(starts - offsets, counts) + np.arange(total, dtype=np.int64)
+
+
+def ocr_boxes_to_array(dt_rec_boxes: List[List[Union[Any, str]]]) -> np.ndarray:
+    """
+    将 [[(4,2) 四点框, text, score], ...] 转换为 (N, 4) 的 [xmin, ymin, xmax, ymax] 数组。
+    与 box_4_2_poly_to_box_4_1 一致，只取左上角和右下角两个点。
+    """
+    if len(dt_rec_boxes) == 0:
+        return np.zeros((0, 4), dtype=np.float64)
+    points = np.asarray([rec[0] for rec in dt_rec_boxes], dtype=np.float64)
+    return polys_to_array(points)
+
+
+def polys_to_array(polygons: Union[np.ndarray, List]) -> np.ndarray:
+    """
+    将 (N, 4, 2) 的四点框转换为 (N, 4) 的 [xmin, ymin, xmax, ymax] 数组。
+    """
+    polygons = np.asarray(polygons, dtype=np.float64)
+    if polygons.size == 0:
+        return np.zeros((0, 4), dtype=np.float64)
+    return np.stack(
+        [polygons[:, 0, 0], polygons[:, 0, 1], polygons[:, 2, 0], polygons[:, 2, 1]],
+        axis=1,
+    )
+
+
+class BoxGridIndex:
+    """
+    轴对齐框的均匀网格索引。
+
+    每个框登记到它覆盖的所有网格中（CSR 形式存储），查询时只返回与查询框
+    落在同一网格里的候选框。闭区间相交的两个框一定共享至少一个网格，
+    因此候选集合是真实相交集合的超集，不会漏掉匹配。
+    """
+
+    def __init__(self, boxes: np.ndarray, cell_size: Tuple[float, float] = None):
+        self.boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        lo = np.minimum(self.boxes[:, :2], self.boxes[:, 2:])
+        hi = np.maximum(self.boxes[:, :2], self.boxes[:, 2:])
+
+        if len(self.boxes) == 0:
+            self.origin = np.zeros(2)
+            self.step = np.ones(2)
+            self.grid_shape = (1, 1)
+            self.bucket_ptr = np.zeros(2, dtype=np.int64)
+            self.bucket_items = np.zeros(0, dtype=np.int64)
+            return
+
+        self.origin = lo.min(axis=0)
+        span = np.maximum(hi.max(axis=0) - self.origin, 1.0)
+        if cell_size is None:
+            # 以单元格的中位尺寸作为网格大小，普通单元格只会落在 1~4 个网格里
+            step = np.median(hi - lo, axis=0)
+        else:
+            step = np.asarray(cell_size, dtype=np.float64)
+        step = np.maximum(step, span / MAX_GRID_DIM)
+        self.step = np.maximum(step, 1.0)
+        n_cols, n_rows = (np.floor(span / self.step).astype(np.int64) + 1).tolist()
+        self.grid_shape = (n_rows, n_cols)
+
+        item_ids, buckets = self._cover(lo, hi)
+        order = np.argsort(buckets, kind="stable")
+        self.bucket_items = item_ids[order]
+        self.bucket_ptr = np.searchsorted(
+            buckets[order], np.arange(n_rows * n_cols + 1, dtype=np.int64)
+        )
+
+    def _cover(self, lo: np.ndarray, hi: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        计算每个框覆盖的网格编号，返回 (框序号, 网格编号) 两个等长数组。
+        完全落在索引范围之外的框不覆盖任何网格。
+        """
+        n_rows, n_cols = self.grid_shape
+        g_lo = np.floor((lo - self.origin) / self.step).astype(np.int64)
+        g_hi = np.floor((hi - self.origin) / self.step).astype(np.int64)
+        inside = (g_hi[:, 0] >= 0) & (g_hi[:, 1] >= 0)
+        inside &= (g_lo[:, 0] < n_cols) & (g_lo[:, 1] < n_rows)
+        g_lo = np.maximum(g_lo, 0)
+        g_hi = np.minimum(g_hi, [n_cols - 1, n_rows - 1])
+
+        widths = np.where(inside, g_hi[:, 0] - g_lo[:, 0] + 1, 0)
+        heights = np.where(inside, g_hi[:, 1] - g_lo[:, 1] + 1, 0)
+        counts = widths * heights
+        item_ids = np.repeat(np.arange(len(lo), dtype=np.int64), counts)
+        local = np.arange(int(counts.sum()), dtype=np.int64) - np.repeat(
+            np.cumsum(counts) - counts, counts
+        )
+        rep_w = np.repeat(widths, counts)
+        gx = np.repeat(g_lo[:, 0], counts) + local % np.maximum(rep_w, 1)
+        gy = np.repeat(g_lo[:, 1], counts) + local // np.maximum(rep_w, 1)
+        return item_ids, gy * n_cols + gx
+
+    def query_pairs(self, boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        返回所有可能相交的 (查询框序号, 索引框序号) 候选对，按 (查询, 索引) 升序排列且去重。
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        n_items = len(self.boxes)
+        if len(boxes) == 0 or n_items == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+
+        lo = np.minimum(boxes[:, :2], boxes[:, 2:])
+        hi = np.maximum(boxes[:, :2], boxes[:, 2:])
+        query_ids, buckets = self._cover(lo, hi)
+        starts = self.bucket_ptr[buckets]
+        counts = self.bucket_ptr[buckets + 1] - starts
+        pair_query = np.repeat(query_ids, counts)
+        pair_item = self.bucket_items[expand_ranges(starts, counts)]
+
+        keys = np.unique(pair_query * n_items + pair_item)
+        return keys // n_items, keys % n_items
+
+
+def ocr_cell_match_mask(
+    ocr_boxes: np.ndarray,
+    cell_boxes: np.ndarray,
+    contain_threshold: float = 0.6,
+    iou_threshold: float = 0.8,
+) -> np.ndarray:
+    """
+    逐对判断 OCR 框是否属于单元格，输入为等长的 (K, 4) 数组。
+
+    与 is_box_contained(ocr_box, cell_box, 0.6) == 1 或 calculate_iou > 0.8 的判断等价：
+    - 两框不相交（闭区间）时不匹配
+    - OCR 框落在单元格外的面积比例小于 contain_threshold 时匹配（面积为 0 视为比例 0）
+    - IoU 大于 iou_threshold 时匹配（并集面积为 0 时 IoU 视为 1）
+    """
+    ox1, oy1, ox2, oy2 = ocr_boxes.T
+    cx1, cy1, cx2, cy2 = cell_boxes.T
+    disjoint = (ox2 < cx1) | (ox1 > cx2) | (oy2 < cy1) | (oy1 > cy2)
+
+    inter_w = np.maximum(np.minimum(ox2, cx2) - np.maximum(ox1, cx1), 0)
+    inter_h = np.maximum(np.minimum(oy2, cy2) - np.maximum(oy1, cy1), 0)
+    inter = inter_w * inter_h
+    ocr_area = (ox2 - ox1) * (oy2 - oy1)
+    cell_area = (cx2 - cx1) * (cy2 - cy1)
+    union = ocr_area + cell_area - inter
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        outside_ratio = np.where(ocr_area > 0, (ocr_area - inter) / ocr_area, 0.0)
+        iou = np.where(union == 0, 1.0, inter / union)
+    return ~disjoint & ((outside_ratio < contain_threshold) | (iou > iou_threshold))
+
+
+def match_ocr_cell(
+    dt_rec_boxes: List[List[Union[Any, str]]],
+    pred_bboxes: np.ndarray,
+    contain_threshold: float = 0.6,
+    iou_threshold: float = 0.8,
+) -> Tuple[Dict[int, List[Any]], List[Any]]:
+    """
+    将 OCR 结果分配到单元格，替代 wired_table_rec.utils_table_recover.match_ocr_cell。
+
+    :param dt_rec_boxes: [[(4,2) 四点框, text, score], ...]
+    :param pred_bboxes: 单元格四点框，shape (N, 4, 2)
+    :return: (matched, not_match_ocr_boxes)
+        matched: {单元格序号: [OCR 结果, ...]}，键的插入顺序和列表内顺序都与原实现相同；
+        not_match_ocr_boxes: 没有分配到任何单元格的 OCR 结果（原实现会按每个未命中的
+        单元格重复追加，调用方并未使用，这里只保留一份）。
+    """
+    if len(dt_rec_boxes) == 0:
+        return {}, []
+    if len(pred_bboxes) == 0:
+        return {}, list(dt_rec_boxes)
+
+    ocr_boxes = ocr_boxes_to_array(dt_rec_boxes)
+    cell_boxes = polys_to_array(pred_bboxes)
+    ocr_idx, cell_idx = BoxGridIndex(cell_boxes).query_pairs(ocr_boxes)
+    hit = ocr_cell_match_mask(
+        ocr_boxes[ocr_idx], cell_boxes[cell_idx], contain_threshold, iou_threshold
+    )
+    ocr_idx, cell_idx = ocr_idx[hit], cell_idx[hit]
+
+    matched = {}
+    for i, j in zip(ocr_idx.tolist(), cell_idx.tolist()):
+        matched.setdefault(j, []).append(dt_rec_boxes[i])
+
+    is_matched = np.zeros(len(dt_rec_boxes), dtype=bool)
+    is_matched[ocr_idx] = True
+    not_match_ocr_boxes = [
+        dt_rec_boxes[i] for i in np.flatnonzero(~is_matched).tolist()
+    ]
+    return matched, not_match_ocr_boxes
+
+
+def _axis_contained(a1: float, a2: float, b1: float, b2: float, threshold: float) -> bool:
+    """
+    单轴包含判断，与 is_single_axis_contained 返回值非 None 的条件相同：
+    任意一个区间落在交集之外的比例小于 threshold（区间长度不大于 0 时比例视为 0）。
+    """
+    inter = min(a2, b2) - max(a1, b1)
+    len_a = a2 - a1
+    len_b = b2 - b1
+    ratio_a = (len_a - inter) / len_a if len_a > 0 else 0
+    if ratio_a < threshold:
+        return True
+    ratio_b = (len_b - inter) / len_b if len_b > 0 else 0
+    return ratio_b < threshold
+
+
+def sorted_ocr_boxes(
+    dt_boxes: Union[np.ndarray, list], threshold: float = 0.2, row_gap: float = 20
+) -> Tuple[Union[np.ndarray, list], List[int]]:
+    """
+    将 [xmin, ymin, xmax, ymax] 框按从上到下、从左到右排序，O(n log n)。
+
+    先按 (ymin, xmin) 排序一次，再从上到下扫描分行：当前框与本行上一个框的 ymin 相差小于 row_gap、
+    且 y 方向互相包含时归入本行，否则另起一行；最后每行按 xmin 稳定排序（xmin 相同时保持扫描顺序）。
+
+    原实现（wired_table_rec.utils_table_recover.sorted_ocr_boxes）按同样的条件做插入排序，
+    该条件不满足传递性，最坏 O(n²)。行划分明确（同一行的框两两满足条件、不同行的框两两不满足）时
+    两者的输出相同；框的高度差异很大或跨越相邻两行、使行之间的归属不一致时，顺序可能与原实现不同。
+
+    :param dt_boxes: [[xmin, ymin, xmax, ymax], ...] 或 (N, 4) 数组
+    :param threshold: y 方向包含判断的阈值
+    :param row_gap: 视为同一行的 ymin 最大差值
+    :return: (排序后的框, 排序后框在输入中的下标)
+    """
+    num_boxes = len(dt_boxes)
+    if num_boxes <= 0:
+        return dt_boxes, []
+
+    coords = [
+        (float(box[0]), float(box[1]), float(box[2]), float(box[3])) for box in dt_boxes
+    ]
+    indices = sorted(range(num_boxes), key=lambda k: (coords[k][1], coords[k][0]))
+
+    rows = []
+    for idx in indices:
+        _, y1, _, y2 = coords[idx]
+        if rows:
+            _, py1, _, py2 = coords[rows[-1][-1]]
+            if abs(py1 - y1) < row_gap and _axis_contained(py1, py2, y1, y2, threshold):
+                rows[-1].append(idx)
+                continue
+        rows.append([idx])
+
+    order = []
+    for row in rows:
+        order.extend(sorted(row, key=lambda k: coords[k][0]))
+
+    if isinstance(dt_boxes, np.ndarray):
+        return dt_boxes[order], order
+    return [dt_boxes[k] for k in order], order
+
+
+# 框数超过该值时用 numpy 向量化查找下一个可合并的框
+GATHER_VECTORIZE_MIN = 256
+
+
+def gather_ocr_list_by_row(ocr_list: List[Any], threshold: float = 0.2) -> List[Any]:
+    """
+    将同一行的 OCR 结果合并，输出与 wired_table_rec.utils_table_recover.gather_ocr_list_by_row 相同。
+
+    每个未被合并的框依次吸收其后 y 方向互相包含的框，吸收后自身外框扩大；
+    框较多时用 numpy 一次找出下一个可吸收的框，而不是逐对比较。
+
+    :param ocr_list: [[[xmin, ymin, xmax, ymax], text], ...]，会原地修改
+    :param threshold: y 方向包含判断的阈值
+    :return: 合并后的列表
+    """
+    n = len(ocr_list)
+    if n >= GATHER_VECTORIZE_MIN:
+        return _gather_ocr_list_by_row_vectorized(ocr_list, threshold)
+
+    for i in range(n):
+        cur = ocr_list[i]
+        if not cur:
+            continue
+        cur_box = cur[0]
+        for j in range(i + 1, n):
+            nxt = ocr_list[j]
+            if not nxt:
+                continue
+            next_box = nxt[0]
+            if _axis_contained(cur_box[1], cur_box[3], next_box[1], next_box[3], threshold):
+                _merge_ocr_item(cur, nxt)
+                ocr_list[j] = None
+    return [x for x in ocr_list if x]
+
+
+def _merge_ocr_item(cur: List[Any], nxt: List[Any], blank_unit: float = 10) -> None:
+    """
+    把 nxt 合并进 cur：拼接文本并扩大外框。
+    空格数的计算方式与原实现一致（下一个框的 xmin 减去当前框的 ymin）。
+    """
+    cur_box, next_box = cur[0], nxt[0]
+    dis = max(next_box[0] - cur_box[1], 0)
+    cur[1] = cur[1] + int(dis / blank_unit) * " " + nxt[1]
+    xmin = min(cur_box[0], next_box[0])
+    xmax = max(cur_box[2], next_box[2])
+    ymin = min(cur_box[1], next_box[1])
+    ymax = max(cur_box[3], next_box[3])
+    cur_box[0] = xmin
+    cur_box[1] = ymin
+    cur_box[2] = xmax
+    cur_box[3] = ymax
+
+
+def _gather_ocr_list_by_row_vectorized(ocr_list: List[Any], threshold: float) -> List[Any]:
+    """
+    gather_ocr_list_by_row 的向量化版本。
+
+    当前框的 y 区间不变时，其后各框能否被吸收的判断结果也不变，
+    因此只在 y 区间被扩大后才重新计算一次掩码。
+    """
+    n = len(ocr_list)
+    alive = np.array([bool(x) for x in ocr_list])
+    y1 = np.array([x[0][1] if x else 0 for x in ocr_list], dtype=np.float64)
+    y2 = np.array([x[0][3] if x else 0 for x in ocr_list], dtype=np.float64)
+    len_b = y2 - y1
+
+    def hit_mask(cy1, cy2, start):
+        len_a = cy2 - cy1
+        inter = np.minimum(cy2, y2[start:]) - np.maximum(cy1, y1[start:])
+        seg_b = len_b[start:]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio_a = (len_a - inter) / len_a if len_a > 0 else np.zeros_like(inter)
+            ratio_b = np.where(seg_b > 0, (seg_b - inter) / seg_b, 0)
+        return ((ratio_a < threshold) | (ratio_b < threshold)) & alive[start:]
+
+    for i in range(n):
+        if not alive[i]:
+            continue
+        cur = ocr_list[i]
+        span = (float(cur[0][1]), float(cur[0][3]))
+        start = i + 1
+        hits = np.flatnonzero(hit_mask(*span, start)) + start
+        k = 0
+        while k < len(hits):
+            j = int(hits[k])
+            _merge_ocr_item(cur, ocr_list[j])
+            ocr_list[j] = None
+            alive[j] = False
+            new_span = (float(cur[0][1]), float(cur[0][3]))
+            if new_span != span:
+                span = new_span
+                hits = np.flatnonzero(hit_mask(*span, j + 1)) + j + 1
+                k = 0
+            else:
+                k += 1
+    return [x for x in ocr_list if x]
@@ -0,0 +1,217 @@
+# table_result.py
+"""
+有线表格单元格结果的紧凑存储。
+
+原流程中 transform_res / process_ocr_result / sort_and_gather_ocr_res / build_json
+（原实现保留在 benchmarks/bench_table_cells.py 中作对比）
+之间传递的是每个单元格一个 dict（t_box、t_logic_box、t_ocr_res 三个列表），
+大表上对象数量多、min/max 反复用推导式计算。TableCells 改为按列存储：
+
+- cells: 结构化数组，每个单元格的外框、逻辑坐标以及 OCR 结果在 ocr 中的区间
+- ocr: 结构化数组，每条 OCR 结果的外框和所属单元格
+- texts: 与 ocr 一一对应的文本列表
+
+并提供 to_dicts / to_json 转换为原来的中间格式和接口 JSON 格式。
+"""
+from typing import Any, Dict, List
+
+import numpy as np
+
+from table_postprocess import expand_ranges, gather_ocr_list_by_row, polys_to_array, sorted_ocr_boxes
+
+CELL_DTYPE = np.dtype(
+    [
+        # xmin, ymin, xmax, ymax
+        ("box", np.float64, (4,)),
+        # row_start, row_end, col_start, col_end
+        ("logic", np.int32, (4,)),
+        # 该单元格的 OCR 结果在 ocr / texts 中的区间 [ocr_start, ocr_end)
+        ("ocr_start", np.int64),
+        ("ocr_end", np.int64),
+    ]
+)
+
+OCR_DTYPE = np.dtype(
+    [
+        # xmin, ymin, xmax, ymax
+        ("box", np.float64, (4,)),
+        ("cell", np.int64),
+    ]
+)
+
+
+class TableCells:
+    """
+    按列存储的单元格识别结果，单元格顺序与原 t_rec_ocr_list 一致。
+    """
+
+    def __init__(self, cells: np.ndarray, ocr: np.ndarray, texts: List[str]):
+        self.cells = cells
+        self.ocr = ocr
+        self.texts = texts
+
+    @classmethod
+    def from_cell_box_det_map(
+        cls,
+        cell_box_det_map: Dict[int, List[Any]],
+        polygons: np.ndarray,
+        logi_points: np.ndarray,
+    ) -> "TableCells":
+        """
+        对应原流程的 transform_res：没有 OCR 结果的单元格会被跳过，
+        单元格外框取其所有 OCR 框的最小外接矩形。
+        """
+        cell_ids = [i for i in range(len(polygons)) if cell_box_det_map.get(i)]
+        counts = np.array([len(cell_box_det_map[i]) for i in cell_ids], dtype=np.int64)
+        ends = np.cumsum(counts)
+        starts = ends - counts
+
+        ocr = np.zeros(int(counts.sum()), dtype=OCR_DTYPE)
+        ocr_dets = [ocr_det for i in cell_ids for ocr_det in cell_box_det_map[i]]
+        texts = [ocr_det[1] for ocr_det in ocr_dets]
+
+        cells = np.zeros(len(cell_ids), dtype=CELL_DTYPE)
+        cells["ocr_start"] = starts
+        cells["ocr_end"] = ends
+        if len(cell_ids):
+            ocr["box"] = polys_to_array([ocr_det[0] for ocr_det in ocr_dets])
+            ocr["cell"] = np.repeat(np.arange(len(cell_ids)), counts)
+            boxes = ocr["box"]
+            cells["box"][:, 0] = np.minimum.reduceat(boxes[:, 0], starts)
+            cells["box"][:, 1] = np.minimum.reduceat(boxes[:, 1], starts)
+            cells["box"][:, 2] = np.maximum.reduceat(boxes[:, 2], starts)
+            cells["box"][:, 3] = np.maximum.reduceat(boxes[:, 3], starts)
+            cells["logic"] = np.asarray(logi_points)[cell_ids]
+        return cls(cells, ocr, texts)
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def __getitem__(self, index) -> "TableCells":
+        """
+        按布尔掩码或下标数组取出部分单元格，返回新的 TableCells。
+        """
+        cells = self.cells[index]
+        counts = cells["ocr_end"] - cells["ocr_start"]
+        ocr_idx = expand_ranges(cells["ocr_start"], counts)
+        ocr = self.ocr[ocr_idx]
+        ends = np.cumsum(counts)
+        cells["ocr_start"] = ends - counts
+        cells["ocr_end"] = ends
+        ocr["cell"] = np.repeat(np.arange(len(cells)), counts)
+        return TableCells(cells, ocr, [self.texts[i] for i in ocr_idx.tolist()])
+
+    @property
+    def logic(self) -> np.ndarray:
+        return self.cells["logic"]
+
+    def drop_empty_first_row_col(self) -> np.ndarray:
+        """
+        对应原流程的 process_ocr_result：第一行（或第一列）的单元格全部为空时去掉它，
+        并把其余单元格的行（列）坐标减 1。
+
+        与原实现一样，坐标调整直接作用在本对象上、被去掉的单元格保持原坐标，
+        返回保留单元格的布尔掩码，用 cells[mask] 得到调整后的结果。
+        """
+        logic = self.cells["logic"]
+        keep = np.ones(len(self), dtype=bool)
+        if len(self) == 0:
+            return keep
+        first_text_empty = np.array(
+            [self.texts[i] == "" for i in self.cells["ocr_start"].tolist()], dtype=bool
+        )
+        for start, end in ((0, 1), (2, 3)):
+            first = keep & (logic[:, start] == 0) & (logic[:, end] == 0)
+            if np.count_nonzero(first & first_text_empty) == np.count_nonzero(first):
+                keep &= ~first
+                logic[keep, start] -= 1
+                logic[keep, end] -= 1
+        return keep
+
+    def sort_and_gather(self, threshold: float = 0.3) -> None:
+        """
+        对应原流程的 sort_and_gather_ocr_res：单元格内的 OCR 结果排序并按行合并。
+        只有一条 OCR 结果的单元格无需处理，直接跳过。
+        """
+        starts = self.cells["ocr_start"]
+        ends = self.cells["ocr_end"]
+        multi = np.flatnonzero(ends - starts > 1)
+        if len(multi) == 0:
+            return
+
+        boxes = self.ocr["box"].tolist()
+        keep_ocr = np.ones(len(self.ocr), dtype=bool)
+        new_boxes = self.ocr["box"].copy()
+        texts = self.texts
+        for c in multi.tolist():
+            s, e = int(starts[c]), int(ends[c])
+            _, sorted_idx = sorted_ocr_boxes(boxes[s:e], threshold=threshold)
+            gathered = gather_ocr_list_by_row(
+                [[boxes[s + k], texts[s + k]] for k in sorted_idx], threshold=threshold
+            )
+            for k, (box, text) in enumerate(gathered):
+                new_boxes[s + k] = box
+                texts[s + k] = text
+            keep_ocr[s + len(gathered):e] = False
+
+        counts = np.add.reduceat(keep_ocr.astype(np.int64), starts)
+        new_ends = np.cumsum(counts)
+        self.cells["ocr_start"] = new_ends - counts
+        self.cells["ocr_end"] = new_ends
+        self.ocr = self.ocr[keep_ocr]
+        self.ocr["box"] = new_boxes[keep_ocr]
+        self.texts = [t for t, k in zip(texts, keep_ocr.tolist()) if k]
+
+    def cell_texts(self) -> List[List[str]]:
+        """
+        每个单元格的文本列表，对应原来的 [ocr_res[1] for ocr_res in t_ocr_res]。
+        """
+        texts = self.texts
+        return [
+            texts[s:e]
+            for s, e in zip(self.cells["ocr_start"].tolist(), self.cells["ocr_end"].tolist())
+        ]
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """
+        转换为原来的中间格式 [{"t_box", "t_logic_box", "t_ocr_res"}, ...]。
+        """
+        ocr_boxes = self.ocr["box"].tolist()
+        res = []
+        for box, logic, s, e in zip(
+            self.cells["box"].tolist(),
+            self.cells["logic"].tolist(),
+            self.cells["ocr_start"].tolist(),
+            self.cells["ocr_end"].tolist(),
+        ):
+            res.append(
+                {
+                    "t_box": box,
+                    "t_logic_box": logic,
+                    "t_ocr_res": [[ocr_boxes[k], self.texts[k]] for k in range(s, e)],
+                }
+            )
+        return res
+
+    def to_json(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        转换为接口返回的 {"tables": [...]} 格式，与 TableOCR.build_json 的输出相同。
+        """
+        # int() 向零取整，astype 的行为一致
+        boxes = self.cells["box"].astype(np.int64)
+        positions = boxes[:, [0, 1, 2, 1, 2, 3, 0, 3]].tolist()
+        json_cells = []
+        for (row_start, row_end, col_start, col_end), position, texts in zip(
+            self.cells["logic"].tolist(), positions, self.cell_texts()
+        ):
+            json_cells.append(
+                {
+                    "col_start": col_start,
+                    "col_end": col_end,
+                    "row_start": row_start,
+                    "row_end": row_end,
+                    "position": position,
+                    "text": " ".join(texts),
+                }
+            )
+        return {"tables": json_cells}
@@ -1,20 +1,29 @@
 from fastapi import FastAPI, File, UploadFile
-import uvicorn
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 import subprocess
 import tempfile
 import os
 import json
 import re
 import ast
-import requests
-from pdf2image import convert_from_path  # 导入pdf2image库
+import logging
 import uuid  # 导入uuid模块以生成唯一文件名
 import shutil
 
+from upload_ingest import read_upload
+
+# uvicorn、pdf2image、requests 在用到时才导入，缩短启动时间
+
+logger = logging.getLogger(__name__)
+
 app = FastAPI()
 
-# 印章检测接口的URL
-SEAL_RECOGNIZE_URL = 'http://h1337.iis.pub:24221/seal/recognize_seal'
+# 表格识别脚本，每个请求在子进程中运行
+PREDICT_SCRIPT = 'table/predict_table.py'
+
+# 印章检测接口的URL，可用环境变量 SEAL_API_URL 覆盖
+SEAL_RECOGNIZE_URL = os.environ.get("SEAL_API_URL", "http://h1337.iis.pub:24221/seal/recognize_seal")
 
 # 自定义的临时文件存储目录
 TEMP_FOLDER = './temp_files'
@@ -28,42 +37,66 @@ def safe_get(d, key, default=None):
         return d.get(key, default)
     return default
 
+@app.get("/healthz")
+async def healthz():
+    # 存活探针：进程能响应即可
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    # 就绪探针：识别脚本可用时才接收流量
+    if os.path.exists(PREDICT_SCRIPT):
+        return {"status": "ready"}
+    return JSONResponse(status_code=503, content={"status": "error", "error": f"{PREDICT_SCRIPT} 不存在"})
+
 @app.post("/process_image")
 async def process_image(image: UploadFile = File(...)):
-    temp_file_path = None  # 用于记录原始上传文件的路径
+    temp_file_path = None  # 用于记录原始上传文件的路径（仅图片需要落盘）
     temp_image_paths = []   # 用于记录转换后的图片路径（如果上传的是PDF）
     table_data = []
     seal_detection_result = None
+    upload = None
 
     try:
         # 生成唯一的文件名，保留原始文件的扩展名
         original_extension = os.path.splitext(image.filename)[1]
         unique_filename = f"{uuid.uuid4().hex}{original_extension}"
-        temp_file_path = os.path.join(TEMP_FOLDER, unique_filename)
 
-        # 将上传的文件内容写入临时文件
-        with open(temp_file_path, 'wb') as temp_file:
-            content = await image.read()
-            temp_file.write(content)
+        # 按块读取上传内容到内存（过大时转存到临时文件），同时计算 sha256
+        upload = await run_in_threadpool(read_upload, image.file)
 
-        # 如果文件是PDF，则转换为图片用于表格检测
+        # 如果文件是PDF，则直接从内存转换为图片用于表格检测
         if original_extension.lower() == '.pdf':
             try:
-                images = convert_from_path(temp_file_path)
+                from pdf2image import convert_from_bytes
+                with upload.getbuffer() as pdf_content:
+                    images = await run_in_threadpool(convert_from_bytes, pdf_content)
                 for i, image_page in enumerate(images):
                     page_unique_filename = f"{uuid.uuid4().hex}_page_{i + 1}.png"
                     image_path = os.path.join(TEMP_FOLDER, page_unique_filename)
                     image_page.save(image_path, 'PNG')
                     temp_image_paths.append(image_path)
             except Exception as e:
+                # 已写入的页面图片与上传内容不会再经过下面的 finally，这里清理
+                for path in temp_image_paths:
+                    if os.path.exists(path):
+                        os.remove(path)
+                upload.close()
                 return {"error": f"PDF 转换为图片失败: {str(e)}"}
         else:
+            # 识别脚本在子进程中按路径读取图片，图片只在这里写入一次
+            temp_file_path = os.path.join(TEMP_FOLDER, unique_filename)
+            with open(temp_file_path, 'wb') as temp_file:
+                shutil.copyfileobj(upload, temp_file)
+            upload.seek(0)
             temp_image_paths = [temp_file_path]  # 直接处理其他图片格式文件
 
     except Exception as e:
         # 如果保存文件失败，返回错误
         if temp_file_path and os.path.exists(temp_file_path):
             os.remove(temp_file_path)
+        if upload is not None:
+            upload.close()
         return {"error": f"文件保存失败: {str(e)}"}
 
     try:
@@ -71,7 +104,7 @@ async def process_image(image: UploadFile = File(...)):
         for temp_image_path in temp_image_paths:
             # 运行表格检测命令
             command = [
-                'python', 'table/predict_table.py',
+                'python', PREDICT_SCRIPT,
                 '--det_model_dir=inference/ch_PP-OCRv3_det_infer',
                 '--rec_model_dir=inference/ch_PP-OCRv3_rec_infer',
                 '--table_model_dir=inference/ch_ppstructure_mobile_v2.0_SLANet_infer_epo20',
@@ -101,8 +134,8 @@ async def process_image(image: UploadFile = File(...)):
                 except (ValueError, SyntaxError) as e:
                     return {"error": f"清理后仍无法解析为JSON: {str(e)}", "cleaned_output": json_output}
 
-        # 进行印章检测，基于原始上传的文件
-        seal_detection_result = await recognize_seal(temp_file_path)
+        # 进行印章检测，基于原始上传的内容，不再从磁盘读回
+        seal_detection_result = await recognize_seal(unique_filename, upload)
 
         # 如果印章识别失败，则将 seal_info 设置为 None
         seal_info = None
@@ -121,9 +154,10 @@ async def process_image(image: UploadFile = File(...)):
             # 删除原始上传的文件
             if temp_file_path and os.path.exists(temp_file_path):
                 os.remove(temp_file_path)
+            upload.close()
         except Exception as cleanup_error:
             # 如果清理失败，记录日志或处理
-            print(f"清理临时文件时出错: {cleanup_error}")
+            logger.warning("清理临时文件时出错: %s", cleanup_error)
 
     # 返回合并后的结果
     response = {
@@ -137,17 +171,15 @@ async def process_image(image: UploadFile = File(...)):
 
     return response
 
-async def recognize_seal(file_path: str):
-    """调用印章检测接口并返回结果，支持PDF和图片文件"""
-    try:
-        # 确保文件存在
-        if not os.path.exists(file_path):
-            return {"error": f"文件路径不存在: {file_path}"}
+async def recognize_seal(filename: str, upload):
+    """调用印章检测接口并返回结果，支持PDF和图片文件；upload 为上传内容的文件对象"""
+    import requests
 
+    try:
         # 发送POST请求调用印章检测接口
-        with open(file_path, 'rb') as file:
-            files = {'image': file}  # 保持与客户端上传时的字段名一致
-            response = requests.post(SEAL_RECOGNIZE_URL, files=files)
+        upload.seek(0)
+        files = {'image': (filename, upload)}  # 保持与客户端上传时的字段名一致
+        response = requests.post(SEAL_RECOGNIZE_URL, files=files)
 
         # 解析印章检测的响应结果
         if response.status_code == 200:
@@ -160,4 +192,6 @@ async def recognize_seal(file_path: str):
         return {"error": f"印章检测请求失败: {str(e)}"}
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(app, host="0.0.0.0", port=13006)
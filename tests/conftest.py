@@ -0,0 +1,9 @@
+# tests/conftest.py
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 仓库根目录的模块与 benchmarks/ 下的合成数据、基准实现
+for path in (ROOT, os.path.join(ROOT, "benchmarks")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,28 @@
+# tests/test_image_archive.py
+"""
+ArchiveWriter 的计数在多个请求线程同时提交时保持一致。
+"""
+import threading
+
+import numpy as np
+
+from image_archive import ArchiveWriter
+
+
+def test_stats_are_consistent_under_concurrent_submits(tmp_path):
+    archive = ArchiveWriter(root=str(tmp_path), queue_size=16, min_free_bytes=0)
+    images = [np.zeros((8, 8, 3), dtype=np.uint8)] * 4
+    threads = [
+        threading.Thread(target=lambda t=t: [archive.submit_images(images, f"t{t}-{i}") for i in range(50)])
+        for t in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert archive.flush(timeout=30)
+
+    stats = archive.snapshot()
+    assert stats["queued"] + stats["dropped_full"] == 8 * 50 * len(images)
+    assert stats["written"] == stats["queued"]
+    assert stats["pending"] == 0
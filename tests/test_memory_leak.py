@@ -0,0 +1,41 @@
+# tests/test_memory_leak.py
+"""
+内存泄漏回归：与 benchmarks/check_memory_leak.py 相同的流程，请求数较少，断言预热后 RSS 的增长有界且没有失败的请求。
+"""
+import pytest
+
+import check_memory_leak
+from load_test import synthetic_corpus
+
+REQUESTS = 40
+WARMUP = 5
+MAX_GROWTH_MB = 50
+# 请求数少时趋势的估计波动大，只拦截明显的持续增长
+MAX_SLOPE_MB = 200
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("ARCHIVE_DIR", str(tmp_path / "preprocessed_images"))
+    stub = check_memory_leak.start_stub(0)
+    try:
+        yield check_memory_leak.load_server()
+    except Exception as e:
+        pytest.skip(f"识别模型无法加载: {type(e).__name__}: {e}")
+    finally:
+        stub.shutdown()
+
+
+def test_rss_growth_is_bounded(server):
+    corpus = [doc for doc in synthetic_corpus(n_tables=2, pdf_pages=2) if doc["type"] in ("jpg", "png")]
+    result = check_memory_leak.run_requests(server, corpus, REQUESTS, warmup=WARMUP, sample_every=5)
+    assert result["errors"] == 0
+    assert check_memory_leak.check(result, MAX_GROWTH_MB, MAX_SLOPE_MB) == []
+
+
+def test_check_rejects_failed_requests():
+    result = {"errors": 1, "total": 100, "growth_mb": 0.0, "slope_mb": 0.0}
+    assert check_memory_leak.check(result, MAX_GROWTH_MB, MAX_SLOPE_MB)
+    assert check_memory_leak.check(result, MAX_GROWTH_MB, MAX_SLOPE_MB, max_error_rate=0.02) == []
+    assert check_memory_leak.check(dict(result, errors=0), MAX_GROWTH_MB, MAX_SLOPE_MB) == []
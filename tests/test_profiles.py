@@ -0,0 +1,27 @@
+# tests/test_profiles.py
+"""
+环境变量 TABLE_PROFILE：默认档位的选择与导入时的校验。
+"""
+import importlib
+
+import pytest
+
+import profiles
+
+
+@pytest.fixture
+def reload_profiles(monkeypatch):
+    yield lambda: importlib.reload(profiles)
+    monkeypatch.undo()
+    importlib.reload(profiles)
+
+
+def test_default_profile_from_env(monkeypatch, reload_profiles):
+    monkeypatch.setenv("TABLE_PROFILE", "fast")
+    assert reload_profiles().get_profile()["name"] == "fast"
+
+
+def test_unknown_default_profile_fails_at_import(monkeypatch, reload_profiles):
+    monkeypatch.setenv("TABLE_PROFILE", "fastest")
+    with pytest.raises(ValueError, match="TABLE_PROFILE"):
+        reload_profiles()
@@ -0,0 +1,27 @@
+# tests/test_request_deadline.py
+"""
+请求头 X-Request-Timeout 的解析与截止时间检查。
+"""
+import pytest
+
+from request_deadline import DEFAULT_TIMEOUT, Deadline, RequestCancelled
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("5", 5.0),
+    ("-3", 0.0),
+    ("1e9", DEFAULT_TIMEOUT),
+    ("abc", DEFAULT_TIMEOUT),
+    ("nan", DEFAULT_TIMEOUT),
+    ("inf", DEFAULT_TIMEOUT),
+    ("-inf", DEFAULT_TIMEOUT),
+])
+def test_request_timeout_header(value, expected):
+    assert Deadline.from_request({"X-Request-Timeout": value}, {}).timeout == expected
+
+
+def test_expired_deadline_raises():
+    deadline = Deadline.from_request({"X-Request-Timeout": "0"}, {})
+    assert deadline.remaining() == 0.0
+    with pytest.raises(RequestCancelled):
+        deadline.check("rasterize")
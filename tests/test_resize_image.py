@@ -0,0 +1,38 @@
+# tests/test_resize_image.py
+"""
+server.resize_image 的 PNG 解码：cv2 直接解码与 PIL + img_loader 的结果逐像素相同。
+"""
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    # 导入 server 会在当前目录创建日志
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("ARCHIVE_DIR", str(tmp_path / "preprocessed_images"))
+    import server
+
+    return server
+
+
+@pytest.mark.parametrize("width", [800, 1700, 2600])
+@pytest.mark.parametrize("gray", [False, True])
+def test_png_matches_pil_path(server, tmp_path, width, gray):
+    from rapid_table_det.utils.visuallize import img_loader
+
+    rng = np.random.default_rng(width)
+    img = rng.integers(0, 256, (300, width) if gray else (300, width, 3), dtype=np.uint8)
+    path = str(tmp_path / "page.png")
+    cv2.imwrite(path, img)
+
+    arr, resized = server.resize_image(path, max_width=1200)
+
+    with Image.open(path) as pil_img:
+        expected = img_loader(pil_img.reduce(width // 1200) if width >= 2400 else pil_img)
+    if resized:
+        expected = cv2.resize(expected, arr.shape[1::-1], interpolation=cv2.INTER_AREA)
+    assert resized == (width > 1200)
+    np.testing.assert_array_equal(arr, expected)
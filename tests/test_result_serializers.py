@@ -0,0 +1,33 @@
+# tests/test_result_serializers.py
+"""
+JSON 输出格式：响应与 jsonify 的键顺序相同，写文件与 json.dump(indent=4) 相同。
+"""
+import json
+
+import numpy as np
+from flask import Flask, jsonify
+
+from result_serializers import dumps_json
+
+RESULT = {
+    "result": {"table": {"result": {"tables": [
+        {"col_start": 0, "col_end": 0, "row_start": np.int64(1), "row_end": 1,
+         "position": np.array([1, 2, 3, 2, 3, 4, 1, 4]), "text": "合计 12.5"},
+    ]}}, "seal": {"message": "No stamps detected"}},
+    "message": "success",
+    "code": 200,
+}
+
+
+def test_response_matches_jsonify_apart_from_ascii_escaping():
+    app = Flask(__name__)
+    with app.app_context():
+        expected = jsonify(json.loads(dumps_json(RESULT))).get_data()
+    body = dumps_json(RESULT, sort_keys=True)
+    # jsonify 转义非 ASCII 字符，其余（键顺序、紧凑分隔符）逐字节相同
+    assert json.dumps(json.loads(body), separators=(",", ":")).encode() + b"\n" == expected
+
+
+def test_file_output_matches_json_dump_indent_4():
+    plain = json.loads(dumps_json(RESULT))
+    assert dumps_json(RESULT, indent=True) == json.dumps(plain, ensure_ascii=False, indent=4).encode("utf-8")
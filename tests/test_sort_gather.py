@@ -0,0 +1,78 @@
+# tests/test_sort_gather.py
+"""
+sorted_ocr_boxes / gather_ocr_list_by_row 与 wired_table_rec 原实现的随机对比。
+"""
+import copy
+
+import numpy as np
+import pytest
+
+from bench_sort_gather import random_boxes
+from table_postprocess import gather_ocr_list_by_row, sorted_ocr_boxes
+
+utils_table_recover = pytest.importorskip("wired_table_rec.utils_table_recover")
+
+SEEDS = range(300)
+
+
+def row_boxes(rng, n_rows, per_row, row_height=40.0):
+    """
+    行划分明确的文本框：行内 ymin 抖动小、高度相近（两两在 y 方向互相包含），行间距大于 row_gap，
+    行内 x 顺序随机，偶尔有零高度的框和相同的坐标。
+    """
+    boxes = []
+    for r in range(n_rows):
+        for _ in range(int(rng.integers(1, per_row + 1))):
+            y1 = r * row_height + rng.uniform(-1.5, 1.5)
+            h = 0.0 if rng.random() < 0.05 else rng.uniform(16, 20)
+            x1 = rng.uniform(0, 800)
+            if rng.random() < 0.2:
+                y1, x1 = round(y1), round(x1)
+            boxes.append([x1, y1, x1 + rng.uniform(0, 200), y1 + h])
+    rng.shuffle(boxes)
+    return boxes
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_sorted_ocr_boxes_matches_reference_on_rows(seed):
+    rng = np.random.default_rng(seed)
+    boxes = row_boxes(rng, int(rng.integers(1, 12)), int(rng.integers(1, 15)))
+    threshold = float(rng.choice([0.2, 0.3, 0.5]))
+    inp = np.array(boxes).reshape(-1, 4) if seed % 3 == 0 else boxes
+
+    got_boxes, got_idx = sorted_ocr_boxes(copy.deepcopy(inp), threshold=threshold)
+    want_boxes, want_idx = utils_table_recover.sorted_ocr_boxes(copy.deepcopy(inp), threhold=threshold)
+    assert list(got_idx) == list(want_idx)
+    assert np.array_equal(np.asarray(got_boxes), np.asarray(want_boxes))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_sorted_ocr_boxes_is_permutation(seed):
+    rng = np.random.default_rng(seed)
+    boxes = random_boxes(rng, int(rng.integers(0, 80)))
+    sorted_boxes, idx = sorted_ocr_boxes(boxes)
+    assert sorted(idx) == list(range(len(boxes)))
+    assert sorted_boxes == [boxes[k] for k in idx]
+
+
+def test_sorted_ocr_boxes_reversed_row():
+    # 同一行 ymin 递增、xmin 递减：原实现每个框都要回看整行
+    n = 5000
+    boxes = [[float(n - k), k * 0.001, n - k + 5.0, 18 + k * 0.001] for k in range(n)]
+    _, idx = sorted_ocr_boxes(boxes)
+    assert idx == list(range(n - 1, -1, -1))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_gather_ocr_list_by_row_matches_reference(seed):
+    rng = np.random.default_rng(seed)
+    # 少量大输入覆盖向量化分支
+    n = int(rng.integers(0, 400 if seed % 10 == 0 else 60))
+    threshold = float(rng.choice([0.2, 0.3, 0.5]))
+    boxes = random_boxes(rng, n)
+    _, idx = sorted_ocr_boxes(boxes, threshold=threshold)
+    ocr_list = [[list(b), f"t{k}"] for k, b in enumerate(boxes[i] for i in idx)]
+
+    got = gather_ocr_list_by_row(copy.deepcopy(ocr_list), threshold=threshold)
+    want = utils_table_recover.gather_ocr_list_by_row(copy.deepcopy(ocr_list), threhold=threshold)
+    assert got == want
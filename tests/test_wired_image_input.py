@@ -0,0 +1,43 @@
+# tests/test_wired_image_input.py
+"""
+有线表格引擎的图片输入：按路径传入与传入解码后的 BGR 数组应得到相同的结果。
+"""
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from bench_utils import load_vendored_wired_main
+from synthetic_tables import make_table
+
+wired_main = load_vendored_wired_main()
+
+
+@pytest.fixture
+def table_path(tmp_path):
+    img, _ = make_table(rows=4, cols=3, seed=3)
+    # 加一块纯蓝色区域，通道对调时能直接看出来
+    img[5:25, 5:25] = (255, 0, 0)
+    path = str(tmp_path / "table.png")
+    cv2.imwrite(path, img)
+    return path
+
+
+def test_loader_path_and_array_agree(table_path):
+    load_img = wired_main.BGRLoadImage()
+    from_path = load_img(table_path)
+    from_array = load_img(cv2.imread(table_path))
+    assert np.array_equal(from_path, from_array)
+    assert from_array[10, 10].tolist() == [255, 0, 0]
+
+
+@pytest.mark.skipif(not os.path.exists(wired_main.default_model_path_v2), reason="表格线检测模型未安装")
+def test_engine_path_and_array_agree(table_path, monkeypatch):
+    monkeypatch.setenv("LAYOUT_CACHE_SIZE", "0")
+    engine = wired_main.WiredTableRecognition()
+    html_path, _, polygons_path, logic_path, *_ = engine(table_path)
+    html_array, _, polygons_array, logic_array, *_ = engine(cv2.imread(table_path))
+    assert html_path == html_array
+    assert np.array_equal(polygons_path, polygons_array)
+    assert np.array_equal(logic_path, logic_array)
@@ -0,0 +1,88 @@
+# upload_ingest.py
+"""
+上传文件的接收：请求体解析时直接写入内存缓冲区并同时计算 sha256，不再先保存到磁盘再读回。
+只有超过 SPOOL_THRESHOLD 的上传才转存到临时文件，避免大文件长时间占用工作进程的内存。
+
+- UploadSpool: 替代 werkzeug / starlette 默认的上传缓冲（它们超过 500KB / 1MB 即写入磁盘）
+- read_upload: 按块读取任意文件对象（如 FastAPI 的 UploadFile）到 UploadSpool
+"""
+import contextlib
+import hashlib
+import mmap
+import os
+import tempfile
+
+# 上传内容保存在内存中的上限（字节），超过后转存到临时文件
+SPOOL_THRESHOLD = int(os.environ.get("UPLOAD_SPOOL_BYTES", 20 * 1024 * 1024))
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class UploadSpool(tempfile.SpooledTemporaryFile):
+    """
+    写入时计算 sha256 与字节数的 SpooledTemporaryFile。
+    getbuffer() 返回全部内容的只读缓冲区且不复制：内存中的内容直接取 BytesIO 的缓冲区，
+    已转存到磁盘的内容通过 mmap 映射。
+    """
+
+    def __init__(self, max_size=None, dir=None):
+        super().__init__(max_size=SPOOL_THRESHOLD if max_size is None else max_size, mode="w+b", dir=dir)
+        self._sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, s):
+        self._sha256.update(s)
+        self.size += len(s)
+        return super().write(s)
+
+    def __repr__(self):
+        return f"<UploadSpool {self.size} bytes sha256={self.sha256[:12]}>"
+
+    @property
+    def sha256(self):
+        return self._sha256.hexdigest()
+
+    @property
+    def in_memory(self):
+        return not self._rolled
+
+    @contextlib.contextmanager
+    def getbuffer(self):
+        """
+        with spool.getbuffer() as buf: ...
+        退出 with 块前必须释放所有引用 buf 的对象（如 np.frombuffer 得到的数组），否则无法解除映射。
+        """
+        if self.in_memory:
+            with self._file.getbuffer() as view:
+                yield view
+        elif self.size == 0:
+            yield b""
+        else:
+            self.flush()
+            with mmap.mmap(self.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield mm
+
+    def getvalue(self):
+        """
+        复制出全部内容的 bytes，用于只接受 bytes 的接口。
+        """
+        with self.getbuffer() as buf:
+            return bytes(buf)
+
+
+def read_upload(fileobj, max_size=None, dir=None, chunk_size=CHUNK_SIZE):
+    """
+    按块读取文件对象的全部内容到新的 UploadSpool，读取的同时计算 sha256，返回时已定位到开头。
+    """
+    spool = UploadSpool(max_size=max_size, dir=dir)
+    try:
+        while True:
+            chunk = fileobj.read(chunk_size)
+            if not chunk:
+                break
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
@@ -2,6 +2,7 @@
 # @Author: SWHL
 # @Contact: liekkaskono@163.com
 import argparse
+import copy
 import importlib
 import logging
 import time
@@ -16,22 +17,193 @@ from wired_table_rec.table_line_rec_plus import TableLineRecognitionPlus
 from .table_recover import TableRecover
 from .utils import InputType, LoadImage
 from .utils_table_recover import (
-    match_ocr_cell,
     plot_html_table,
     box_4_2_poly_to_box_4_1,
     get_rotate_crop_image,
-    sorted_ocr_boxes,
-    gather_ocr_list_by_row,
 )
+from layout_cache import LayoutCache
+from request_deadline import check_deadline
+from table_postprocess import match_ocr_cell, sorted_ocr_boxes
+from table_result import TableCells
 
 cur_dir = Path(__file__).resolve().parent
 default_model_path = cur_dir / "models" / "cycle_center_net_v1.onnx"
 default_model_path_v2 = cur_dir / "models" / "cycle_center_net_v2.onnx"
 
+# 单元格直接识别（cell_direct）：裁剪后忽略的边缘宽度，去掉表格线的残留
+CELL_FRAME = 3
+# 背景与最暗像素的灰度差小于该值时视为空单元格
+CELL_MIN_CONTRAST = 60
+# 单行文字裁剪到文字范围后上下、左右补白的像素数
+CELL_TEXT_PAD = (4, 8)
+
+
+def _crop_cell(img: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """按顺时针的单元格四点框透视裁剪，与 get_rotate_crop_image 相同但不旋转竖长的单元格"""
+    width = int(max(np.linalg.norm(points[0] - points[1]), np.linalg.norm(points[2] - points[3])))
+    height = int(max(np.linalg.norm(points[0] - points[3]), np.linalg.norm(points[1] - points[2])))
+    if width < 1 or height < 1:
+        return None
+    dst = np.float32([[0, 0], [width, 0], [width, height], [0, height]])
+    matrix = cv2.getPerspectiveTransform(points.astype(np.float32), dst)
+    return cv2.warpPerspective(
+        img, matrix, (width, height), borderMode=cv2.BORDER_REPLICATE, flags=cv2.INTER_CUBIC
+    )
+
+
+def _text_runs(mask: np.ndarray, min_gap: int = 3, min_len: int = 3) -> List[Tuple[int, int]]:
+    """连续为真的区间，间隔小于 min_gap 的合并，长度小于 min_len 的丢弃（噪点）"""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+    runs = []
+    for start, end in zip(edges[0::2].tolist(), edges[1::2].tolist()):
+        if runs and start - runs[-1][1] < min_gap:
+            runs[-1][1] = end
+        else:
+            runs.append([start, end])
+    return [(start, end) for start, end in runs if end - start >= min_len]
+
+
+def _cell_text_layout(crop: np.ndarray):
+    """
+    单元格裁剪图中文字的范围和行数，返回 ((x1, y1, x2, y2), 行数)，空单元格返回 (None, 0)。
+    Otsu 二值化后去掉边缘和贯穿的表格线残留，按水平投影统计文字行。
+    """
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+    if float(np.median(gray)) - float(gray.min()) < CELL_MIN_CONTRAST:
+        return None, 0
+    threshold, _ = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    dark = gray < threshold
+    f = CELL_FRAME
+    dark[:f], dark[-f:], dark[:, :f], dark[:, -f:] = False, False, False, False
+    dark[dark.mean(axis=1) > 0.6] = False
+    dark[:, dark.mean(axis=0) > 0.6] = False
+    lines = _text_runs(dark.any(axis=1))
+    if not lines:
+        return None, 0
+    top, bottom = lines[0][0], lines[-1][1]
+    cols = np.flatnonzero(dark[top:bottom].any(axis=0))
+    return (int(cols[0]), top, int(cols[-1]) + 1, bottom), len(lines)
+
+
+def _crop_points_to_image(points: np.ndarray, size: Tuple[int, int], xy: np.ndarray) -> np.ndarray:
+    """裁剪图中的点按双线性插值换算回原图坐标，points 为单元格的顺时针四点框，size 为裁剪图的 (宽, 高)"""
+    u = np.asarray(xy, dtype=np.float32)[:, :1] / max(size[0], 1)
+    v = np.asarray(xy, dtype=np.float32)[:, 1:] / max(size[1], 1)
+    lt, rt, rb, lb = points.astype(np.float32)
+    return (1 - u) * (1 - v) * lt + u * (1 - v) * rt + u * v * rb + (1 - u) * v * lb
+
+
+def re_rec(
+    ocr,
+    img: np.ndarray,
+    sorted_polygons: np.ndarray,
+    cell_box_map: Dict[int, List[str]],
+    rec_again=True,
+) -> Dict[int, List[Any]]:
+    """找到poly对应为空的框，尝试将直接将poly框直接送到识别中，ocr 为 RapidOCR 实例"""
+    for i in range(sorted_polygons.shape[0]):
+        if cell_box_map.get(i):
+            continue
+        if not rec_again:
+            box = sorted_polygons[i]
+            cell_box_map[i] = [[box, "", 1]]
+            continue
+        # 空单元格很多的大表逐个识别耗时长，每个单元格之前检查截止时间
+        check_deadline("re_rec")
+        crop_img = get_rotate_crop_image(img, sorted_polygons[i])
+        pad_img = cv2.copyMakeBorder(
+            crop_img, 5, 5, 100, 100, cv2.BORDER_CONSTANT, value=(255, 255, 255)
+        )
+        rec_res, _ = ocr(pad_img, use_det=False, use_cls=True, use_rec=True)
+        box = sorted_polygons[i]
+        text = [rec[0] for rec in rec_res]
+        scores = [rec[1] for rec in rec_res]
+        cell_box_map[i] = [[box, "".join(text), min(scores)]]
+    return cell_box_map
+
+
+def rec_cells(
+    ocr,
+    img: np.ndarray,
+    polygons: np.ndarray,
+    batch_size: Optional[int] = None,
+) -> Tuple[Dict[int, List[Any]], List[List[Any]]]:
+    """
+    不做整页文字检测，按单元格框裁剪后识别，返回 (cell_box_det_map, ocr_result)，格式与整页 OCR 加
+    match_ocr_cell 的结果相同，文字框为原图坐标。
+    - 空单元格不识别，与 rec_again=False 时的 re_rec 相同，记为单元格框和空文字
+    - 单行文字的单元格裁剪到文字范围，合并为一次 text_rec 调用批量识别（按宽高比排序后分批）
+    - 有多行文字的单元格单独做文字检测和识别
+    ocr 为 RapidOCR 实例，batch_size 为每批的图片数，默认取 RapidOCR 配置的 rec_batch_num。
+    """
+    cell_box_map = {}
+    ocr_result = []
+    singles, single_ids, single_boxes = [], [], []
+    multi = []
+    for i in range(polygons.shape[0]):
+        points = polygons[i]
+        crop = _crop_cell(img, points)
+        box, n_lines = (None, 0) if crop is None else _cell_text_layout(crop)
+        if box is None:
+            cell_box_map[i] = [[points, "", 1.0]]
+            continue
+        if n_lines > 1:
+            multi.append((i, crop))
+            continue
+        x1, y1, x2, y2 = box
+        pad_y, pad_x = CELL_TEXT_PAD
+        singles.append(cv2.copyMakeBorder(
+            crop[y1:y2, x1:x2], pad_y, pad_y, pad_x, pad_x, cv2.BORDER_CONSTANT, value=(255, 255, 255)
+        ))
+        single_ids.append(i)
+        single_boxes.append(_crop_points_to_image(
+            points, crop.shape[1::-1], [[x1, y1], [x2, y1], [x2, y2], [x1, y2]]
+        ))
+
+    if singles:
+        text_rec = ocr.text_rec
+        if batch_size:
+            # 浅复制共用会话，只改批大小，不影响其他线程的调用
+            text_rec = copy.copy(text_rec)
+            text_rec.rec_batch_num = batch_size
+        rec_res, _ = text_rec(singles)
+        for i, box, res in zip(single_ids, single_boxes, rec_res):
+            det = [box, res[0], res[1]]
+            cell_box_map[i] = [det]
+            ocr_result.append(det)
+
+    for i, crop in multi:
+        check_deadline("cell_rec")
+        pad_img = cv2.copyMakeBorder(crop, 10, 10, 10, 10, cv2.BORDER_CONSTANT, value=(255, 255, 255))
+        rec_res, _ = ocr(pad_img, use_cls=False)
+        if not rec_res:
+            cell_box_map[i] = [[polygons[i], "", 1.0]]
+            continue
+        dets = []
+        for det_box, text, score in rec_res:
+            box = _crop_points_to_image(polygons[i], crop.shape[1::-1], np.asarray(det_box) - 10)
+            dets.append([box, text, score])
+        cell_box_map[i] = dets
+        ocr_result.extend(dets)
+    return cell_box_map, ocr_result
+
+
+class BGRLoadImage(LoadImage):
+    """
+    三通道数组按 BGR 原样使用，与 lineless_table_rec、rapidocr_onnxruntime 的约定一致；
+    安装包的 LoadImage 总是把三通道数组当作 RGB 转换，传入 BGR 数组时通道会被对调。
+    路径、bytes 与其他通道数的数组仍由 LoadImage 处理（路径解码后为 BGR）。
+    """
+
+    def __call__(self, img: InputType) -> np.ndarray:
+        if isinstance(img, np.ndarray) and img.ndim == 3 and img.shape[2] == 3:
+            return img
+        return super().__call__(img)
+
 
 class WiredTableRecognition:
     def __init__(self, table_model_path: Union[str, Path] = None, version="v2"):
-        self.load_img = LoadImage()
+        self.load_img = BGRLoadImage()
         if version == "v2":
             model_path = table_model_path if table_model_path else default_model_path_v2
             self.table_line_rec = TableLineRecognitionPlus(str(model_path))
@@ -40,6 +212,8 @@ class WiredTableRecognition:
             self.table_line_rec = TableLineRecognition(str(model_path))
 
         self.table_recover = TableRecover()
+        # 重复出现的表单版式直接复用单元格框与逻辑行列，见 layout_cache.py
+        self.layout_cache = LayoutCache.from_env()
 
         try:
             self.ocr = importlib.import_module("rapidocr_onnxruntime").RapidOCR()
@@ -62,26 +236,47 @@ class WiredTableRecognition:
         need_ocr = True
         col_threshold = 15
         row_threshold = 10
+        cell_direct = False
+        cell_batch_size = None
+        use_layout_cache = kwargs.pop("use_layout_cache", True)
         if kwargs:
             rec_again = kwargs.get("rec_again", True)
             need_ocr = kwargs.get("need_ocr", True)
+            cell_direct = kwargs.get("cell_direct", False)
+            cell_batch_size = kwargs.get("cell_batch_size")
             col_threshold = kwargs.get("col_threshold", 15)
             row_threshold = kwargs.get("row_threshold", 10)
         img = self.load_img(img)
-        polygons, rotated_polygons = self.table_line_rec(img, **kwargs)
-        if polygons is None:
-            logging.warning("polygons is None.")
-            return "", 0.0, None, None, None
+        # 服务请求的截止时间已到时抛出 RequestCancelled（BaseException，不会被下面的 except Exception 捕获）
+        check_deadline("line_rec")
+        layout, fingerprint = None, None
+        if use_layout_cache and self.layout_cache.enabled:
+            # 只影响 OCR 的参数不区分版式
+            layout_params = tuple(sorted(
+                (k, repr(v)) for k, v in kwargs.items() if k not in ("rec_again", "need_ocr", "cell_direct", "cell_batch_size")
+            ))
+            layout, fingerprint = self.layout_cache.lookup(img, layout_params)
+        if layout is not None:
+            # 命中时跳过表格线检测与结构恢复，polygons 已配准到当前图像并为顺时针方向
+            polygons, logi_points = layout.polygons, layout.logi_points
+        else:
+            polygons, rotated_polygons = self.table_line_rec(img, **kwargs)
+            if polygons is None:
+                logging.warning("polygons is None.")
+                return "", 0.0, None, None, None
 
         try:
-            table_res, logi_points = self.table_recover(
-                rotated_polygons, row_threshold, col_threshold
-            )
-            # 将坐标由逆时针转为顺时针方向，后续处理与无线表格对齐
-            polygons[:, 1, :], polygons[:, 3, :] = (
-                polygons[:, 3, :].copy(),
-                polygons[:, 1, :].copy(),
-            )
+            if layout is None:
+                table_res, logi_points = self.table_recover(
+                    rotated_polygons, row_threshold, col_threshold
+                )
+                # 将坐标由逆时针转为顺时针方向，后续处理与无线表格对齐
+                polygons[:, 1, :], polygons[:, 3, :] = (
+                    polygons[:, 3, :].copy(),
+                    polygons[:, 1, :].copy(),
+                )
+                if fingerprint is not None:
+                    self.layout_cache.store(fingerprint, layout_params, polygons, logi_points)
             if not need_ocr:
                 sorted_polygons, idx_list = sorted_ocr_boxes(
                     [box_4_2_poly_to_box_4_1(box) for box in polygons]
@@ -93,24 +288,26 @@ class WiredTableRecognition:
                     logi_points[idx_list],
                     [],
                 )
-            if ocr_result is None and need_ocr:
-                ocr_result, _ = self.ocr(img)
-            cell_box_det_map, not_match_orc_boxes = match_ocr_cell(ocr_result, polygons)
-            # 如果有识别框没有ocr结果，直接进行rec补充
-            cell_box_det_map = self.re_rec(img, polygons, cell_box_det_map, rec_again)
-            # 转换为中间格式，修正识别框坐标,将物理识别框，逻辑识别框，ocr识别框整合为dict，方便后续处理
-            t_rec_ocr_list_dict = self.transform_res(cell_box_det_map, polygons, logi_points)
+            if cell_direct and ocr_result is None:
+                # 按单元格框直接识别，不做整页文字检测，也不需要匹配和补充识别
+                check_deadline("cell_rec")
+                cell_box_det_map, ocr_result = self.rec_cells(img, polygons, cell_batch_size)
+            else:
+                if ocr_result is None and need_ocr:
+                    check_deadline("ocr")
+                    ocr_result, _ = self.ocr(img)
+                cell_box_det_map, not_match_orc_boxes = match_ocr_cell(ocr_result, polygons)
+                # 如果有识别框没有ocr结果，直接进行rec补充
+                cell_box_det_map = self.re_rec(img, polygons, cell_box_det_map, rec_again)
+            # 转换为按列存储的中间结果，修正识别框坐标,将物理识别框，逻辑识别框，ocr识别框整合在一起，方便后续处理
+            table_cells = TableCells.from_cell_box_det_map(cell_box_det_map, polygons, logi_points)
             # 第一行或者第一列为空时，调整代码
-            #adjust_dict = self.adjust_table_cells(t_rec_ocr_list_dict)
-            adjust_dict = self.process_ocr_result(t_rec_ocr_list_dict)
+            keep_mask = table_cells.drop_empty_first_row_col()
             # 将每个单元格中的ocr识别结果排序和同行合并，输出的html能完整保留文字的换行格式
-            t_rec_ocr_list = self.sort_and_gather_ocr_res(t_rec_ocr_list_dict)
-            # cell_box_map =
-            logi_points = [t_box_ocr["t_logic_box"] for t_box_ocr in t_rec_ocr_list]
-            cell_box_det_map = {
-                i: [ocr_box_and_text[1] for ocr_box_and_text in t_box_ocr["t_ocr_res"]]
-                for i, t_box_ocr in enumerate(t_rec_ocr_list)
-            }
+            table_cells.sort_and_gather(threshold=0.3)
+            adjust_cells = table_cells[keep_mask]
+            logi_points = table_cells.logic.tolist()
+            cell_box_det_map = dict(enumerate(table_cells.cell_texts()))
             table_str = plot_html_table(logi_points, cell_box_det_map)
             ocr_boxes_res = [
                 box_4_2_poly_to_box_4_1(ori_ocr[0]) for ori_ocr in ocr_result
@@ -129,146 +326,9 @@ class WiredTableRecognition:
             sorted_polygons,
             sorted_logi_points,
             sorted_ocr_boxes_res,
-            adjust_dict
-
+            adjust_cells,
         )
 
-    def transform_res(
-        self,
-        cell_box_det_map: Dict[int, List[any]],
-        polygons: np.ndarray,
-        logi_points: List[np.ndarray],
-    ) -> List[Dict[str, any]]:
-        res = []
-        for i in range(len(polygons)):
-            ocr_res_list = cell_box_det_map.get(i)
-            if not ocr_res_list:
-                continue
-            xmin = min([ocr_box[0][0][0] for ocr_box in ocr_res_list])
-            ymin = min([ocr_box[0][0][1] for ocr_box in ocr_res_list])
-            xmax = max([ocr_box[0][2][0] for ocr_box in ocr_res_list])
-            ymax = max([ocr_box[0][2][1] for ocr_box in ocr_res_list])
-            dict_res = {
-                # xmin,xmax,ymin,ymax
-                "t_box": [xmin, ymin, xmax, ymax],
-                # row_start,row_end,col_start,col_end
-                "t_logic_box": logi_points[i].tolist(),
-                # [[xmin,xmax,ymin,ymax], text]
-                "t_ocr_res": [
-                    [box_4_2_poly_to_box_4_1(ocr_det[0]), ocr_det[1]]
-                    for ocr_det in ocr_res_list
-                ],
-            }
-            res.append(dict_res)
-        return res
-
-    def process_ocr_result(self, ocr_result):
-        # 删除第一行的字典，并调整其余字典的行数
-        first_row_empty = [entry for entry in ocr_result if
-                           entry['t_logic_box'][0] == 0 and entry['t_logic_box'][1] == 0 and entry['t_ocr_res'][0][
-                               1] == '']
-
-        if len(first_row_empty) == len(
-                [entry for entry in ocr_result if entry['t_logic_box'][0] == 0 and entry['t_logic_box'][1] == 0]):
-            # 如果第一行的所有单元格都为空，删除第一行
-            ocr_result = [entry for entry in ocr_result if entry['t_logic_box'][0] != 0 or entry['t_logic_box'][1] != 0]
-            # 调整剩余字典的行数
-            for entry in ocr_result:
-                entry['t_logic_box'][0] -= 1
-                entry['t_logic_box'][1] -= 1
-
-        # 删除第一列的字典，并调整其余字典的列数
-        first_col_empty = [entry for entry in ocr_result if
-                           entry['t_logic_box'][2] == 0 and entry['t_logic_box'][3] == 0 and entry['t_ocr_res'][0][
-                               1] == '']
-
-        if len(first_col_empty) == len(
-                [entry for entry in ocr_result if entry['t_logic_box'][2] == 0 and entry['t_logic_box'][3] == 0]):
-            # 如果第一列的所有单元格都为空，删除第一列
-            ocr_result = [entry for entry in ocr_result if entry['t_logic_box'][2] != 0 or entry['t_logic_box'][3] != 0]
-            # 调整剩余字典的列数
-            for entry in ocr_result:
-                entry['t_logic_box'][2] -= 1
-                entry['t_logic_box'][3] -= 1
-
-        return ocr_result
-
-    def adjust_table_cells(self, t_rec_ocr_list_dict):
-        """
-        调整表格单元格，去掉第一行和/或第一列的单元格，
-        并更新剩余单元格的行列起始和结束位置。
-
-        参数:
-            t_rec_ocr_list_dict (list): 原始表格单元格识别结果，格式为
-                [
-                    {
-                        "t_box": [xmin, ymin, xmax, ymax],
-                        "t_logic_box": [row_start, row_end, col_start, col_end],
-                        "t_ocr_res": [[box, text], ...]
-                    },
-                    ...
-                ]
-
-        返回:
-            list: 调整后的表格单元格识别结果，格式与输入相同。
-        """
-        # 新的结果列表
-        adjusted_result = []
-
-        # 记录是否第一行和第一列的单元格已被删除
-        remove_first_row = False
-        remove_first_col = False
-
-        # 检查并移除第一行
-        if all(cell and not cell[1] for cell in t_rec_ocr_list_dict[0].get("t_ocr_res", [])):
-            remove_first_row = True
-
-        # 检查并移除第一列
-        if all(row.get("t_ocr_res") and not row["t_ocr_res"][0][1] for row in t_rec_ocr_list_dict):
-            remove_first_col = True
-
-        # 遍历原始结果进行调整
-        for i, row in enumerate(t_rec_ocr_list_dict):
-            adjusted_row = []
-
-            # 如果是第一行并且需要删除，跳过这行
-            if remove_first_row and i == 0:
-                continue
-
-            for j, cell in enumerate(row.get("t_ocr_res", [])):
-                # 如果是第一列并且需要删除，跳过这一列
-                if remove_first_col and j == 0:
-                    continue
-
-                # 更新当前单元格的逻辑位置
-                adjusted_cell = {
-                    "t_box": row.get("t_box"),
-                    "t_logic_box": [
-                        row["t_logic_box"][0] - 1 if i > 0 else row["t_logic_box"][0],
-                        row["t_logic_box"][1] - 1 if i > 0 else row["t_logic_box"][1],
-                        row["t_logic_box"][2] - 1 if j > 0 else row["t_logic_box"][2],
-                        row["t_logic_box"][3] - 1 if j > 0 else row["t_logic_box"][3]
-                    ],
-                    "t_ocr_res": cell
-                }
-                adjusted_row.append(adjusted_cell)
-
-            if adjusted_row:
-                adjusted_result.append(adjusted_row)
-
-        return adjusted_result
-
-    def sort_and_gather_ocr_res(self, res):
-        for i, dict_res in enumerate(res):
-            _, sorted_idx = sorted_ocr_boxes(
-                [ocr_det[0] for ocr_det in dict_res["t_ocr_res"]], threhold=0.3
-            )
-            dict_res["t_ocr_res"] = [dict_res["t_ocr_res"][i] for i in sorted_idx]
-            dict_res["t_ocr_res"] = gather_ocr_list_by_row(
-                dict_res["t_ocr_res"], threhold=0.3
-            )
-        return res
-
     def re_rec(
         self,
         img: np.ndarray,
@@ -276,24 +336,15 @@ class WiredTableRecognition:
         cell_box_map: Dict[int, List[str]],
         rec_again=True,
     ) -> Dict[int, List[Any]]:
-        """找到poly对应为空的框，尝试将直接将poly框直接送到识别中"""
-        for i in range(sorted_polygons.shape[0]):
-            if cell_box_map.get(i):
-                continue
-            if not rec_again:
-                box = sorted_polygons[i]
-                cell_box_map[i] = [[box, "", 1]]
-                continue
-            crop_img = get_rotate_crop_image(img, sorted_polygons[i])
-            pad_img = cv2.copyMakeBorder(
-                crop_img, 5, 5, 100, 100, cv2.BORDER_CONSTANT, value=(255, 255, 255)
-            )
-            rec_res, _ = self.ocr(pad_img, use_det=False, use_cls=True, use_rec=True)
-            box = sorted_polygons[i]
-            text = [rec[0] for rec in rec_res]
-            scores = [rec[1] for rec in rec_res]
-            cell_box_map[i] = [[box, "".join(text), min(scores)]]
-        return cell_box_map
+        return re_rec(self.ocr, img, sorted_polygons, cell_box_map, rec_again)
+
+    def rec_cells(
+        self,
+        img: np.ndarray,
+        polygons: np.ndarray,
+        batch_size: Optional[int] = None,
+    ) -> Tuple[Dict[int, List[Any]], List[List[Any]]]:
+        return rec_cells(self.ocr, img, polygons, batch_size)
 
     def re_rec_high_precise(
         self,